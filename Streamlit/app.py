@@ -6,7 +6,6 @@ from pathlib import Path
 from dotenv import load_dotenv
 import sys
 import json
-import re
 
 # Note: Encoding issues should be handled at the system level
 
@@ -15,6 +14,7 @@ onchain_agent_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspat
 sys.path.append(onchain_agent_path)
 
 from onchain_agent.crew import OnchainAgentCrew
+from onchain_agent.carbon_pipeline import run_carbon_analysis, render_carbon_report
 
 load_dotenv()
 
@@ -275,6 +275,10 @@ if "analysis_complete" not in st.session_state:
     st.session_state.analysis_complete = False
 if "report_data" not in st.session_state:
     st.session_state.report_data = None
+if "moralis_key_set" not in st.session_state:
+    st.session_state.moralis_key_set = False
+if "carbon_report" not in st.session_state:
+    st.session_state.carbon_report = None
 
 # Hero Header
 st.markdown("""
@@ -292,8 +296,8 @@ def create_animated_network_chart(network_data):
     if not network_data:
         return None
     
-    networks = [item['network'].title() for item in network_data]
-    emissions = [item['co2_kg'] for item in network_data]
+    networks = [item.network.title() for item in network_data]
+    emissions = [item.co2_kg for item in network_data]
     
     colors = ['#10b981', '#6366f1', '#8b5cf6', '#ec4899', '#f59e0b']
     
@@ -326,15 +330,12 @@ def create_animated_network_chart(network_data):
 
 def create_equivalents_chart(equivalents):
     """Create modern bar chart for environmental equivalents"""
-    data = []
-    if 'trees' in equivalents:
-        data.append({'category': '🌳 Trees (1 year)', 'value': equivalents['trees'], 'color': '#10b981'})
-    if 'km_driven' in equivalents:
-        data.append({'category': '🚗 Km Driven', 'value': equivalents['km_driven'], 'color': '#ef4444'})
-    if 'smartphone_charges' in equivalents:
-        data.append({'category': '📱 Phone Charges', 'value': equivalents['smartphone_charges'], 'color': '#3b82f6'})
-    if 'led_hours' in equivalents:
-        data.append({'category': '💡 LED Hours', 'value': equivalents['led_hours'], 'color': '#f59e0b'})
+    data = [
+        {'category': '🌳 Trees (1 year)', 'value': equivalents.trees_needed_year, 'color': '#10b981'},
+        {'category': '🚗 Km Driven', 'value': equivalents.km_driven, 'color': '#ef4444'},
+        {'category': '📱 Phone Charges', 'value': equivalents.smartphone_charges, 'color': '#3b82f6'},
+        {'category': '💡 LED Hours', 'value': equivalents.led_bulb_hours, 'color': '#f59e0b'}
+    ]
     
     categories = [d['category'] for d in data]
     values = [d['value'] for d in data]
@@ -361,63 +362,6 @@ def create_equivalents_chart(equivalents):
     
     return fig
 
-def extract_carbon_data(report_text):
-    """Extract carbon footprint data from report"""
-    carbon_data = {}
-    
-    try:
-        co2_match = re.search(r'Total CO2 Emissions[:\s]+([0-9.]+)\s*kg', report_text, re.IGNORECASE)
-        if co2_match:
-            carbon_data['total_co2_kg'] = float(co2_match.group(1))
-        
-        energy_match = re.search(r'Total Energy Consumed[:\s]+([0-9.]+)\s*kWh', report_text, re.IGNORECASE)
-        if energy_match:
-            carbon_data['total_energy_kwh'] = float(energy_match.group(1))
-        
-        tx_match = re.search(r'Total [Tt]ransactions[:\s]+([0-9,]+)', report_text, re.IGNORECASE)
-        if tx_match:
-            carbon_data['total_transactions'] = int(tx_match.group(1).replace(',', ''))
-        
-        if carbon_data.get('total_co2_kg') and carbon_data.get('total_transactions'):
-            carbon_data['avg_per_tx'] = carbon_data['total_co2_kg'] / carbon_data['total_transactions']
-        
-        network_section = re.search(r'Emissions by [Nn]etwork(.*?)(?=\n##|\Z)', report_text, re.DOTALL)
-        if network_section:
-            network_data = []
-            network_lines = re.findall(r'-\s*(\w+):\s*([0-9,]+)\s*txs.*?([0-9.]+)\s*kg\s*CO2', network_section.group(1))
-            for network, txs, co2 in network_lines:
-                network_data.append({
-                    'network': network,
-                    'transactions': int(txs.replace(',', '')),
-                    'co2_kg': float(co2)
-                })
-            carbon_data['network_data'] = network_data
-        
-        equivalents = {}
-        trees_match = re.search(r'trees.*?([0-9.]+)', report_text, re.IGNORECASE)
-        if trees_match:
-            equivalents['trees'] = float(trees_match.group(1))
-        
-        km_match = re.search(r'km driven.*?([0-9.]+)', report_text, re.IGNORECASE)
-        if km_match:
-            equivalents['km_driven'] = float(km_match.group(1))
-        
-        phone_match = re.search(r'smartphone.*?([0-9.]+)', report_text, re.IGNORECASE)
-        if phone_match:
-            equivalents['smartphone_charges'] = float(phone_match.group(1))
-        
-        bulb_match = re.search(r'LED.*?([0-9.]+)', report_text, re.IGNORECASE)
-        if bulb_match:
-            equivalents['led_hours'] = float(bulb_match.group(1))
-        
-        if equivalents:
-            carbon_data['equivalents'] = equivalents
-    
-    except Exception as e:
-        print(f"Error extracting carbon data: {e}")
-    
-    return carbon_data if carbon_data else None
-
 # Sidebar
 with st.sidebar:
     st.markdown("### ⚙️ Configuration")
@@ -432,6 +376,11 @@ with st.sidebar:
         if openai_api_key:
             st.info("💰 Estimated cost per analysis: ~$0.02-0.05 (GPT-3.5-turbo)")
 
+        # The quick carbon check only needs Moralis
+        st.session_state.moralis_key_set = bool(moralis_api_key)
+        if moralis_api_key:
+            os.environ["MORALIS_API_KEY"] = moralis_api_key
+        
         if zapper_api_key and openai_api_key and moralis_api_key:
             os.environ["ZAPPER_API_KEY"] = zapper_api_key
             os.environ["OPENAI_API_KEY"] = openai_api_key
@@ -500,8 +449,12 @@ with tab1:
                     st.write(f"**Networks:** {networks_str}")
                     st.write("🌍 Calculating carbon footprint from transaction gas usage...")
                     
+                    # Drop the previous run's carbon report so the dashboard never shows stale data
+                    st.session_state.carbon_report = None
+                    
                     crew = OnchainAgentCrew()
                     result = crew.crew().kickoff(inputs=inputs)
+                    st.session_state.carbon_report = crew.carbon_tool.last_report
                     
                     status.update(label="✅ Analysis complete!", state="complete", expanded=False)
                     st.session_state.analysis_complete = True
@@ -802,7 +755,8 @@ with tab1:
                 json.dumps({
                     "wallet": wallet_address, 
                     "timestamp": str(Path("outputs/onchain_intelligence_report.md").stat().st_mtime),
-                    "analysis_type": "green_wallet_carbon_analysis"
+                    "analysis_type": "green_wallet_carbon_analysis",
+                    "carbon_footprint": carbon_report.model_dump() if (carbon_report := st.session_state.carbon_report) else None
                 }, indent=2),
                 "green_wallet_data.json",
                 "application/json",
@@ -1025,10 +979,34 @@ with tab2:
     </div>
     """, unsafe_allow_html=True)
     
+    quick_button = st.button(
+        "⚡ Quick Carbon Check (no AI)",
+        disabled=not st.session_state.moralis_key_set,
+        help="Computes the footprint directly from transaction gas, without the AI agents. Needs only a Moralis key.",
+        use_container_width=True
+    )
+    
+    if quick_button:
+        if not wallet_address or not wallet_address.startswith("0x"):
+            st.error("Please enter a valid EVM wallet address in the Analysis & Report tab")
+        else:
+            networks_str = ",".join(["ethereum"] + networks_to_analyze)
+            with st.spinner("Syncing transactions and computing the carbon footprint..."):
+                try:
+                    quick_result = run_carbon_analysis(wallet_address, networks_str)
+                    st.session_state.analysis_complete = True
+                    st.session_state.carbon_report = quick_result["report"]
+                    st.session_state.report_data = render_carbon_report(quick_result["report"])
+                    st.success(f"✅ Carbon footprint computed in {quick_result['elapsed_seconds']}s")
+                    for key, message in quick_result["errors"].items():
+                        st.warning(f"{key}: {message}")
+                except Exception as e:
+                    st.error(f"An error occurred: {str(e)}")
+    
     if st.session_state.analysis_complete and st.session_state.report_data:
-        carbon_section = extract_carbon_data(st.session_state.report_data)
+        carbon_report = st.session_state.carbon_report
         
-        if carbon_section and carbon_section.get('total_co2_kg', 0) > 0:
+        if carbon_report and carbon_report.total_co2_kg > 0:
             # Enhanced Metrics with Better Styling
             col1, col2, col3, col4 = st.columns(4)
             
@@ -1036,7 +1014,7 @@ with tab2:
                 st.markdown(f"""
                 <div class="carbon-metric-enhanced" style="animation-delay: 0s;">
                     <h3>🌱 Total CO2 Emissions</h3>
-                    <div class="value">{carbon_section.get('total_co2_kg', 0):.4f}</div>
+                    <div class="value">{carbon_report.total_co2_kg:.4f}</div>
                     <div class="unit">kg CO2</div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -1045,7 +1023,7 @@ with tab2:
                 st.markdown(f"""
                 <div class="carbon-metric-enhanced" style="animation-delay: 0.2s;">
                     <h3>⚡ Energy Consumption</h3>
-                    <div class="value">{carbon_section.get('total_energy_kwh', 0):.4f}</div>
+                    <div class="value">{carbon_report.total_energy_kwh:.4f}</div>
                     <div class="unit">kWh</div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -1054,7 +1032,7 @@ with tab2:
                 st.markdown(f"""
                 <div class="carbon-metric-enhanced" style="animation-delay: 0.4s;">
                     <h3>📊 Total Transactions</h3>
-                    <div class="value">{carbon_section.get('total_transactions', 0):,}</div>
+                    <div class="value">{carbon_report.total_transactions:,}</div>
                     <div class="unit">transactions</div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -1063,7 +1041,7 @@ with tab2:
                 st.markdown(f"""
                 <div class="carbon-metric-enhanced" style="animation-delay: 0.6s;">
                     <h3>📈 Avg per Transaction</h3>
-                    <div class="value">{carbon_section.get('avg_per_tx', 0):.6f}</div>
+                    <div class="value">{carbon_report.avg_co2_per_tx:.6f}</div>
                     <div class="unit">kg CO2</div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -1078,17 +1056,17 @@ with tab2:
             col1, col2 = st.columns(2)
             
             with col1:
-                if carbon_section.get('network_data'):
-                    fig_pie = create_animated_network_chart(carbon_section['network_data'])
+                if carbon_report.networks:
+                    fig_pie = create_animated_network_chart(carbon_report.networks)
                     st.plotly_chart(fig_pie, use_container_width=True)
             
             with col2:
-                if carbon_section.get('equivalents'):
-                    fig_equiv = create_equivalents_chart(carbon_section['equivalents'])
+                if carbon_report.equivalents:
+                    fig_equiv = create_equivalents_chart(carbon_report.equivalents)
                     st.plotly_chart(fig_equiv, use_container_width=True)
             
             # Enhanced Status Assessment
-            total_co2 = carbon_section.get('total_co2_kg', 0)
+            total_co2 = carbon_report.total_co2_kg
             if total_co2 < 0.1:
                 st.markdown(f"""
                 <div class="carbon-status-card carbon-status-excellent">
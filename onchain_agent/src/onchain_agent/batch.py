@@ -0,0 +1,273 @@
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Union
+
+from onchain_agent.tools import PortfolioTool, MoralisTransactionTool, MultiNetworkAnalysisTool
+from onchain_agent.tools.http_session import run_sync
+
+# Batch analysis of many wallets across a worker pool. Every finished wallet is
+# appended to a checkpoint log, so an interrupted job resumes where it stopped.
+# API calls from every worker thread and process share the per-host budgets of
+# the rate limiter in tools/rate_limit.py.
+
+# Analysis kinds: "data" collects structured portfolio and transaction summaries
+# without any LLM calls, "crew" runs the full agent crew and stores its report
+ANALYSES = ("data", "crew")
+
+EXECUTORS = ("thread", "process")
+
+OUTPUT_FORMATS = (".jsonl", ".parquet")
+
+DEFAULT_NETWORKS = "ethereum"
+
+
+def read_wallets(path: Union[str, Path], default_networks: str = DEFAULT_NETWORKS) -> List[Dict[str, str]]:
+    """Read unique wallets from a CSV or JSONL file as wallet_address/networks pairs.
+
+    CSV files need a ``wallet_address`` (or ``address``) header column and may
+    have a ``networks`` column. JSONL lines are objects with the same keys or
+    bare address strings. Wallets without networks use default_networks.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    elif suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        raise ValueError(f"Unsupported input format: {path.suffix}. Use a .csv or .jsonl file")
+
+    wallets = []
+    seen: Set[str] = set()
+    for row in rows:
+        if isinstance(row, str):
+            row = {"wallet_address": row}
+        address = (row.get("wallet_address") or row.get("address") or "").strip()
+        if not address or address.lower() in seen:
+            continue
+        seen.add(address.lower())
+        wallets.append({
+            "wallet_address": address,
+            "networks": (row.get("networks") or default_networks).strip()
+        })
+    return wallets
+
+
+class BatchCheckpoint:
+    """Append-only JSONL log of finished wallet records, used to resume a batch job."""
+
+    # Wallets with these statuses are not analyzed again on resume
+    DONE_STATUSES = ("ok",)
+
+    def __init__(self, path: Union[str, Path]):
+        """Initialize the checkpoint log at path."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return the latest record per wallet, keyed by lower-cased address."""
+        records: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return records
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line
+                    continue
+                records[record["wallet_address"].lower()] = record
+        return records
+
+    def completed(self) -> Set[str]:
+        """Return the lower-cased addresses that need no further analysis."""
+        return {address for address, record in self.load().items() if record.get("status") in self.DONE_STATUSES}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Durably append one record."""
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+async def acollect_wallet_data(wallet_address: str, networks: str) -> Dict[str, Any]:
+    """Concurrently collect the portfolio and per-network transaction summaries of a wallet."""
+    portfolio_tool = PortfolioTool()
+    transaction_tool = MoralisTransactionTool()
+
+    chains = MultiNetworkAnalysisTool.parse_networks(networks)
+    supported = {network: chain for network, chain in chains.items() if chain is not None}
+
+    portfolio_result, *transaction_results = await asyncio.gather(
+        portfolio_tool.afetch_portfolio(wallet_address),
+        *[transaction_tool.afetch_summary(wallet_address, chain) for chain in supported.values()],
+        return_exceptions=True
+    )
+
+    data: Dict[str, Any] = {"portfolio": None, "transactions": {}, "errors": {}}
+    if isinstance(portfolio_result, BaseException):
+        data["errors"]["portfolio"] = str(portfolio_result)
+    else:
+        data["portfolio"] = portfolio_result[1].model_dump()
+
+    for network, result in zip(supported, transaction_results):
+        if isinstance(result, BaseException):
+            data["errors"][f"transactions.{network}"] = str(result)
+        else:
+            data["transactions"][network] = result.model_dump()
+
+    data["unsupported_networks"] = [network for network, chain in chains.items() if chain is None]
+    return data
+
+
+def _run_crew(wallet_address: str, networks: str, crew_mode: Optional[str]) -> Dict[str, Any]:
+    """Run the full agent crew for one wallet and return its report."""
+    # Imported here so data-only batches do not pay for building the crew
+    from onchain_agent.crew import OnchainAgentCrew
+
+    result = OnchainAgentCrew(mode=crew_mode).crew().kickoff(
+        inputs={"wallet_address": wallet_address, "networks": networks}
+    )
+    return {"report": result.raw, "errors": {}}
+
+
+def analyze_wallet(wallet: Dict[str, str], analysis: str = "data", crew_mode: Optional[str] = None) -> Dict[str, Any]:
+    """Analyze one wallet and return its record. Runs inside a worker thread or process."""
+    started = time.time()
+    record: Dict[str, Any] = {
+        "wallet_address": wallet["wallet_address"],
+        "networks": wallet["networks"],
+        "analysis": analysis
+    }
+
+    try:
+        if analysis == "crew":
+            record.update(_run_crew(wallet["wallet_address"], wallet["networks"], crew_mode))
+        else:
+            record.update(run_sync(acollect_wallet_data(wallet["wallet_address"], wallet["networks"])))
+    except Exception as e:
+        record["errors"] = {"analysis": str(e)}
+
+    has_data = record.get("portfolio") or record.get("transactions") or record.get("report")
+    record["status"] = "ok" if not record["errors"] else ("partial" if has_data else "error")
+    record["analyzed_at"] = datetime.now(timezone.utc).isoformat()
+    record["elapsed_seconds"] = round(time.time() - started, 3)
+    return record
+
+
+def _check_output_format(output_path: Path) -> None:
+    """Fail before any work starts if the output format cannot be written."""
+    suffix = output_path.suffix.lower()
+    if suffix not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_path.suffix}. Use one of: {', '.join(OUTPUT_FORMATS)}")
+    if suffix == ".parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow. Install it with: pip install 'onchain_agent[parquet]'")
+
+
+def write_output(wallets: List[Dict[str, str]], checkpoint: BatchCheckpoint, output_path: Path) -> int:
+    """Write the latest record of every wallet, in input order, as JSONL or Parquet. Returns the record count."""
+    latest = checkpoint.load()
+    records = [latest[w["wallet_address"].lower()] for w in wallets if w["wallet_address"].lower() in latest]
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    if output_path.suffix.lower() == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Nested summaries vary by wallet, so they are stored as JSON strings
+        rows = [
+            {key: json.dumps(value, default=str) if isinstance(value, (dict, list)) else value
+             for key, value in record.items()}
+            for record in records
+        ]
+        pq.write_table(pa.Table.from_pylist(rows), tmp_path)
+    else:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    os.replace(tmp_path, output_path)
+    return len(records)
+
+
+def _make_executor(executor: str, workers: int) -> Executor:
+    """Create the worker pool."""
+    if executor == "process":
+        # Spawned workers start clean instead of inheriting the parent's I/O loop thread
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="onchain-batch")
+
+
+def run_batch(input_path: Union[str, Path], output_path: Union[str, Path], networks: str = DEFAULT_NETWORKS,
+              workers: int = 4, executor: str = "thread", analysis: str = "data", crew_mode: Optional[str] = None,
+              checkpoint_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """Analyze every wallet in input_path across a worker pool and write one record per wallet.
+
+    Completed wallets are logged to a checkpoint (``<output>.checkpoint.jsonl``
+    by default); running the same command again skips wallets that finished
+    successfully and retries the rest.
+    """
+    if analysis not in ANALYSES:
+        raise ValueError(f"Unsupported analysis: {analysis}. Supported analyses: {', '.join(ANALYSES)}")
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unsupported executor: {executor}. Supported executors: {', '.join(EXECUTORS)}")
+
+    output_path = Path(output_path)
+    _check_output_format(output_path)
+
+    wallets = read_wallets(input_path, networks)
+    checkpoint = BatchCheckpoint(checkpoint_path or output_path.with_name(output_path.name + ".checkpoint.jsonl"))
+    completed = checkpoint.completed()
+    pending = [wallet for wallet in wallets if wallet["wallet_address"].lower() not in completed]
+
+    print(f"\n## Batch analysis: {len(wallets)} wallets, {len(wallets) - len(pending)} already completed, "
+          f"{len(pending)} to analyze with {workers} {executor} workers")
+
+    counts = {"ok": 0, "partial": 0, "error": 0}
+    with _make_executor(executor, max(1, workers)) as pool:
+        futures = {pool.submit(analyze_wallet, wallet, analysis, crew_mode): wallet for wallet in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            wallet = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker itself failed, e.g. a crashed process
+                record = {
+                    "wallet_address": wallet["wallet_address"],
+                    "networks": wallet["networks"],
+                    "analysis": analysis,
+                    "errors": {"worker": str(e)},
+                    "status": "error",
+                    "analyzed_at": datetime.now(timezone.utc).isoformat()
+                }
+            checkpoint.append(record)
+            counts[record["status"]] += 1
+            print(f"[{done}/{len(pending)}] {wallet['wallet_address']}: {record['status']}")
+
+    written = write_output(wallets, checkpoint, output_path)
+    return {
+        "wallets": len(wallets),
+        "skipped": len(wallets) - len(pending),
+        **counts,
+        "records_written": written,
+        "output": str(output_path),
+        "checkpoint": str(checkpoint.path)
+    }
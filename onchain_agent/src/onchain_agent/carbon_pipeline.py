@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Dict, Any
+
+from onchain_agent.tools import (
+    CarbonFootprintTool,
+    MoralisTransactionTool,
+    MultiNetworkAnalysisTool,
+    get_transaction_store
+)
+from onchain_agent.tools.http_session import run_sync
+from onchain_agent.tools.models import CarbonReport
+
+# Carbon-only analysis: the footprint is fully deterministic, so this syncs each
+# network's transactions into the local store and computes the report from
+# their gas directly, without building the crew or making any LLM calls.
+
+DEFAULT_NETWORKS = "ethereum"
+
+# Pages of new transactions fetched per network and run
+DEFAULT_MAX_PAGES = 50
+
+
+async def acarbon_analysis(wallet_address: str, networks: str = DEFAULT_NETWORKS,
+                           max_pages: int = DEFAULT_MAX_PAGES) -> Dict[str, Any]:
+    """Sync the wallet's transactions on every supported network concurrently, then compute its carbon report.
+
+    Returns the CarbonReport along with per-network sync errors, the networks
+    without Moralis support and the networks whose sync hit the page budget.
+    """
+    chains = MultiNetworkAnalysisTool.parse_networks(networks)
+    supported = {network: chain for network, chain in chains.items() if chain is not None}
+
+    transaction_tool = MoralisTransactionTool()
+    results = await asyncio.gather(
+        *[transaction_tool.aupdate_store(wallet_address, chain, max_pages) for chain in supported.values()],
+        return_exceptions=True
+    )
+
+    errors: Dict[str, str] = {}
+    stats = {}
+    for network, result in zip(supported, results):
+        if isinstance(result, BaseException):
+            errors[f"transactions.{network}"] = str(result)
+        else:
+            stats[network] = result
+
+    # The store reads and the vectorized calculation stay off the event loop
+    report = await asyncio.to_thread(_compute_report, wallet_address, supported)
+
+    return {
+        "report": report,
+        "errors": errors,
+        "unsupported_networks": [network for network, chain in chains.items() if chain is None],
+        "truncated_networks": [network for network, aggregator in stats.items() if aggregator.truncated],
+        "new_transactions": sum(aggregator.new_transactions for aggregator in stats.values())
+    }
+
+
+def _compute_report(wallet_address: str, chains: Dict[str, str]) -> CarbonReport:
+    """Compute the carbon report of a wallet from its stored transactions on each network's Moralis chain."""
+    # Counts per network and type come from the store, so networks that failed to sync still use their history
+    store = get_transaction_store()
+    network_distribution: Dict[str, int] = {}
+    transaction_types: Dict[str, int] = {}
+    for network, chain in chains.items():
+        type_counts = store.type_counts(wallet_address, chain)
+        if not type_counts:
+            continue
+        network_distribution[network] = sum(type_counts.values())
+        for tx_type, count in type_counts.items():
+            transaction_types[tx_type] = transaction_types.get(tx_type, 0) + count
+
+    return CarbonFootprintTool().compute_report(
+        sum(network_distribution.values()), network_distribution, transaction_types, address=wallet_address
+    )
+
+
+def run_carbon_analysis(wallet_address: str, networks: str = DEFAULT_NETWORKS, max_pages: int = DEFAULT_MAX_PAGES,
+                        save: bool = False) -> Dict[str, Any]:
+    """Compute a wallet's carbon footprint without the crew.
+
+    With save, a report covering any transactions is also written to
+    CarbonFootprintTool.report_path(wallet_address).
+    """
+    started = time.time()
+    result = run_sync(acarbon_analysis(wallet_address, networks, max_pages))
+    if save and result["report"].total_transactions:
+        result["report"].save(CarbonFootprintTool.report_path(wallet_address))
+    result["elapsed_seconds"] = round(time.time() - started, 3)
+    return result
+
+
+def render_carbon_report(report: CarbonReport, compact: bool = False) -> str:
+    """Render a carbon report as CarbonFootprintTool does: compact lines or the full markdown report."""
+    return CarbonFootprintTool().render_report(report, compact)
@@ -1,5 +1,5 @@
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, agent, crew, task, before_kickoff
 from dotenv import load_dotenv
 from crewai.memory import LongTermMemory
 from crewai import LLM
@@ -12,8 +12,13 @@ from onchain_agent.tools import (
     MoralisTransactionTool,
     TokenPriceTool,
     CarbonFootprintTool,
-    SearchTool
+    SearchTool,
+    MultiNetworkAnalysisTool,
+    BatchTransactionDetailsTool,
+    BulkTokenPriceTool
 )
+from onchain_agent.prefetch import inject_prefetched_data
+from onchain_agent.llm_cache import CachedLLM, deterministic_mode
 
 # Load environment variables for API keys
 import os
@@ -24,7 +29,9 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     print("Warning: OPENAI_API_KEY not found in environment variables")
 
-llm = LLM(
+# With ONCHAIN_LLM_DETERMINISTIC=1 (temperature 0, fixed seed) repeated prompts are served from
+# data/llm_cache.db; at this temperature the cache is off unless ONCHAIN_LLM_CACHE=1
+llm = CachedLLM(
     model="gpt-3.5-turbo",  # Cost-effective model for your $3.80 credits
     api_key=OPENAI_API_KEY,
     temperature=0.7,
@@ -44,16 +51,38 @@ class OnchainAgentCrew():
     # Configuration files for agents and tasks
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
+    
+    # Execution modes: sequential runs the analyses one after another, parallel runs
+    # both analysis tasks concurrently on their own prefetched data and joins at the report
+    MODES = ("sequential", "parallel")
  
 
-    def __init__(self):
-        """Initialize the Onchain Agent Crew."""
+    def __init__(self, mode: str = None):
+        """Initialize the Onchain Agent Crew in the given mode (default: ONCHAIN_CREW_MODE or sequential)."""
         super().__init__()
         
+        self.mode = (mode or os.getenv("ONCHAIN_CREW_MODE", "sequential")).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unsupported crew mode: {self.mode}. Supported modes: {', '.join(self.MODES)}")
+        
         # Set up output directories
         Path("outputs").mkdir(exist_ok=True, parents=True)
         Path("memory").mkdir(exist_ok=True, parents=True)
         Path("data").mkdir(exist_ok=True, parents=True)
+        
+        # Shared with the caller, which reads the structured report of the run from it
+        self.carbon_tool = CarbonFootprintTool()
+
+    @property
+    def parallel(self) -> bool:
+        """Whether the analysis tasks run concurrently."""
+        return self.mode == "parallel"
+
+    # Prefetch wallet data before the agents start
+    @before_kickoff
+    def prefetch_wallet_data(self, inputs):
+        """Collect portfolio, price and transaction data concurrently and add it to the task inputs."""
+        return inject_prefetched_data(inputs)
 
 
     # Portfolio Intelligence Analyst Agent
@@ -67,6 +96,7 @@ class OnchainAgentCrew():
             tools=[
                 PortfolioTool(),
                 TokenPriceTool(),
+                BulkTokenPriceTool(),
                 SearchTool()
             ],
             max_rpm=5,   # Reduced to conserve OpenAI credits
@@ -81,8 +111,10 @@ class OnchainAgentCrew():
             config=self.agents_config['transaction_carbon_analyst'],
             verbose=True,
             tools=[
+                MultiNetworkAnalysisTool(),
                 MoralisTransactionTool(),
-                CarbonFootprintTool(),
+                BatchTransactionDetailsTool(),
+                self.carbon_tool,
                 SearchTool() 
             ],
             max_rpm=5,   # Reduced to conserve OpenAI credits
@@ -109,7 +141,8 @@ class OnchainAgentCrew():
         """Task for analyzing portfolio composition and performance."""
         return Task(
             config=self.tasks_config['portfolio_analysis'],
-            agent=self.portfolio_intelligence_analyst()
+            agent=self.portfolio_intelligence_analyst(),
+            async_execution=self.parallel
         )
 
     # Transaction & Carbon Analysis Task (Combined)
@@ -119,9 +152,11 @@ class OnchainAgentCrew():
         return Task(
             config=self.tasks_config['transaction_carbon_analysis'],
             agent=self.transaction_carbon_analyst(),
-            context=[
+            # In parallel mode this task works from its own prefetched data only
+            context=[] if self.parallel else [
                 self.portfolio_analysis()
-            ]
+            ],
+            async_execution=self.parallel
         )
 
     # Comprehensive Intelligence Report Task
@@ -147,5 +182,5 @@ class OnchainAgentCrew():
             tasks=self.tasks,
             process=Process.sequential, 
             verbose=True,
-            memory=True  # Enable both entity and long-term memory
+            memory=not deterministic_mode()  # Enable both entity and long-term memory unless runs must be reproducible
         )
\ No newline at end of file
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator, Union
+
+from crewai import LLM
+from onchain_agent.tools.data_dir import get_data_dir
+
+# Local cache of LLM completions, so re-running the crew on a wallet whose data
+# has not changed replays the previous answers instead of paying for new ones.
+
+
+def _env_flag(name: str, default: str) -> bool:
+    """Read a boolean environment variable."""
+    return os.getenv(name, default).lower() not in ("0", "false", "no", "off", "")
+
+
+def llm_cache_enabled() -> bool:
+    """Check whether LLM responses are cached (ONCHAIN_LLM_CACHE, on by default in deterministic mode).
+    
+    At a nonzero temperature a cache hit replays one random sample, so the
+    cache only gives reproducible results with ONCHAIN_LLM_DETERMINISTIC=1;
+    outside it, set ONCHAIN_LLM_CACHE=1 to cache anyway.
+    """
+    return _env_flag("ONCHAIN_LLM_CACHE", "1" if deterministic_mode() else "0")
+
+
+def deterministic_mode() -> bool:
+    """Check whether deterministic mode is enabled (ONCHAIN_LLM_DETERMINISTIC=1).
+    
+    Deterministic mode samples at temperature 0 with a fixed seed and turns off
+    crew memory, whose recalled context changes from run to run, so identical
+    wallet data produces identical prompts and cache hits are meaningful.
+    """
+    return _env_flag("ONCHAIN_LLM_DETERMINISTIC", "0")
+
+
+class LLMResponseCache:
+    """SQLite store of LLM completions keyed by a hash of the model, sampling parameters and prompt.
+    
+    Entries expire after a TTL and the store is pruned to a maximum number of
+    entries, dropping the oldest first.
+    """
+    
+    DEFAULT_FILENAME = "llm_cache.db"
+    DEFAULT_TTL = 24 * 60 * 60
+    DEFAULT_MAX_ENTRIES = 5000
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at);
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        """Initialize the cache, creating the database file and schema if needed."""
+        self.path = Path(path) if path else get_data_dir() / self.DEFAULT_FILENAME
+        self.ttl = ttl if ttl is not None else float(os.getenv("ONCHAIN_LLM_CACHE_TTL", self.DEFAULT_TTL))
+        self.max_entries = max_entries or int(os.getenv("ONCHAIN_LLM_CACHE_MAX_ENTRIES", self.DEFAULT_MAX_ENTRIES))
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expirations": 0}
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one unit of work, committing on success and always closing it."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def make_key(model: str, params: Dict[str, Any], messages: List[Dict[str, Any]],
+                 tools: Optional[List[dict]] = None) -> str:
+        """Hash everything that determines a completion into a cache key."""
+        payload = json.dumps(
+            {"model": model, "params": params, "messages": messages, "tools": tools or []},
+            sort_keys=True, default=str, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _count(self, counter: str) -> None:
+        """Increment a statistics counter."""
+        with self._lock:
+            self._counters[counter] += 1
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached completion, or None when missing or expired."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and time.time() - row[1] > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._count("expirations")
+                row = None
+        
+        self._count("hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+    
+    def set(self, key: str, model: str, response: str) -> None:
+        """Store a completion and prune the oldest entries beyond the size limit."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, time.time())
+            )
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+    
+    def clear(self) -> None:
+        """Remove every cached completion."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = entries
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        return stats
+
+
+_default_llm_cache: Optional[LLMResponseCache] = None
+_default_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide LLM response cache stored in ``data/llm_cache.db``."""
+    global _default_llm_cache
+    if _default_llm_cache is None:
+        with _default_llm_cache_lock:
+            if _default_llm_cache is None:
+                _default_llm_cache = LLMResponseCache()
+    return _default_llm_cache
+
+
+class CachedLLM(LLM):
+    """LLM that serves repeated completions from the local response cache.
+    
+    The key covers the model, sampling parameters, stop words, tool schemas and
+    the full message list. Prefetched wallet data and every tool observation are
+    part of those messages, so a change in the underlying data changes the key.
+    Calls that execute functions directly are never cached.
+    """
+    
+    # Sampling parameters that change the completion and so belong in the key
+    KEY_PARAMS = ("temperature", "top_p", "n", "max_tokens", "max_completion_tokens", "presence_penalty",
+                  "frequency_penalty", "logit_bias", "seed", "stop", "reasoning_effort")
+    
+    def __init__(self, model: str, cache: Optional[LLMResponseCache] = None, **kwargs):
+        """Initialize the LLM, switching to temperature 0 and a fixed seed in deterministic mode."""
+        if deterministic_mode():
+            kwargs["temperature"] = 0
+            kwargs.setdefault("seed", 42)
+        super().__init__(model, **kwargs)
+        self.cache = cache
+    
+    def _cache_key(self, messages: List[Dict[str, Any]], tools: Optional[List[dict]]) -> str:
+        """Build the cache key for a call."""
+        params = {name: getattr(self, name, None) for name in self.KEY_PARAMS}
+        return LLMResponseCache.make_key(self.model, params, messages, tools)
+    
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        """Return a cached completion when one exists, otherwise call the model and cache its text answer."""
+        if not llm_cache_enabled() or available_functions:
+            return super().call(messages, tools, callbacks, available_functions, from_task, from_agent)
+        
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        
+        cache = self.cache or get_llm_cache()
+        key = self._cache_key(messages, tools)
+        
+        # Check cache first
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        response = super().call(messages, tools, callbacks, available_functions, from_task, from_agent)
+        if isinstance(response, str) and response.strip():
+            cache.set(key, self.model, response)
+        return response
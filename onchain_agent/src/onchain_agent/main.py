@@ -1,10 +1,14 @@
 #!/usr/bin/env python
+import argparse
 import sys
 import warnings
 import os
 from datetime import datetime
 
 from onchain_agent.crew import OnchainAgentCrew
+from onchain_agent.batch import run_batch, ANALYSES, EXECUTORS, DEFAULT_NETWORKS
+from onchain_agent.carbon_pipeline import run_carbon_analysis, render_carbon_report, DEFAULT_MAX_PAGES
+from onchain_agent.tools import CarbonFootprintTool
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -46,6 +50,83 @@ def run():
         raise Exception(f"An error occurred while running the Onchain AI Agent crew: {e}")
 
 
+def batch():
+    """
+    Analyze many wallets from a CSV or JSONL file across a worker pool.
+    
+    Writes one record per wallet to a JSONL or Parquet file. Finished wallets
+    are checkpointed, so re-running the same command resumes a crashed job.
+    """
+    parser = argparse.ArgumentParser(prog="batch", description="Batch wallet analysis")
+    parser.add_argument("input", help="CSV or JSONL file with a wallet_address (or address) field and optional networks field")
+    parser.add_argument("--output", default="outputs/batch_results.jsonl", help="Output file (.jsonl or .parquet)")
+    parser.add_argument("--networks", default=DEFAULT_NETWORKS, help="Networks for wallets that do not list their own")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent workers")
+    parser.add_argument("--executor", choices=EXECUTORS, default="thread", help="Worker pool type")
+    parser.add_argument("--analysis", choices=ANALYSES, default="data",
+                        help="'data' collects structured summaries without LLM calls, 'crew' runs the full crew")
+    parser.add_argument("--crew-mode", default=None, help="Crew execution mode for --analysis crew (sequential or parallel)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.checkpoint.jsonl)")
+    args = parser.parse_args(sys.argv[1:])
+    
+    try:
+        summary = run_batch(
+            args.input,
+            args.output,
+            networks=args.networks,
+            workers=args.workers,
+            executor=args.executor,
+            analysis=args.analysis,
+            crew_mode=args.crew_mode,
+            checkpoint_path=args.checkpoint
+        )
+    except Exception as e:
+        raise Exception(f"An error occurred while running the batch analysis: {e}")
+    
+    print("\n## Batch Complete")
+    print("------------------------------------------")
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print("------------------------------------------\n")
+    return summary
+
+
+def carbon():
+    """
+    Compute a wallet's carbon footprint directly, without the agent crew or any LLM calls.
+    
+    Syncs the wallet's transactions into the local store, computes emissions
+    from their gas, optionally saving the report under the data directory.
+    """
+    parser = argparse.ArgumentParser(prog="carbon", description="Carbon footprint without LLM calls")
+    parser.add_argument("wallet_address", help="Wallet address to analyze")
+    parser.add_argument("--networks", default=DEFAULT_NETWORKS, help="Comma-separated networks to analyze")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES,
+                        help="Pages of new transactions fetched per network, 0 for no limit")
+    parser.add_argument("--compact", action="store_true", help="Print the compact summary instead of the full report")
+    parser.add_argument("--save", action="store_true", help="Save the report as JSON under the data directory")
+    args = parser.parse_args(sys.argv[1:])
+    
+    try:
+        result = run_carbon_analysis(args.wallet_address, args.networks, max_pages=args.max_pages, save=args.save)
+    except Exception as e:
+        raise Exception(f"An error occurred while computing the carbon footprint: {e}")
+    
+    print(render_carbon_report(result["report"], compact=args.compact))
+    print("\n------------------------------------------")
+    print(f"Computed in {result['elapsed_seconds']}s ({result['new_transactions']} new transactions synced)")
+    for key, message in result["errors"].items():
+        print(f"⚠️ {key}: {message}")
+    if result["unsupported_networks"]:
+        print(f"Unsupported networks: {', '.join(result['unsupported_networks'])}")
+    if result["truncated_networks"]:
+        print(f"History incomplete, run again to continue syncing: {', '.join(result['truncated_networks'])}")
+    if args.save and result["report"].total_transactions:
+        print(f"Report saved to {CarbonFootprintTool.report_path(args.wallet_address)}")
+    print("------------------------------------------\n")
+    return result
+
+
 def train():
     """
     Train the crew for a given number of iterations.
@@ -54,7 +135,7 @@ def train():
         "topic": "AI LLMs"
     }
     try:
-        OnchainAgent().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        OnchainAgentCrew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -64,7 +145,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
-        OnchainAgent().crew().replay(task_id=sys.argv[1])
+        OnchainAgentCrew().crew().replay(task_id=sys.argv[1])
 
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -78,7 +159,7 @@ def test():
         "current_year": str(datetime.now().year)
     }
     try:
-        OnchainAgent().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
+        OnchainAgentCrew().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
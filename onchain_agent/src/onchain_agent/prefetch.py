@@ -0,0 +1,127 @@
+import asyncio
+import os
+from typing import Dict, Any
+
+from onchain_agent.tools import (
+    PortfolioTool,
+    MoralisTransactionTool,
+    MultiNetworkAnalysisTool
+)
+from onchain_agent.tools.http_session import run_sync
+
+# Deterministic data collection that runs before the crew kicks off, so agents
+# spend their iterations on analysis instead of deciding when to call tools.
+
+# Number of top holdings whose prices and trends are prefetched
+TOP_HOLDINGS = 10
+
+# Days of price history prefetched for each top holding
+PRICE_HISTORY_DAYS = 30
+
+# Task inputs filled by the prefetch stage
+PREFETCH_KEYS = ("portfolio_data", "price_data", "transaction_data")
+
+NOT_PREFETCHED = "Not prefetched. Collect this data with your tools."
+
+
+def prefetch_enabled() -> bool:
+    """Check whether the prefetch stage is enabled (set ONCHAIN_PREFETCH=0 to disable)."""
+    return os.getenv("ONCHAIN_PREFETCH", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _section_text(result: Any, label: str) -> str:
+    """Return a prefetched section, or a note asking the agent to collect it when its lookup failed."""
+    if isinstance(result, BaseException):
+        return f"{label}: prefetch failed: {str(result)}. {NOT_PREFETCHED}"
+    return result
+
+
+async def _prefetch_portfolio_and_prices(wallet_address: str, portfolio_tool: PortfolioTool) -> Dict[str, str]:
+    """Fetch the portfolio, then price its top holdings in one bulk lookup and compute its risk metrics."""
+    # Also shares the compact summary with later PortfolioTool calls for the same wallet
+    portfolio, summary = await portfolio_tool.afetch_portfolio(wallet_address)
+
+    # A failed price or risk lookup degrades its own section without losing the portfolio
+    price_section, risk_section = await asyncio.gather(
+        portfolio_tool.aprice_section(portfolio, PRICE_HISTORY_DAYS, TOP_HOLDINGS),
+        portfolio_tool.arisk_section(portfolio, wallet_address),
+        return_exceptions=True
+    )
+    price_data = f"{_section_text(price_section, 'Prices')}\n\n{_section_text(risk_section, 'Risk metrics')}"
+
+    return {"portfolio_data": summary.render_compact(), "price_data": price_data}
+
+
+async def _prefetch_transactions(wallet_address: str, networks: str,
+                                 transaction_tool: MoralisTransactionTool) -> str:
+    """Fetch the transaction history of every requested network concurrently."""
+    chains = MultiNetworkAnalysisTool.parse_networks(networks)
+    supported = {network: chain for network, chain in chains.items() if chain is not None}
+
+    results = await asyncio.gather(
+        *[transaction_tool.afetch_summary(wallet_address, chain) for chain in supported.values()],
+        return_exceptions=True
+    )
+
+    sections = []
+    for network, result in zip(supported.keys(), results):
+        sections.append(f"=== Transactions: {network} ===")
+        sections.append(_section_text(
+            result if isinstance(result, BaseException) else result.render_compact(), f"{network} transactions"
+        ))
+        sections.append("")
+
+    unsupported = [network for network, chain in chains.items() if chain is None]
+    if unsupported:
+        sections.append(f"Unsupported networks (skipped): {', '.join(unsupported)}")
+
+    return "\n".join(sections).strip() or "No networks specified."
+
+
+async def aprefetch_wallet_data(wallet_address: str, networks: str) -> Dict[str, str]:
+    """Concurrently collect portfolio, top-holding prices and per-network transactions for a wallet."""
+    portfolio_tool = PortfolioTool()
+    transaction_tool = MoralisTransactionTool()
+
+    portfolio_result, transaction_result = await asyncio.gather(
+        _prefetch_portfolio_and_prices(wallet_address, portfolio_tool),
+        _prefetch_transactions(wallet_address, networks, transaction_tool),
+        return_exceptions=True
+    )
+
+    data = {}
+    if isinstance(portfolio_result, BaseException):
+        data["portfolio_data"] = f"Prefetch failed: {str(portfolio_result)}. {NOT_PREFETCHED}"
+        data["price_data"] = NOT_PREFETCHED
+    else:
+        data.update(portfolio_result)
+
+    if isinstance(transaction_result, BaseException):
+        data["transaction_data"] = f"Prefetch failed: {str(transaction_result)}. {NOT_PREFETCHED}"
+    else:
+        data["transaction_data"] = transaction_result
+
+    return data
+
+
+def prefetch_wallet_data(wallet_address: str, networks: str) -> Dict[str, str]:
+    """Synchronous wrapper around aprefetch_wallet_data."""
+    return run_sync(aprefetch_wallet_data(wallet_address, networks))
+
+
+def inject_prefetched_data(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Add prefetched data to the crew inputs, or placeholders when prefetch is disabled.
+
+    The task descriptions reference every key in PREFETCH_KEYS, so each one is
+    always set to keep input interpolation working.
+    """
+    inputs = dict(inputs or {})
+    wallet_address = inputs.get("wallet_address")
+
+    if prefetch_enabled() and wallet_address:
+        print("\n## Prefetching wallet data")
+        inputs.update(prefetch_wallet_data(wallet_address, inputs.get("networks", "ethereum")))
+
+    for key in PREFETCH_KEYS:
+        inputs.setdefault(key, NOT_PREFETCHED)
+    return inputs
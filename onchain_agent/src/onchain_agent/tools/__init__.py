@@ -3,10 +3,24 @@ from .portfolio_tool import PortfolioTool
 
 from .token_price_tool import TokenPriceTool
 from .transaction_details_tool import TransactionDetailsTool
+from .batch_transaction_details_tool import BatchTransactionDetailsTool
+from .bulk_token_price_tool import BulkTokenPriceTool
 from .app_transactions_tool import AppTransactionsTool
 from .search_tool import SearchTool
 from .moralis_transaction_tool import MoralisTransactionTool
 from .carbon_footprint_tool import CarbonFootprintTool
+from .multi_network_tool import MultiNetworkAnalysisTool
+from .transaction_store import TransactionStore, get_transaction_store
+from .transaction_archive import TransactionArchive, get_transaction_archive
+from .models import PortfolioSummary, TransactionSummary, CarbonReport, NetworkEmission, TokenPrice, PriceMetrics, RiskReport
+from .response_cache import ResponseCache, get_response_cache
+from .rate_limit import RateLimiter, get_rate_limiter
+from .single_flight import SingleFlight, get_single_flight
+from .price_store import PriceStore, get_price_store
+from .carbon_factors import CarbonFactors, CarbonFactorRegistry, get_carbon_factor_registry
+from .carbon_engine import CarbonEngine, CarbonBatchResult
+from .risk_metrics import Position, portfolio_risk
+from .http_session import HttpSessionPool, AsyncHttpSessionPool, get_http_pool, get_async_http_pool, get_pool_stats
 
 # Export all tool classes to make them available when importing from this package
 __all__ = [
@@ -14,5 +28,39 @@ __all__ = [
     'MoralisTransactionTool',
     'TokenPriceTool',
     'CarbonFootprintTool',
-    'SearchTool'
+    'SearchTool',
+    'MultiNetworkAnalysisTool',
+    'BatchTransactionDetailsTool',
+    'BulkTokenPriceTool',
+    'HttpSessionPool',
+    'AsyncHttpSessionPool',
+    'get_http_pool',
+    'get_async_http_pool',
+    'get_pool_stats',
+    'RateLimiter',
+    'get_rate_limiter',
+    'SingleFlight',
+    'get_single_flight',
+    'PriceStore',
+    'get_price_store',
+    'CarbonFactors',
+    'CarbonFactorRegistry',
+    'get_carbon_factor_registry',
+    'CarbonEngine',
+    'CarbonBatchResult',
+    'Position',
+    'portfolio_risk',
+    'TransactionStore',
+    'get_transaction_store',
+    'ResponseCache',
+    'get_response_cache',
+    'TransactionArchive',
+    'get_transaction_archive',
+    'PortfolioSummary',
+    'TransactionSummary',
+    'CarbonReport',
+    'NetworkEmission',
+    'TokenPrice',
+    'PriceMetrics',
+    'RiskReport'
 ]
\ No newline at end of file
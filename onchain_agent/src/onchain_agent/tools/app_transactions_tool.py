@@ -2,6 +2,8 @@ from typing import Type, Dict, Any, List
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .response_cache import get_response_cache
 from datetime import datetime
 
 
@@ -23,9 +25,9 @@ class AppTransactionsTool(BaseTool):
     args_schema: Type[BaseModel] = AppTransactionsToolInput
     
     def __init__(self):
-        """Initialize the AppTransactionsTool with cache."""
+        """Initialize the AppTransactionsTool with the shared response cache."""
         super().__init__()
-        self._cache = {}
+        self._cache = get_response_cache()
     
     def _cache_key(self, app_id: str, network: str, limit: int) -> str:
         """Generate a cache key based on input parameters."""
@@ -33,10 +35,15 @@ class AppTransactionsTool(BaseTool):
     
     def _run(self, app_id: str, network: str = "ethereum", limit: int = 10) -> str:
         """Run the app transactions retrieval with caching."""
+        return run_sync(self._arun(app_id, network, limit))
+    
+    async def _arun(self, app_id: str, network: str = "ethereum", limit: int = 10) -> str:
+        """Asynchronously run the app transactions retrieval with caching."""
         # Check cache first
         cache_key = self._cache_key(app_id, network, limit)
-        if cache_key in self._cache:
-            return f"[CACHED] {self._cache[cache_key]}"
+        cached = self._cache.get("app_transactions", cache_key)
+        if cached is not None:
+            return f"[CACHED] {cached}"
         
         try:
             # Convert network name to chain ID (if needed)
@@ -95,13 +102,13 @@ class AppTransactionsTool(BaseTool):
                 variables["chainId"] = chain_id
             
             # Execute GraphQL query
-            result = ZapperBase.execute_graphql_query(query, variables)
+            result = await ZapperBase.aexecute_graphql_query(query, variables)
             
             # Format the response
             formatted_result = self._format_app_transactions(result, app_id)
             
             # Cache the result
-            self._cache[cache_key] = formatted_result
+            self._cache.set("app_transactions", cache_key, formatted_result)
             
             return formatted_result
             
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .transaction_details_tool import TransactionDetailsTool
+from .graphql_batch import parse_entry, afetch_aliased
+
+
+class BatchTransactionDetailsToolInput(BaseModel):
+    """Input schema for Batch Transaction Details Tool."""
+    transactions: List[str] = Field(..., description="Transactions to look up, each as 'network:hash' (e.g. 'polygon:0xabc...') or a bare hash on the default network")
+    network: str = Field("ethereum", description="Network used for entries without a 'network:' prefix (default: ethereum)")
+
+
+class BatchTransactionDetailsTool(BaseTool):
+    """Tool to fetch details for many transactions across chains in a few GraphQL requests."""
+    name: str = "Batch Transaction Details Tool"
+    description: str = (
+        "Fetches detailed information about many transactions at once, across networks. "
+        "Pass every transaction you need in one call as a list of 'network:hash' entries. "
+        "Returns the details of each transaction in the order given, with per-transaction errors."
+    )
+    args_schema: Type[BaseModel] = BatchTransactionDetailsToolInput
+    
+    # Number of aliased transactionV2 lookups combined into one GraphQL request
+    CHUNK_SIZE: ClassVar[int] = 20
+    
+    # Maximum number of chunk requests in flight at once
+    MAX_CONCURRENT_CHUNKS: ClassVar[int] = 4
+    
+    def __init__(self):
+        """Initialize the BatchTransactionDetailsTool with the single-transaction tool it formats with."""
+        super().__init__()
+        self._details_tool = TransactionDetailsTool()
+    
+    def _run(self, transactions: List[str], network: str = "ethereum") -> str:
+        """Run the batch transaction details retrieval."""
+        return run_sync(self._arun(transactions, network))
+    
+    async def _arun(self, transactions: List[str], network: str = "ethereum") -> str:
+        """Asynchronously resolve cached and archived entries, then fetch the rest in concurrent chunks."""
+        if not transactions:
+            return "No transactions specified. Provide a list of 'network:hash' entries."
+        
+        entries = [parse_entry(entry, network) for entry in transactions]
+        results: List[Optional[str]] = [None] * len(entries)
+        
+        # Unique (chain ID, hash) pairs still to fetch, mapped to the entries that asked for them
+        pending: Dict[Tuple[int, str], List[int]] = {}
+        
+        for index, (entry_network, transaction_hash) in enumerate(entries):
+            try:
+                chain_id = ZapperBase.get_chain_id(entry_network)
+            except ValueError as e:
+                results[index] = f"Error: {str(e)}"
+                continue
+            
+            # Check cache first, then the archive of finalized transactions
+            cached = await asyncio.to_thread(self._details_tool.lookup, chain_id, transaction_hash, entry_network)
+            if cached is not None:
+                results[index] = f"[CACHED] {cached}"
+                continue
+            
+            pending.setdefault((chain_id, transaction_hash.lower()), []).append(index)
+        
+        keys = list(pending.keys())
+        chunks = [keys[i:i + self.CHUNK_SIZE] for i in range(0, len(keys), self.CHUNK_SIZE)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNKS)
+        
+        async def bounded(chunk):
+            async with semaphore:
+                return await self._fetch_chunk(chunk)
+        
+        chunk_results = await asyncio.gather(*[bounded(chunk) for chunk in chunks])
+        
+        for chunk_result in chunk_results:
+            for key, outcome in chunk_result.items():
+                for index in pending[key]:
+                    entry_network, transaction_hash = entries[index]
+                    if isinstance(outcome, str):
+                        results[index] = f"Error fetching transaction details: {outcome}"
+                        continue
+                    formatted_result = self._details_tool.format_transaction_details(
+                        {"data": {"transactionV2": outcome}}, transaction_hash, entry_network
+                    )
+                    if outcome:
+                        await asyncio.to_thread(
+                            self._details_tool.store_result, key[0], transaction_hash, entry_network,
+                            outcome, formatted_result
+                        )
+                    results[index] = formatted_result
+        
+        return self._format_batch_result(entries, results, len(keys), len(chunks))
+    
+    async def _fetch_chunk(self, chunk: List[Tuple[int, str]]) -> Dict[Tuple[int, str], Any]:
+        """Fetch one chunk with an aliased query, returning each transaction's data or an error message."""
+        return await afetch_aliased(
+            "BatchTransactionDetails", "transactionV2", TransactionDetailsTool.TRANSACTION_FIELDS,
+            {"hash": "String!", "chainId": "Int!"},
+            [(key, {"hash": key[1], "chainId": key[0]}) for key in chunk]
+        )
+    
+    def _format_batch_result(self, entries: List[Tuple[str, str]], results: List[Optional[str]],
+                             fetched: int, requests_made: int) -> str:
+        """Combine the per-transaction results into one report in input order."""
+        summary = [
+            f"Batch Transaction Details for {len(entries)} transactions "
+            f"({fetched} fetched in {requests_made} API requests)",
+            ""
+        ]
+        
+        for index, ((entry_network, transaction_hash), result) in enumerate(zip(entries, results), 1):
+            summary.append(f"=== [{index}] {entry_network}:{transaction_hash} ===")
+            summary.append(result or "No result")
+            summary.append("")
+        
+        return "\n".join(summary).strip()
@@ -0,0 +1,243 @@
+import asyncio
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar, Union
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .response_cache import get_response_cache
+from .token_price_tool import TokenPriceTool
+from .chains import CHAIN_MAP
+from .graphql_batch import parse_entry, afetch_aliased
+from .price_store import get_price_store
+from .models import TokenPrice
+
+
+class BulkTokenPriceToolInput(BaseModel):
+    """Input schema for Bulk Token Price Tool."""
+    tokens: List[str] = Field(..., description="Tokens to price, each as 'network:address' (e.g. 'polygon:0xabc...') or a bare address on the default network")
+    network: str = Field("ethereum", description="Network used for entries without a 'network:' prefix (default: ethereum)")
+    days: int = Field(30, description="Number of days the price trend covers (default: 30)")
+    currency: str = Field("USD", description="Currency for price data (default: USD)")
+
+
+class BulkTokenPriceTool(BaseTool):
+    """Tool to fetch prices and trends for many tokens across chains in a few GraphQL requests."""
+    name: str = "Bulk Token Price Tool"
+    description: str = (
+        "Fetches current prices, short-term changes and the price trend of many tokens at once, across networks. "
+        "Pass every token you need in one call as a list of 'network:address' entries. "
+        "Returns a price table in the order given, with per-token errors."
+    )
+    args_schema: Type[BaseModel] = BulkTokenPriceToolInput
+    
+    # Number of aliased fungibleTokenV2 lookups combined into one GraphQL request
+    CHUNK_SIZE: ClassVar[int] = 25
+    
+    # Maximum number of chunk requests in flight at once
+    MAX_CONCURRENT_CHUNKS: ClassVar[int] = 4
+    
+    def __init__(self):
+        """Initialize the BulkTokenPriceTool with the shared response cache and the single-token tool it formats with."""
+        super().__init__()
+        self._cache = get_response_cache()
+        self._price_tool = TokenPriceTool()
+        self._store = get_price_store()
+    
+    @staticmethod
+    def network_key(network_name: Optional[str]) -> Optional[str]:
+        """Map a network name such as 'BNB Chain' to a ZapperBase network key, or None if unsupported."""
+        if not network_name:
+            return None
+        name = network_name.lower()
+        if name in ZapperBase.NETWORK_IDS:
+            return name
+        chain = CHAIN_MAP.get(name)
+        return chain if chain in ZapperBase.NETWORK_IDS else None
+    
+    def _cache_key(self, token_address: str, network: str, days: int, currency: str) -> str:
+        """Generate a cache key for one token's price row."""
+        return f"row:{token_address.lower()}:{network.lower()}:{days}:{currency.upper()}"
+    
+    def _run(self, tokens: List[str], network: str = "ethereum", days: int = 30, currency: str = "USD") -> str:
+        """Run the bulk token price retrieval."""
+        return run_sync(self._arun(tokens, network, days, currency))
+    
+    async def _arun(self, tokens: List[str], network: str = "ethereum", days: int = 30, currency: str = "USD") -> str:
+        """Asynchronously fetch the price table for a list of tokens."""
+        if not tokens:
+            return "No tokens specified. Provide a list of 'network:address' entries."
+        
+        entries = [parse_entry(entry, network) for entry in tokens]
+        prices, requests_made = await self.afetch_prices(entries, days, currency)
+        return self.format_price_table([prices[(n, a.lower())] for n, a in entries], days, requests_made)
+    
+    async def afetch_prices(self, entries: List[Tuple[str, str]], days: int = 30, currency: str = "USD"
+                            ) -> Tuple[Dict[Tuple[str, str], Union[TokenPrice, str]], int]:
+        """Price (network, address) pairs in concurrent aliased chunks.
+        
+        Returns a map from (network, lower-cased address) to a TokenPrice or an
+        error message, and the number of API requests made.
+        """
+        results: Dict[Tuple[str, str], Union[TokenPrice, str]] = {}
+        
+        # Unique tokens still to fetch, with their chain IDs
+        pending: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        
+        for entry_network, token_address in entries:
+            key = (entry_network, token_address.lower())
+            if key in results or key in pending:
+                continue
+            try:
+                chain_id = ZapperBase.get_chain_id(entry_network)
+            except ValueError as e:
+                results[key] = f"Error: {str(e)}"
+                continue
+            
+            # Check cache first
+            cached = self._cache.get("price", self._cache_key(token_address, entry_network, days, currency))
+            if cached is not None:
+                results[key] = TokenPrice(**cached)
+                continue
+            
+            pending[key] = (chain_id, token_address)
+        
+        keys = list(pending.keys())
+        chunks = [keys[i:i + self.CHUNK_SIZE] for i in range(0, len(keys), self.CHUNK_SIZE)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNKS)
+        time_frame = TokenPriceTool.map_days_to_timeframe(days)
+        
+        async def bounded(chunk):
+            async with semaphore:
+                return await self._fetch_chunk([(key, *pending[key]) for key in chunk], currency, time_frame)
+        
+        chunk_results = await asyncio.gather(*[bounded(chunk) for chunk in chunks])
+        
+        for chunk_result in chunk_results:
+            for key, outcome in chunk_result.items():
+                entry_network, token_address = key[0], pending[key][1]
+                if isinstance(outcome, str):
+                    results[key] = f"Error fetching price: {outcome}"
+                    continue
+                if not outcome:
+                    results[key] = f"No token information available for {token_address}."
+                    continue
+                
+                price = self._to_token_price(outcome, token_address, entry_network)
+                results[key] = price
+                self._cache.set("price", self._cache_key(token_address, entry_network, days, currency), price.model_dump())
+                
+                # Store the ticks and cache the single-token report, metrics included, so TokenPriceTool calls hit too
+                if currency.upper() == "USD":
+                    await asyncio.to_thread(
+                        self._price_tool.cache_result, {"data": {"fungibleTokenV2": outcome}}, pending[key][0],
+                        token_address, entry_network, days, currency
+                    )
+        
+        return results, len(chunks)
+    
+    async def aensure_history(self, tokens: List[Tuple[int, str]], days: int) -> int:
+        """Fill gaps in the local USD price history of (chain_id, address) pairs so it covers the last days.
+        
+        Tokens missing the same TimeFrame window share aliased ticks-only
+        queries. Returns the number of API requests made.
+        """
+        # Each lookup loads the token's stored history, so they run off the event loop
+        frames = await asyncio.gather(*[
+            asyncio.to_thread(self._store.missing_timeframe, chain_id, token_address, days)
+            for chain_id, token_address in tokens
+        ])
+        
+        by_frame: Dict[str, Dict[Tuple[str, str], Tuple[int, str]]] = {}
+        for (chain_id, token_address), time_frame in zip(tokens, frames):
+            if time_frame is not None:
+                by_frame.setdefault(time_frame, {})[(str(chain_id), token_address.lower())] = (chain_id, token_address)
+        
+        chunks = []
+        for time_frame, pending in by_frame.items():
+            keys = list(pending.keys())
+            chunks.extend(
+                (time_frame, [(key, *pending[key]) for key in keys[i:i + self.CHUNK_SIZE]])
+                for i in range(0, len(keys), self.CHUNK_SIZE)
+            )
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNKS)
+        
+        async def bounded(time_frame, chunk):
+            async with semaphore:
+                outcomes = await self._fetch_chunk(chunk, "USD", time_frame, TokenPriceTool.PRICE_TICK_FIELDS)
+            for key, chain_id, token_address in chunk:
+                outcome = outcomes.get(key)
+                # Failed tokens keep the history already stored
+                if outcome and not isinstance(outcome, str):
+                    await asyncio.to_thread(
+                        self._price_tool.store_ticks, {"data": {"fungibleTokenV2": outcome}}, chain_id,
+                        token_address, time_frame
+                    )
+        
+        await asyncio.gather(*[bounded(time_frame, chunk) for time_frame, chunk in chunks])
+        return len(chunks)
+    
+    async def _fetch_chunk(self, chunk: List[Tuple[Tuple[str, str], int, str]], currency: str,
+                           time_frame: str, fields: Optional[str] = None) -> Dict[Tuple[str, str], Any]:
+        """Fetch one chunk with an aliased query, returning each token's data or an error message."""
+        return await afetch_aliased(
+            "BulkTokenPrices", "fungibleTokenV2", fields or TokenPriceTool.TOKEN_FIELDS,
+            {"address": "Address!", "chainId": "Int!"},
+            [(key, {"address": token_address, "chainId": chain_id}) for key, chain_id, token_address in chunk],
+            {"currency": ("Currency!", currency.upper()), "timeFrame": ("TimeFrame!", time_frame)}
+        )
+    
+    @staticmethod
+    def _to_token_price(token_data: Dict[str, Any], token_address: str, network: str) -> TokenPrice:
+        """Convert a fungibleTokenV2 payload into a TokenPrice."""
+        price_data = token_data.get("priceData") or {}
+        
+        def number(field: str) -> float:
+            try:
+                return float(price_data.get(field) or 0)
+            except (TypeError, ValueError):
+                return 0.0
+        
+        # Trend over the requested period from the first and last price ticks
+        trend_percent = None
+        price_ticks = price_data.get("priceTicks") or []
+        if len(price_ticks) >= 2:
+            start_price = float(price_ticks[0].get("close") or 0)
+            end_price = float(price_ticks[-1].get("close") or 0)
+            if start_price > 0:
+                trend_percent = (end_price - start_price) / start_price * 100
+        
+        return TokenPrice(
+            address=token_address,
+            network=network,
+            symbol=token_data.get("symbol") or "Unknown",
+            name=token_data.get("name"),
+            price=number("price"),
+            change_5m=number("priceChange5m"),
+            change_1h=number("priceChange1h"),
+            change_24h=number("priceChange24h"),
+            trend_percent=trend_percent,
+            market_cap=number("marketCap"),
+            volume_24h=number("volume24h"),
+            liquidity=number("totalLiquidity")
+        )
+    
+    @staticmethod
+    def format_price_table(prices: List[Union[TokenPrice, str]], days: int, requests_made: Optional[int] = None) -> str:
+        """Render prices as a markdown table in input order, followed by per-token errors."""
+        summary = [f"Token Prices for {len(prices)} tokens" + (
+            f" ({requests_made} API requests)" if requests_made is not None else ""
+        ), ""]
+        
+        rows = [price for price in prices if isinstance(price, TokenPrice)]
+        if rows:
+            summary.append(f"| Token | Network | Price | 1h | 24h | {days}d trend | Market Cap | Volume 24h |")
+            summary.append("|---|---|---|---|---|---|---|---|")
+            summary.extend(price.render_row() for price in rows)
+        
+        errors = [(index, price) for index, price in enumerate(prices, 1) if not isinstance(price, TokenPrice)]
+        if errors:
+            summary.append("")
+            summary.append("Errors:")
+            summary.extend(f"- [{index}] {message}" for index, message in errors)
+        
+        return "\n".join(summary).strip()
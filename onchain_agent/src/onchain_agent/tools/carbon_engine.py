@@ -0,0 +1,427 @@
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .models import CarbonEquivalents, CarbonReport, NetworkEmission
+from .carbon_factors import CarbonFactorRegistry, CarbonFactors, FactorSchedule, get_carbon_factor_registry
+
+
+def _encode(values: Any, size: int, fill: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode a column of labels as integer codes into its sorted unique values."""
+    if values is None:
+        return np.zeros(size, dtype=np.int64), np.array([fill])
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = values.astype(str)
+    
+    # Sorting millions of strings is slow, so fixed-width strings are hashed to integers and
+    # grouped by those; the groups are checked against the strings and collisions fall back
+    if values.dtype.kind == "U" and values.size:
+        values = np.ascontiguousarray(values).reshape(-1)
+        word = np.uint64 if values.dtype.itemsize % 8 == 0 else np.uint32
+        words = values.view(word).reshape(values.size, -1)
+        hashes = words @ (np.uint64(1099511628211) ** np.arange(words.shape[1], dtype=np.uint64))
+        
+        order = np.argsort(hashes)
+        sorted_hashes = hashes[order]
+        starts = np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]]
+        codes = np.empty(values.size, dtype=np.int64)
+        codes[order] = np.cumsum(starts) - 1
+        uniques = values[order[starts]]
+        # Compared in slices so the check never materializes a second full copy of the strings
+        step = 1 << 20
+        if all(np.array_equal(uniques[codes[i:i + step]], values[i:i + step]) for i in range(0, values.size, step)):
+            rank = np.empty(uniques.size, dtype=np.int64)
+            by_value = np.argsort(uniques)
+            rank[by_value] = np.arange(uniques.size)
+            return rank[codes], uniques[by_value]
+    
+    uniques, codes = np.unique(values, return_inverse=True)
+    return codes.reshape(-1), uniques
+
+
+def _column(values: Any, name: str, size: int) -> np.ndarray:
+    """Flatten a batch column to one dimension, checking it has one value per row."""
+    values = np.asarray(values).reshape(-1)
+    if values.size != size:
+        raise ValueError(f"Column '{name}' has {values.size} rows, expected {size}")
+    return values
+
+
+def _gas_column(values: Any, size: int) -> np.ndarray:
+    """Convert the gas used column to float64, with 0 marking rows without gas.
+    
+    Integers and floats are accepted, with NaN and None as missing gas.
+    Other values, such as strings, raise ValueError.
+    """
+    values = _column(values, "gas", size)
+    if values.dtype.kind in "US":
+        raise ValueError("Column 'gas' must be numeric")
+    if values.dtype == object:
+        values = np.where(np.equal(values, None), np.nan, values)
+    try:
+        values = values.astype(np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("Column 'gas' must be numeric")
+    return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _integer_column(values: Any, name: str, size: int, timestamps: bool = False) -> np.ndarray:
+    """Convert a block number or Unix timestamp column to int64, with 0 marking missing values.
+    
+    Integers and floats are accepted, with NaN and None as missing. Timestamps
+    may also be datetime64, and values above 1e12 are taken as milliseconds.
+    Strings such as ISO dates raise ValueError instead of being misread.
+    """
+    values = _column(values, name, size)
+    
+    if values.dtype == object:
+        values = np.where(np.equal(values, None), np.nan, values)
+        try:
+            values = values.astype(np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Column '{name}' must be numeric; convert date strings to Unix seconds or datetime64 first")
+    
+    kind = values.dtype.kind
+    if kind == "M" and timestamps:
+        seconds = values.astype("datetime64[s]")
+        return np.where(np.isnat(seconds), 0, seconds.astype(np.int64))
+    if kind in "US":
+        raise ValueError(f"Column '{name}' must be numeric; convert date strings to Unix seconds or datetime64 first")
+    if kind not in "biuf":
+        raise ValueError(f"Column '{name}' must be numeric, got dtype {values.dtype}")
+    
+    if kind == "f":
+        values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    if timestamps:
+        values = np.where(values > 1e12, values // 1000, values)
+    return values.astype(np.int64)
+
+
+class CarbonBatchResult:
+    """Per-wallet and aggregate emissions of a columnar transaction batch, as NumPy arrays.
+    
+    Entry i of every per-wallet array belongs to ``wallets[i]``; the
+    ``network_*`` matrices have one column per entry of ``networks``.
+    Nothing is formatted until report or render_summary is called.
+    """
+    
+    def __init__(self, wallets: np.ndarray, networks: List[str], transactions: np.ndarray, gas_used: np.ndarray,
+                 co2_kg: np.ndarray, energy_kwh: np.ndarray, network_transactions: np.ndarray,
+                 network_co2_kg: np.ndarray, network_energy_kwh: np.ndarray):
+        """Initialize the result from per-wallet arrays and wallet x network matrices."""
+        self.wallets = wallets
+        self.networks = networks
+        self.transactions = transactions
+        self.gas_used = gas_used
+        self.co2_kg = co2_kg
+        self.energy_kwh = energy_kwh
+        self.network_transactions = network_transactions
+        self.network_co2_kg = network_co2_kg
+        self.network_energy_kwh = network_energy_kwh
+        self.equivalents = CarbonEquivalents.ratios(co2_kg, energy_kwh)
+        self._index: Optional[Dict[str, int]] = None
+    
+    def __len__(self) -> int:
+        """Number of wallets."""
+        return int(self.wallets.size)
+    
+    @property
+    def totals(self) -> Dict[str, float]:
+        """Aggregate transactions, gas, emissions, energy and equivalents over all wallets."""
+        co2_kg, energy_kwh = float(self.co2_kg.sum()), float(self.energy_kwh.sum())
+        return {
+            "wallets": len(self),
+            "transactions": int(self.transactions.sum()),
+            "gas_used": int(self.gas_used.sum()),
+            "co2_kg": co2_kg,
+            "energy_kwh": energy_kwh,
+            **CarbonEquivalents.ratios(co2_kg, energy_kwh)
+        }
+    
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Return one array per column: wallet totals, equivalents and CO2 per network."""
+        columns = {
+            "wallet": self.wallets,
+            "transactions": self.transactions,
+            "gas_used": self.gas_used,
+            "co2_kg": self.co2_kg,
+            "energy_kwh": self.energy_kwh,
+            **self.equivalents
+        }
+        for i, network in enumerate(self.networks):
+            columns[f"co2_kg_{network}"] = self.network_co2_kg[:, i]
+        return columns
+    
+    def to_dataframe(self):
+        """Return to_columns as a pandas DataFrame indexed by wallet."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ValueError("DataFrame output requires pandas. Install it with: pip install pandas")
+        return pd.DataFrame(self.to_columns()).set_index("wallet")
+    
+    def report(self, wallet: str) -> CarbonReport:
+        """Build the CarbonReport of one wallet."""
+        if self._index is None:
+            self._index = {str(w): i for i, w in enumerate(self.wallets)}
+        i = self._index[wallet.lower()]
+        return CarbonReport(
+            total_transactions=int(self.transactions[i]),
+            total_co2_kg=float(self.co2_kg[i]),
+            total_energy_kwh=float(self.energy_kwh[i]),
+            networks=[
+                NetworkEmission(
+                    network=network,
+                    transactions=int(self.network_transactions[i, j]),
+                    co2_kg=float(self.network_co2_kg[i, j]),
+                    energy_kwh=float(self.network_energy_kwh[i, j]),
+                    method="batch"
+                )
+                for j, network in enumerate(self.networks) if self.network_transactions[i, j]
+            ],
+            equivalents=CarbonEquivalents(**{name: float(values[i]) for name, values in self.equivalents.items()})
+        )
+    
+    def render_summary(self, top: int = 10) -> str:
+        """Render aggregate totals, totals per network and the top emitting wallets."""
+        totals = self.totals
+        lines = [
+            f"Carbon batch: {totals['wallets']:,} wallets, {totals['transactions']:,} txs, "
+            f"{totals['co2_kg']:.4f} kg CO2, {totals['energy_kwh']:.4f} kWh",
+            f"Equivalents: {totals['trees_needed_year']:.2f} tree-years, {totals['km_driven']:.2f} km driven, "
+            f"{totals['smartphone_charges']:.0f} phone charges, {totals['led_bulb_hours']:.0f} LED hours"
+        ]
+        if self.networks:
+            network_co2 = self.network_co2_kg.sum(axis=0)
+            network_txs = self.network_transactions.sum(axis=0)
+            lines.append("By network: " + "; ".join(
+                f"{self.networks[j]} {int(network_txs[j]):,} txs {network_co2[j]:.4f} kg"
+                for j in np.argsort(-network_co2)
+            ))
+        if len(self) and top:
+            order = np.argsort(-self.co2_kg, kind="stable")[:top]
+            lines.append(f"Top {len(order)} wallets: " + "; ".join(
+                f"{self.wallets[i]} {self.co2_kg[i]:.4f} kg ({int(self.transactions[i]):,} txs)" for i in order
+            ))
+        return "\n".join(lines)
+
+
+class CarbonEngine:
+    """Vectorized gas-based emissions model.
+    
+    Emissions of a transaction are its gas used times the network's energy
+    per unit of gas, times the carbon intensity of that energy. Both factors
+    come from the compiled carbon factors; networks without a gas factor
+    derive one from their per-transaction factor, which describes a simple
+    transfer. Networks with a ``schedule`` (such as Ethereum before and after
+    the Merge) use the factors of the period each transaction falls in.
+    All transactions of all networks are processed as one set of NumPy
+    arrays, so a history of 100k transactions takes milliseconds.
+    """
+    
+    def __init__(self, registry: Optional[CarbonFactorRegistry] = None):
+        """Initialize the engine with a carbon factor registry (default: the process-wide one)."""
+        self._registry = registry or get_carbon_factor_registry()
+    
+    @property
+    def carbon_factors(self) -> CarbonFactors:
+        """The current compiled carbon factors."""
+        return self._registry.get()
+    
+    def network_key(self, network: str) -> str:
+        """Normalize a network or chain name to a carbon_data.json key."""
+        return self.carbon_factors.network_key(network)
+    
+    def network_data(self, network: str) -> Dict[str, Any]:
+        """Return the carbon data of a network, or the defaults if it is unknown."""
+        return self.carbon_factors.network_data(network)
+    
+    def schedule(self, network: str) -> FactorSchedule:
+        """Return the factor schedule of a network."""
+        carbon_factors = self.carbon_factors
+        return carbon_factors.schedules[carbon_factors.network_id(network)]
+    
+    def factors(self, network: str) -> Tuple[float, float]:
+        """Return a network's current energy per unit of gas (kWh) and carbon intensity (kg CO2 per kWh)."""
+        carbon_factors = self.carbon_factors
+        network_id = carbon_factors.network_id(network)
+        return float(carbon_factors.energy_per_gas[network_id]), float(carbon_factors.co2_per_kwh[network_id])
+    
+    def transaction_emissions(self, network: str, gas_used: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                              block_numbers: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-transaction energy (kWh) and CO2 (kg) for an array of gas used on one network.
+        
+        Without timestamps or block numbers the network's current factors apply.
+        """
+        gas_used = np.asarray(gas_used, dtype=np.float64)
+        schedule = self.schedule(network)
+        periods = schedule.lookup(gas_used.size, timestamps, block_numbers)
+        energy = gas_used * schedule.energy_per_gas[periods]
+        return energy, energy * schedule.co2_per_kwh[periods]
+    
+    def compute(self, activity: Dict[str, Dict[str, np.ndarray]]) -> List[NetworkEmission]:
+        """Compute emissions per network from per-transaction arrays.
+        
+        activity maps each network to a ``gas_used`` array and optional
+        ``timestamp`` (Unix seconds) and ``block_number`` arrays of the same
+        length. These select each transaction's factor schedule period, and
+        timestamps add a per-month breakdown of the emissions.
+        """
+        networks = list(activity.keys())
+        if not networks:
+            return []
+        carbon_factors = self.carbon_factors
+        schedules = [carbon_factors.schedules[network_id] for network_id in carbon_factors.network_id_array(networks)]
+        
+        gas = [np.asarray(activity[n]["gas_used"], dtype=np.float64) for n in networks]
+        counts = np.array([g.size for g in gas])
+        index = np.repeat(np.arange(len(networks)), counts)
+        gas_used = np.concatenate(gas)
+        
+        # Resolve each transaction's factors from its network's schedule, one vectorized lookup per network
+        energy_per_gas = np.empty(gas_used.size)
+        co2_per_kwh = np.empty(gas_used.size)
+        offsets = np.r_[0, np.cumsum(counts)]
+        periods = []
+        for i, (network, schedule) in enumerate(zip(networks, schedules)):
+            network_periods = schedule.lookup(
+                int(counts[i]), activity[network].get("timestamp"), activity[network].get("block_number")
+            )
+            energy_per_gas[offsets[i]:offsets[i + 1]] = schedule.energy_per_gas[network_periods]
+            co2_per_kwh[offsets[i]:offsets[i + 1]] = schedule.co2_per_kwh[network_periods]
+            periods.append(network_periods)
+        energy = gas_used * energy_per_gas
+        co2 = energy * co2_per_kwh
+        
+        totals = {
+            "gas": np.bincount(index, weights=gas_used, minlength=len(networks)),
+            "energy": np.bincount(index, weights=energy, minlength=len(networks)),
+            "co2": np.bincount(index, weights=co2, minlength=len(networks))
+        }
+        monthly = self._monthly(activity, networks, index, co2)
+        
+        return [
+            NetworkEmission(
+                network=network,
+                transactions=int(counts[i]),
+                co2_kg=float(totals["co2"][i]),
+                energy_kwh=float(totals["energy"][i]),
+                gas_used=int(totals["gas"][i]),
+                method="gas",
+                monthly_co2_kg=monthly.get(i, {}),
+                period_co2_kg=self._by_period(schedules[i], periods[i], co2[offsets[i]:offsets[i + 1]])
+            )
+            for i, network in enumerate(networks)
+        ]
+    
+    def compute_batch(self, batch: Mapping[str, Any]) -> CarbonBatchResult:
+        """Compute per-wallet emissions for a columnar batch of transactions in one vectorized pass.
+        
+        batch maps column names to equal-length arrays (a dict of arrays or
+        lists, or a DataFrame): ``wallet`` and ``network`` are required;
+        ``gas`` (gas used), ``tx_type``, ``timestamp`` (Unix seconds or
+        milliseconds, or datetime64) and ``block_number`` are optional. A
+        column whose length differs from ``wallet`` raises ValueError; see
+        _gas_column and _integer_column for the values they accept. Rows with
+        gas use the network's gas factors for the schedule period they fall
+        in; rows without (0, None or NaN) use its per-transaction factors
+        weighted by their type's multiplier. Wallet addresses are compared
+        case-insensitively and reported in lower case.
+        """
+        carbon_factors = self.carbon_factors
+        columns = set(batch.keys())
+        wallet_codes, wallets = _encode(batch["wallet"], 0, "")
+        size = int(wallet_codes.size)
+        
+        # Labels are resolved once per distinct value, then broadcast to the rows by code
+        wallets, wallet_map = np.unique(np.char.lower(wallets.astype(str)), return_inverse=True)
+        wallet_codes = wallet_map.reshape(-1)[wallet_codes]
+        network_codes, network_names = _encode(_column(batch["network"], "network", size), size, "")
+        network_keys = [carbon_factors.network_key(name) for name in network_names]
+        networks, key_map = np.unique(np.array(network_keys, dtype=str), return_inverse=True)
+        network_column = key_map.reshape(-1)[network_codes]
+        network_ids = carbon_factors.network_id_array(list(networks))[network_column]
+        type_codes, type_names = _encode(
+            _column(batch["tx_type"], "tx_type", size) if "tx_type" in columns else None, size, ""
+        )
+        multipliers = np.array([carbon_factors.type_multiplier(name) if name else 1.0 for name in type_names])[type_codes]
+        
+        gas = _gas_column(batch["gas"], size) if "gas" in columns else np.zeros(size)
+        timestamps = _integer_column(batch["timestamp"], "timestamp", size, timestamps=True) if "timestamp" in columns else None
+        block_numbers = _integer_column(batch["block_number"], "block_number", size) if "block_number" in columns else None
+        
+        # Current gas factors per row, replaced by the schedule period for networks whose factors changed
+        energy_per_gas = carbon_factors.energy_per_gas[network_ids]
+        co2_per_kwh = carbon_factors.co2_per_kwh[network_ids]
+        for network_id in np.unique(network_ids):
+            schedule = carbon_factors.schedules[network_id]
+            if len(schedule) == 1:
+                continue
+            rows = np.flatnonzero(network_ids == network_id)
+            periods = schedule.lookup(
+                rows.size,
+                timestamps[rows] if timestamps is not None else None,
+                block_numbers[rows] if block_numbers is not None else None
+            )
+            energy_per_gas[rows] = schedule.energy_per_gas[periods]
+            co2_per_kwh[rows] = schedule.co2_per_kwh[periods]
+        
+        has_gas = gas > 0
+        energy = np.where(has_gas, gas * energy_per_gas, carbon_factors.energy_per_tx[network_ids] * multipliers)
+        co2 = np.where(has_gas, energy * co2_per_kwh, carbon_factors.co2_per_tx[network_ids] * multipliers)
+        
+        n_wallets, n_networks = wallets.size, networks.size
+        cells = wallet_codes * n_networks + network_column
+        
+        def per_cell(weights: Optional[np.ndarray]) -> np.ndarray:
+            return np.bincount(cells, weights=weights, minlength=n_wallets * n_networks).reshape(n_wallets, n_networks)
+        
+        network_transactions = per_cell(None)
+        network_co2 = per_cell(co2)
+        network_energy = per_cell(energy)
+        
+        return CarbonBatchResult(
+            wallets=wallets,
+            networks=[str(network) for network in networks],
+            transactions=network_transactions.sum(axis=1),
+            gas_used=np.bincount(wallet_codes, weights=gas, minlength=n_wallets).astype(np.int64),
+            co2_kg=network_co2.sum(axis=1),
+            energy_kwh=network_energy.sum(axis=1),
+            network_transactions=network_transactions,
+            network_co2_kg=network_co2,
+            network_energy_kwh=network_energy
+        )
+    
+    @staticmethod
+    def _by_period(schedule: FactorSchedule, periods: np.ndarray, co2: np.ndarray) -> Dict[str, float]:
+        """Sum CO2 per schedule period, for networks whose factors changed over time."""
+        if len(schedule) == 1:
+            return {}
+        sums = np.bincount(periods, weights=co2, minlength=len(schedule))
+        return {name: float(total) for name, total in zip(schedule.periods, sums) if total}
+    
+    @staticmethod
+    def _monthly(activity: Dict[str, Dict[str, np.ndarray]], networks: List[str], index: np.ndarray,
+                 co2: np.ndarray) -> Dict[int, Dict[str, float]]:
+        """Sum CO2 per network and calendar month for the networks that have timestamps."""
+        timestamps = [activity[n].get("timestamp") for n in networks]
+        if any(ts is None for ts in timestamps):
+            return {}
+        
+        timestamps = np.concatenate([np.asarray(ts, dtype=np.int64) for ts in timestamps])
+        dated = timestamps > 0
+        if not dated.any():
+            return {}
+        
+        months = timestamps[dated].astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+        first = months.min()
+        span = months.max() - first + 1
+        cells = index[dated] * span + (months - first)
+        sums = np.bincount(cells, weights=co2[dated], minlength=len(networks) * span).reshape(len(networks), span)
+        
+        monthly: Dict[int, Dict[str, float]] = {}
+        for i, offset in zip(*np.nonzero(sums)):
+            label = str(np.datetime64(int(first + offset), "M"))
+            monthly.setdefault(int(i), {})[label] = float(sums[i, offset])
+        return monthly
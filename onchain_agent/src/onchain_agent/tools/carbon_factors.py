@@ -0,0 +1,333 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+# Used when no carbon_data.json can be found
+DEFAULT_CARBON_DATA: Dict[str, Any] = {
+    "networks": {
+        "ethereum": {"co2_per_transaction_kg": 0.0001, "energy_per_transaction_kwh": 0.0002,
+                     "energy_per_gas_kwh": 9.52e-09, "co2_per_kwh_kg": 0.5,
+                     "schedule": [
+                         {"period": "proof_of_work", "energy_per_gas_kwh": 7.93e-05, "co2_per_kwh_kg": 0.5},
+                         {"period": "proof_of_stake", "from_block": 15537394, "from_timestamp": 1663224162,
+                          "energy_per_gas_kwh": 9.52e-09, "co2_per_kwh_kg": 0.5}
+                     ]},
+        "polygon": {"co2_per_transaction_kg": 0.00009, "energy_per_transaction_kwh": 0.00018},
+        "optimism": {"co2_per_transaction_kg": 0.00005, "energy_per_transaction_kwh": 0.0001},
+        "arbitrum": {"co2_per_transaction_kg": 0.00005, "energy_per_transaction_kwh": 0.0001},
+        "base": {"co2_per_transaction_kg": 0.00005, "energy_per_transaction_kwh": 0.0001},
+        "bsc": {"co2_per_transaction_kg": 0.00012, "energy_per_transaction_kwh": 0.00024},
+        "avalanche": {"co2_per_transaction_kg": 0.0001, "energy_per_transaction_kwh": 0.0002}
+    },
+    "transaction_types": {
+        "simple_transfer": {"multiplier": 1.0},
+        "swap": {"multiplier": 1.5},
+        "liquidity_add": {"multiplier": 2.0},
+        "liquidity_remove": {"multiplier": 2.0},
+        "nft_mint": {"multiplier": 2.5},
+        "nft_transfer": {"multiplier": 1.2},
+        "contract_deployment": {"multiplier": 5.0},
+        "complex_defi": {"multiplier": 3.0}
+    }
+}
+
+
+def normalize_key(name: str) -> str:
+    """Normalize a network or transaction type name to snake_case, e.g. 'BNB Chain' -> 'bnb_chain'."""
+    return name.lower().strip().replace(" ", "_").replace("-", "_")
+
+
+class FactorSchedule:
+    """Emission factors of one network over consecutive block or time ranges.
+    
+    Periods are sorted by start and each one applies until the next begins;
+    the first also covers everything before its start. Resolving the period
+    of every transaction is one binary search per transaction (np.searchsorted)
+    over the sorted start arrays, vectorized over the whole history.
+    """
+    
+    # Start of the first period, which has no start of its own
+    UNBOUNDED = np.iinfo(np.int64).min
+    
+    def __init__(self, periods: List[str], energy_per_gas: np.ndarray, co2_per_kwh: np.ndarray,
+                 start_timestamps: np.ndarray, start_blocks: Optional[np.ndarray] = None):
+        """Initialize the schedule from per-period arrays sorted by start."""
+        self.periods = periods
+        self.energy_per_gas = energy_per_gas
+        self.co2_per_kwh = co2_per_kwh
+        self.start_timestamps = start_timestamps
+        self.start_blocks = start_blocks
+    
+    @classmethod
+    def from_network_data(cls, data: Dict[str, Any], energy_per_gas: float, co2_per_kwh: float) -> "FactorSchedule":
+        """Build a network's schedule from its ``schedule`` entries, or one period with its static factors.
+        
+        Each entry may set ``period``, ``from_timestamp`` (Unix seconds),
+        ``from_block`` and its own ``energy_per_gas_kwh``/``co2_per_kwh_kg``;
+        missing factors fall back to the network's static ones. Every entry
+        after the first needs a ``from_timestamp``; block starts are used
+        when every entry after the first sets ``from_block``.
+        """
+        entries = data.get("schedule") or [{"period": "current"}]
+        entries = sorted(entries, key=lambda entry: entry.get("from_timestamp", cls.UNBOUNDED))
+        for entry in entries[1:]:
+            if "from_timestamp" not in entry:
+                raise ValueError(f"Schedule period {entry.get('period', '?')} needs a from_timestamp")
+        
+        starts = [cls.UNBOUNDED] + [int(entry["from_timestamp"]) for entry in entries[1:]]
+        blocks = None
+        if len(entries) > 1 and all("from_block" in entry for entry in entries[1:]):
+            blocks = np.array([cls.UNBOUNDED] + [int(entry["from_block"]) for entry in entries[1:]], dtype=np.int64)
+        
+        return cls(
+            periods=[entry.get("period") or f"period_{i}" for i, entry in enumerate(entries)],
+            energy_per_gas=np.array([entry.get("energy_per_gas_kwh") or energy_per_gas for entry in entries]),
+            co2_per_kwh=np.array([entry.get("co2_per_kwh_kg") or co2_per_kwh for entry in entries]),
+            start_timestamps=np.array(starts, dtype=np.int64),
+            start_blocks=blocks
+        )
+    
+    def __len__(self) -> int:
+        """Number of periods."""
+        return len(self.periods)
+    
+    def lookup(self, size: int, timestamps: Optional[np.ndarray] = None,
+               block_numbers: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the period index of each of size transactions.
+        
+        Block numbers take precedence where the schedule has block starts;
+        transactions with neither a block number nor a timestamp fall in
+        the latest period.
+        """
+        latest = np.full(size, len(self.periods) - 1, dtype=np.int64)
+        if len(self.periods) == 1:
+            return latest
+        
+        index = latest
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=np.int64)
+            index = np.where(timestamps > 0, np.searchsorted(self.start_timestamps, timestamps, side="right") - 1, index)
+        if block_numbers is not None and self.start_blocks is not None:
+            block_numbers = np.asarray(block_numbers, dtype=np.int64)
+            index = np.where(block_numbers > 0, np.searchsorted(self.start_blocks, block_numbers, side="right") - 1, index)
+        return index
+
+
+class CarbonFactors:
+    """Carbon data compiled for lookups: network IDs, dense factor arrays and schedules.
+    
+    Networks are numbered in file order and every factor is a NumPy array
+    indexed by network ID, with one extra row at ``default_id`` holding the
+    factors for unknown networks. Names resolve to IDs through one dict
+    lookup over pre-normalized keys, display names and aliases. Instances
+    are never modified; the registry swaps in a new one on reload.
+    """
+    
+    # Gas used by a simple transfer, the transaction the per-transaction factors describe
+    REFERENCE_GAS = 21000
+    
+    # Factors for networks missing from carbon_data.json
+    DEFAULT_NETWORK = {"co2_per_transaction_kg": 0.0001, "energy_per_transaction_kwh": 0.0002}
+    
+    # Chain identifiers and common names whose carbon_data.json key differs, in normalized form
+    NETWORK_ALIASES = {
+        "eth": "ethereum",
+        "mainnet": "ethereum",
+        "ethereum_mainnet": "ethereum",
+        "matic": "polygon",
+        "polygon_pos": "polygon",
+        "op": "optimism",
+        "op_mainnet": "optimism",
+        "arbitrum_one": "arbitrum",
+        "bnb": "bsc",
+        "bnb_chain": "bsc",
+        "bnb_smart_chain": "bsc",
+        "binance": "bsc",
+        "binance_smart_chain": "bsc",
+        "avax": "avalanche",
+        "avalanche_c_chain": "avalanche"
+    }
+    
+    def __init__(self, carbon_data: Dict[str, Any], source: Optional[Path] = None):
+        """Compile carbon data in the carbon_data.json format."""
+        self.data = carbon_data
+        self.source = source
+        
+        networks = carbon_data.get("networks", {})
+        self.networks: List[str] = list(networks.keys())
+        self.default_id = len(self.networks)
+        rows = [networks[key] for key in self.networks] + [self.DEFAULT_NETWORK]
+        
+        # Keys win over display names, which win over the built-in aliases
+        self.network_ids: Dict[str, int] = {}
+        for alias, key in self.NETWORK_ALIASES.items():
+            if key in networks:
+                self.network_ids[alias] = self.networks.index(key)
+        for network_id, key in enumerate(self.networks):
+            for alias in networks[key].get("aliases", []):
+                self.network_ids[normalize_key(alias)] = network_id
+            if networks[key].get("name"):
+                self.network_ids[normalize_key(networks[key]["name"])] = network_id
+        for network_id, key in enumerate(self.networks):
+            self.network_ids[normalize_key(key)] = network_id
+        
+        self.co2_per_tx = np.array(
+            [row.get("co2_per_transaction_kg") or self.DEFAULT_NETWORK["co2_per_transaction_kg"] for row in rows]
+        )
+        self.energy_per_tx = np.array(
+            [row.get("energy_per_transaction_kwh") or self.DEFAULT_NETWORK["energy_per_transaction_kwh"] for row in rows]
+        )
+        
+        # Networks without gas factors derive them from the per-transaction factors of a simple transfer
+        self.static_energy_per_gas = np.array([
+            row.get("energy_per_gas_kwh") or energy / self.REFERENCE_GAS for row, energy in zip(rows, self.energy_per_tx)
+        ])
+        self.static_co2_per_kwh = np.array([
+            row.get("co2_per_kwh_kg") or co2 / energy for row, co2, energy in zip(rows, self.co2_per_tx, self.energy_per_tx)
+        ])
+        
+        self.schedules = [
+            FactorSchedule.from_network_data(row, float(energy), float(co2))
+            for row, energy, co2 in zip(rows, self.static_energy_per_gas, self.static_co2_per_kwh)
+        ]
+        
+        # Current factors, the last period of each schedule
+        self.energy_per_gas = np.array([schedule.energy_per_gas[-1] for schedule in self.schedules])
+        self.co2_per_kwh = np.array([schedule.co2_per_kwh[-1] for schedule in self.schedules])
+        
+        self.type_multipliers: Dict[str, float] = {
+            normalize_key(tx_type): float(data.get("multiplier", 1.0))
+            for tx_type, data in carbon_data.get("transaction_types", {}).items()
+        }
+    
+    def network_id(self, network: str) -> int:
+        """Return the ID of a network or chain name, or default_id if it is unknown."""
+        return self.network_ids.get(normalize_key(network), self.default_id)
+    
+    def network_id_array(self, networks: Sequence[str]) -> np.ndarray:
+        """Return the IDs of many network names as an array."""
+        return np.array([self.network_id(network) for network in networks], dtype=np.int64)
+    
+    def network_key(self, network: str) -> str:
+        """Return the carbon_data.json key of a network, or its normalized name if it is unknown."""
+        network_id = self.network_id(network)
+        return self.networks[network_id] if network_id != self.default_id else normalize_key(network)
+    
+    def network_data(self, network: str) -> Dict[str, Any]:
+        """Return the raw carbon data of a network, or the defaults if it is unknown."""
+        network_id = self.network_id(network)
+        if network_id == self.default_id:
+            return self.DEFAULT_NETWORK
+        return self.data["networks"][self.networks[network_id]]
+    
+    def type_multiplier(self, tx_type: str) -> float:
+        """Return the emission multiplier of a transaction type, 1.0 if it is unknown."""
+        return self.type_multipliers.get(normalize_key(tx_type), 1.0)
+
+
+class CarbonFactorRegistry:
+    """Process-wide source of compiled carbon factors.
+    
+    carbon_data.json is located and compiled once. With auto_reload (or
+    ONCHAIN_CARBON_DATA_RELOAD=1) the file's mtime is checked at most every
+    RELOAD_CHECK_SECONDS and the factors are recompiled when it changes;
+    callers keep whichever CarbonFactors they already hold.
+    """
+    
+    # Locations searched for carbon_data.json, in order
+    CANDIDATE_PATHS = (
+        Path(__file__).parent.parent / "data" / "carbon_data.json",
+        Path("onchain_agent/data/carbon_data.json"),
+        Path("data/carbon_data.json"),
+        Path("carbon_data.json")
+    )
+    
+    RELOAD_CHECK_SECONDS = 5.0
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, auto_reload: Optional[bool] = None):
+        """Initialize the registry for path (default: the first existing candidate path)."""
+        self._explicit_path = Path(path) if path else None
+        self.auto_reload = (
+            auto_reload if auto_reload is not None else os.getenv("ONCHAIN_CARBON_DATA_RELOAD", "0") == "1"
+        )
+        self._lock = threading.Lock()
+        self._factors: Optional[CarbonFactors] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+    
+    def _find_path(self) -> Optional[Path]:
+        """Return the carbon data file to load, or None if there is none."""
+        if self._explicit_path is not None:
+            return self._explicit_path
+        for path in self.CANDIDATE_PATHS:
+            if path.exists():
+                return path
+        return None
+    
+    def _load(self) -> None:
+        """Load and compile the carbon data, falling back to the defaults."""
+        path = self._find_path()
+        self._checked_at = time.monotonic()
+        try:
+            if path is None or not path.exists():
+                print("Warning: No carbon data file found. Using defaults.")
+                self._factors, self._mtime = CarbonFactors(DEFAULT_CARBON_DATA), None
+                return
+            mtime = path.stat().st_mtime
+            with open(path, 'r') as f:
+                self._factors, self._mtime = CarbonFactors(json.load(f), source=path), mtime
+        except Exception as e:
+            print(f"Warning: Could not load carbon data: {e}. Using defaults.")
+            # Keep the last good factors on a failed reload
+            if self._factors is None:
+                self._factors = CarbonFactors(DEFAULT_CARBON_DATA)
+    
+    def _is_stale(self) -> bool:
+        """Check, at most every RELOAD_CHECK_SECONDS, whether the data file changed since it was loaded."""
+        now = time.monotonic()
+        if now - self._checked_at < self.RELOAD_CHECK_SECONDS:
+            return False
+        self._checked_at = now
+        path = self._factors.source if self._factors is not None else None
+        if path is None:
+            return False
+        try:
+            return path.stat().st_mtime != self._mtime
+        except OSError:
+            return False
+    
+    def get(self) -> CarbonFactors:
+        """Return the current compiled factors, loading or reloading them if needed."""
+        factors = self._factors
+        if factors is not None and not self.auto_reload:
+            return factors
+        with self._lock:
+            if self._factors is None or (self.auto_reload and self._is_stale()):
+                self._load()
+            return self._factors
+    
+    def reload(self) -> CarbonFactors:
+        """Reload and recompile the carbon data now."""
+        with self._lock:
+            self._load()
+            return self._factors
+
+
+_default_registry: Optional[CarbonFactorRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_carbon_factor_registry() -> CarbonFactorRegistry:
+    """Return the process-wide carbon factor registry."""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = CarbonFactorRegistry()
+    return _default_registry
@@ -1,8 +1,14 @@
-from typing import Type, Dict, Any, List
+from typing import Type, Dict, Any, List, ClassVar, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import json
 from pathlib import Path
+import numpy as np
+from .models import CarbonReport, CarbonEquivalents, NetworkEmission, ReductionStrategy
+from .carbon_engine import CarbonEngine
+from .carbon_factors import get_carbon_factor_registry
+from .transaction_store import get_transaction_store
+from .data_dir import get_data_dir
+from .chains import CHAIN_MAP
 
 
 class CarbonFootprintToolInput(BaseModel):
@@ -10,6 +16,9 @@ class CarbonFootprintToolInput(BaseModel):
     transaction_count: int = Field(..., description="Total number of transactions")
     network_distribution: Dict[str, int] = Field(..., description="Dictionary of network names to transaction counts")
     transaction_types: Dict[str, int] = Field(default_factory=dict, description="Dictionary of transaction types to counts")
+    gas_by_network: Dict[str, int] = Field(default_factory=dict, description="Total gas used per network, e.g. from transaction summaries; gives more accurate emissions than transaction counts")
+    address: Optional[str] = Field(None, description="Wallet address whose synced transaction history provides per-transaction gas (most accurate)")
+    compact: bool = Field(True, description="Return a compact summary (default) instead of the full markdown report")
 
 
 class CarbonFootprintTool(BaseTool):
@@ -18,152 +27,173 @@ class CarbonFootprintTool(BaseTool):
     description: str = (
         "Calculates the carbon footprint and energy consumption of blockchain transactions "
         "across multiple networks. Provides emission data in kg CO2 and kWh, and suggests "
-        "strategies for carbon reduction. Use this to assess environmental impact of wallet activity."
+        "strategies for carbon reduction. Use this to assess environmental impact of wallet activity. "
+        "Pass the wallet 'address' to compute emissions from the gas of every synced transaction, or "
+        "'gas_by_network' with total gas per network, instead of estimating from transaction counts."
     )
     args_schema: Type[BaseModel] = CarbonFootprintToolInput
     
+    # Opt-in saved reports, one per wallet, under the data directory
+    REPORTS_DIRNAME: ClassVar[str] = "carbon_reports"
+    
     def __init__(self):
-        """Initialize the CarbonFootprintTool."""
+        """Initialize the CarbonFootprintTool with the process-wide carbon factors and gas-based emissions engine."""
         super().__init__()
-        self._carbon_data = self._load_carbon_data()
+        self._engine = CarbonEngine(get_carbon_factor_registry())
+        self._last_report: Optional[CarbonReport] = None
     
-    def _load_carbon_data(self) -> Dict[str, Any]:
-        """Load carbon emission data from JSON file."""
-        try:
-            # Try multiple possible paths for the carbon data file
-            possible_paths = [
-                Path(__file__).parent.parent / "data" / "carbon_data.json",
-                Path("onchain_agent/data/carbon_data.json"),
-                Path("data/carbon_data.json"),
-                Path("carbon_data.json")
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    with open(path, 'r') as f:
-                        return json.load(f)
-            
-            # If file not found, return default data
-            return self._get_default_carbon_data()
-        except Exception as e:
-            print(f"Warning: Could not load carbon data: {e}. Using defaults.")
-            return self._get_default_carbon_data()
+    @property
+    def last_report(self) -> Optional[CarbonReport]:
+        """The structured report of the latest successful run, e.g. for the Streamlit carbon dashboard."""
+        return self._last_report
     
-    def _get_default_carbon_data(self) -> Dict[str, Any]:
-        """Return default carbon data if JSON file is not available."""
-        return {
-            "networks": {
-                "ethereum": {"co2_per_transaction_kg": 0.0001, "energy_per_transaction_kwh": 0.0002},
-                "polygon": {"co2_per_transaction_kg": 0.00009, "energy_per_transaction_kwh": 0.00018},
-                "optimism": {"co2_per_transaction_kg": 0.00005, "energy_per_transaction_kwh": 0.0001},
-                "arbitrum": {"co2_per_transaction_kg": 0.00005, "energy_per_transaction_kwh": 0.0001},
-                "base": {"co2_per_transaction_kg": 0.00005, "energy_per_transaction_kwh": 0.0001},
-                "bsc": {"co2_per_transaction_kg": 0.00012, "energy_per_transaction_kwh": 0.00024},
-                "avalanche": {"co2_per_transaction_kg": 0.0001, "energy_per_transaction_kwh": 0.0002}
-            },
-            "transaction_types": {
-                "simple_transfer": {"multiplier": 1.0},
-                "swap": {"multiplier": 1.5},
-                "liquidity_add": {"multiplier": 2.0},
-                "liquidity_remove": {"multiplier": 2.0},
-                "nft_mint": {"multiplier": 2.5},
-                "nft_transfer": {"multiplier": 1.2},
-                "contract_deployment": {"multiplier": 5.0},
-                "complex_defi": {"multiplier": 3.0}
-            }
-        }
+    @classmethod
+    def report_path(cls, wallet_address: str) -> Path:
+        """Return where a saved report of the wallet lives, under ONCHAIN_DATA_DIR."""
+        return get_data_dir() / cls.REPORTS_DIRNAME / f"{wallet_address.strip().lower()}.json"
     
     def _run(self, transaction_count: int, network_distribution: Dict[str, int], 
-             transaction_types: Dict[str, int] = None) -> str:
+             transaction_types: Dict[str, int] = None, compact: bool = True,
+             gas_by_network: Dict[str, int] = None, address: Optional[str] = None) -> str:
         """Calculate carbon footprint based on transaction data."""
         try:
-            if transaction_count == 0:
-                return self._format_no_transactions()
+            report = self.compute_report(transaction_count, network_distribution, transaction_types,
+                                         gas_by_network, address)
+            if report.total_transactions:
+                self._last_report = report
             
-            # Calculate emissions by network
-            total_co2_kg = 0.0
-            total_energy_kwh = 0.0
-            network_emissions = {}
+            # Format the response
+            return self.render_report(report, compact)
             
-            for network, count in network_distribution.items():
-                network_key = network.lower().replace(" ", "_").replace("-", "_")
-                
-                # Get network data or use default
-                network_data = self._carbon_data["networks"].get(
-                    network_key,
-                    {"co2_per_transaction_kg": 0.0001, "energy_per_transaction_kwh": 0.0002}
-                )
-                
-                # Calculate base emissions
-                co2 = count * network_data["co2_per_transaction_kg"]
-                energy = count * network_data["energy_per_transaction_kwh"]
-                
-                # Apply transaction type multipliers if available
-                if transaction_types:
-                    type_multiplier = self._calculate_type_multiplier(transaction_types, count)
-                    co2 *= type_multiplier
-                    energy *= type_multiplier
-                
-                network_emissions[network] = {
-                    "transactions": count,
-                    "co2_kg": co2,
-                    "energy_kwh": energy
-                }
-                
-                total_co2_kg += co2
-                total_energy_kwh += energy
+        except Exception as e:
+            return f"Error calculating carbon footprint: {str(e)}"
+    
+    def compute_report(self, transaction_count: int, network_distribution: Dict[str, int],
+                       transaction_types: Dict[str, int] = None, gas_by_network: Dict[str, int] = None,
+                       address: Optional[str] = None) -> CarbonReport:
+        """Calculate the carbon report, using the address's synced transaction gas when given.
+        
+        Returns an empty report when there are no transactions. Reads the local
+        transaction store, so call it off the event loop from async code.
+        """
+        activity = self._load_activity(address, network_distribution) if address else {}
+        if transaction_count == 0 and not any(a["gas_used"].size for a in activity.values()):
+            return CarbonReport()
+        return self._calculate(transaction_count, network_distribution, transaction_types, gas_by_network, activity)
+    
+    def render_report(self, report: CarbonReport, compact: bool = True) -> str:
+        """Render a report as compact lines or the full markdown report, noting when it has no transactions."""
+        if not report.total_transactions:
+            return self._format_no_transactions()
+        return report.render_compact() if compact else self._format_carbon_report(report)
+    
+    def _load_activity(self, address: str, network_distribution: Dict[str, int]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Load per-transaction gas, block times and block numbers of the address from the local transaction store."""
+        store = get_transaction_store()
+        activity = {}
+        for network in network_distribution:
+            chain = CHAIN_MAP.get(network.strip().lower())
+            if chain is None:
+                continue
+            arrays = store.gas_arrays(address, chain)
+            if arrays["gas_used"].size:
+                activity[network] = arrays
+        return activity
+    
+    def _calculate(self, transaction_count: int, network_distribution: Dict[str, int],
+                   transaction_types: Dict[str, int] = None, gas_by_network: Dict[str, int] = None,
+                   activity: Dict[str, Dict[str, np.ndarray]] = None) -> CarbonReport:
+        """Calculate emissions, equivalents and reduction strategies as a typed report.
+        
+        Each network uses the most accurate data available: per-transaction
+        gas from activity, then its total gas, then its transaction count
+        with the type-weighted per-transaction factor.
+        """
+        activity = activity or {}
+        gas_by_network = gas_by_network or {}
+        
+        # Compiled factors for the count-based estimates
+        carbon_factors = self._engine.carbon_factors
+        
+        # Per-transaction gas for every network that has it, in one vectorized pass
+        network_emissions = {emission.network: emission for emission in self._engine.compute(activity)}
+        
+        # The type mix describes the whole wallet, so one multiplier applies to every network
+        type_multiplier = self._calculate_type_multiplier(transaction_types, sum((transaction_types or {}).values()))
+        
+        for network, count in network_distribution.items():
+            if network in network_emissions:
+                continue
             
-            # Calculate equivalent metrics
-            equivalents = self._calculate_equivalents(total_co2_kg, total_energy_kwh)
+            if gas_by_network.get(network):
+                gas_used = int(gas_by_network[network])
+                energy, co2 = self._engine.transaction_emissions(network, np.array([gas_used]))
+                network_emissions[network] = NetworkEmission(
+                    network=network,
+                    transactions=count,
+                    co2_kg=float(co2.sum()),
+                    energy_kwh=float(energy.sum()),
+                    gas_used=gas_used,
+                    method="gas"
+                )
+                continue
             
-            # Generate reduction strategies
-            strategies = self._generate_strategies(network_distribution, total_co2_kg)
+            # Calculate base emissions from the network's factors (or the defaults), weighted by the type mix
+            network_id = carbon_factors.network_id(network)
+            co2 = count * carbon_factors.co2_per_tx[network_id] * type_multiplier
+            energy = count * carbon_factors.energy_per_tx[network_id] * type_multiplier
             
-            # Format the response
-            return self._format_carbon_report(
-                transaction_count,
-                total_co2_kg,
-                total_energy_kwh,
-                network_emissions,
-                equivalents,
-                strategies
+            network_emissions[network] = NetworkEmission(
+                network=network,
+                transactions=count,
+                co2_kg=float(co2),
+                energy_kwh=float(energy)
             )
-            
-        except Exception as e:
-            return f"Error calculating carbon footprint: {str(e)}"
+        
+        total_co2_kg = sum(emission.co2_kg for emission in network_emissions.values())
+        total_energy_kwh = sum(emission.energy_kwh for emission in network_emissions.values())
+        if activity:
+            # Stored histories replace the transaction counts given for their networks
+            transaction_count = sum(emission.transactions for emission in network_emissions.values())
+        
+        # Calculate equivalent metrics
+        equivalents = self._calculate_equivalents(total_co2_kg, total_energy_kwh)
+        
+        # Generate reduction strategies
+        strategies = self._generate_strategies(network_distribution, total_co2_kg)
+        
+        return CarbonReport(
+            total_transactions=transaction_count,
+            total_co2_kg=total_co2_kg,
+            total_energy_kwh=total_energy_kwh,
+            networks=list(network_emissions.values()),
+            equivalents=equivalents,
+            strategies=strategies
+        )
     
     def _calculate_type_multiplier(self, transaction_types: Dict[str, int], total_count: int) -> float:
-        """Calculate weighted average multiplier based on transaction types."""
+        """Calculate the average multiplier of a type distribution covering total_count transactions."""
         if not transaction_types or total_count == 0:
             return 1.0
         
-        weighted_sum = 0.0
-        for tx_type, count in transaction_types.items():
-            type_key = tx_type.lower().replace(" ", "_")
-            type_data = self._carbon_data["transaction_types"].get(
-                type_key,
-                {"multiplier": 1.0}
-            )
-            weighted_sum += count * type_data["multiplier"]
+        carbon_factors = self._engine.carbon_factors
+        weighted_sum = sum(count * carbon_factors.type_multiplier(tx_type) for tx_type, count in transaction_types.items())
         
         return weighted_sum / total_count
     
-    def _calculate_equivalents(self, co2_kg: float, energy_kwh: float) -> Dict[str, float]:
+    def _calculate_equivalents(self, co2_kg: float, energy_kwh: float) -> CarbonEquivalents:
         """Calculate equivalent metrics for context."""
-        return {
-            "trees_needed_year": co2_kg / 21.77,  # Average tree absorbs ~21.77 kg CO2/year
-            "km_driven": co2_kg / 0.12,  # Average car emits ~0.12 kg CO2/km
-            "smartphone_charges": energy_kwh / 0.015,  # Average smartphone charge ~0.015 kWh
-            "led_bulb_hours": energy_kwh / 0.01  # 10W LED bulb
-        }
+        return CarbonEquivalents(**CarbonEquivalents.ratios(co2_kg, energy_kwh))
     
-    def _generate_strategies(self, network_distribution: Dict[str, int], total_co2: float) -> List[Dict[str, Any]]:
+    def _generate_strategies(self, network_distribution: Dict[str, int], total_co2: float) -> List[ReductionStrategy]:
         """Generate carbon reduction strategies based on transaction patterns."""
         strategies = []
         
         # Check if using high-emission networks
         high_emission_networks = ["ethereum", "bsc", "avalanche"]
-        using_high_emission = any(net.lower() in high_emission_networks for net in network_distribution.keys())
+        using_high_emission = any(
+            self._engine.network_key(net) in high_emission_networks for net in network_distribution.keys()
+        )
         
         if using_high_emission:
             l2_potential = total_co2 * 0.5  # 50% reduction potential
@@ -205,7 +235,7 @@ class CarbonFootprintTool(BaseTool):
             "priority": "low"
         })
         
-        return strategies
+        return [ReductionStrategy(**strategy) for strategy in strategies]
     
     def _format_no_transactions(self) -> str:
         """Format response when no transactions are found."""
@@ -224,29 +254,35 @@ This wallet may be:
 Environmental impact is minimal to zero based on available data.
 """
     
-    def _format_carbon_report(self, tx_count: int, co2_kg: float, energy_kwh: float,
-                              network_emissions: Dict, equivalents: Dict, strategies: List) -> str:
+    def _format_carbon_report(self, report: CarbonReport) -> str:
         """Format the complete carbon footprint report."""
+        tx_count = report.total_transactions
+        co2_kg = report.total_co2_kg
+        energy_kwh = report.total_energy_kwh
+        equivalents = report.equivalents.model_dump()
+        
         # Format network breakdown
         network_lines = []
-        for network, data in sorted(network_emissions.items(), key=lambda x: x[1]['co2_kg'], reverse=True):
+        for data in sorted(report.networks, key=lambda x: x.co2_kg, reverse=True):
             network_lines.append(
-                f"  - {network.title()}: {data['transactions']:,} txs → "
-                f"{data['co2_kg']:.4f} kg CO2, {data['energy_kwh']:.4f} kWh"
+                f"  - {data.network.title()}: {data.transactions:,} txs → "
+                f"{data.co2_kg:.4f} kg CO2, {data.energy_kwh:.4f} kWh"
             )
+            for period, period_co2 in data.period_co2_kg.items():
+                network_lines.append(f"    - {period.replace('_', ' ').title()}: {period_co2:.4f} kg CO2")
         
         # Format strategies
         strategy_lines = []
-        for idx, strategy in enumerate(strategies, 1):
-            strategy_lines.append(f"\n{idx}. **{strategy['name']}** (Priority: {strategy['priority'].upper()})")
-            strategy_lines.append(f"   - {strategy['description']}")
-            if 'potential_reduction_kg' in strategy:
+        for idx, strategy in enumerate(report.strategies, 1):
+            strategy_lines.append(f"\n{idx}. **{strategy.name}** (Priority: {strategy.priority.upper()})")
+            strategy_lines.append(f"   - {strategy.description}")
+            if strategy.potential_reduction_kg is not None:
                 strategy_lines.append(
-                    f"   - Potential Reduction: {strategy['potential_reduction_kg']:.4f} kg CO2 "
-                    f"({strategy['reduction_percent']}%)"
+                    f"   - Potential Reduction: {strategy.potential_reduction_kg:.4f} kg CO2 "
+                    f"({strategy.reduction_percent}%)"
                 )
-            if 'cost_usd' in strategy:
-                strategy_lines.append(f"   - Estimated Cost: ${strategy['cost_usd']:.2f}")
+            if strategy.cost_usd is not None:
+                strategy_lines.append(f"   - Estimated Cost: ${strategy.cost_usd:.2f}")
         
         report = f"""
 # Carbon Footprint Analysis
@@ -275,6 +311,6 @@ Your blockchain activity is equivalent to:
  "Your carbon footprint is significant. Implementing reduction strategies could substantially lower your environmental impact."}
 
 ---
-*Data based on post-merge Ethereum (Proof of Stake) and current network emission factors.*
+*Gas-based figures apply the emission factors in effect when each transaction was mined (e.g. Ethereum before and after the Merge); count-based figures use current network emission factors.*
 """
         return report.strip()
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Dict
+
+# Common chain names mapped to Moralis chain identifiers
+CHAIN_MAP: Dict[str, str] = {
+    "ethereum": "eth",
+    "eth": "eth",
+    "polygon": "polygon",
+    "matic": "polygon",
+    "bsc": "bsc",
+    "bnb": "bsc",
+    "bnb chain": "bsc",
+    "bnb smart chain": "bsc",
+    "binance": "bsc",
+    "binance smart chain": "bsc",
+    "binance-smart-chain": "bsc",
+    "arbitrum": "arbitrum",
+    "optimism": "optimism",
+    "base": "base",
+    "avalanche": "avalanche",
+    "avax": "avalanche"
+}
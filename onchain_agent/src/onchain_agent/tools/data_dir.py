@@ -0,0 +1,13 @@
+import os
+from pathlib import Path
+
+
+def get_data_dir() -> Path:
+    """Return the directory used for local stores, creating it if needed.
+    
+    Defaults to the ``data/`` directory that OnchainAgentCrew creates in the
+    working directory; override with the ONCHAIN_DATA_DIR environment variable.
+    """
+    path = Path(os.getenv("ONCHAIN_DATA_DIR", "data"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,65 @@
+from typing import Dict, Any, List, Optional, Tuple, Hashable
+from .zapper_base import ZapperBase
+
+# Shared pieces of the batch tools, which accept 'network:id' entries and look
+# up many of them with one aliased GraphQL query per chunk.
+
+
+def parse_entry(entry: str, default_network: str) -> Tuple[str, str]:
+    """Split a 'network:id' entry into its lower-cased network and id, using default_network without a prefix."""
+    entry = entry.strip()
+    if ":" in entry:
+        network, value = entry.split(":", 1)
+        return network.strip().lower(), value.strip()
+    return default_network.lower(), entry
+
+
+async def afetch_aliased(operation: str, field: str, fields: str, argument_types: Dict[str, str],
+                         items: List[Tuple[Hashable, Dict[str, Any]]],
+                         shared_variables: Optional[Dict[str, Tuple[str, Any]]] = None) -> Dict[Hashable, Any]:
+    """Look up many items with one query that aliases the same field once per item.
+    
+    Each item is a key and the field's arguments, whose GraphQL types are given
+    by argument_types; shared_variables maps names to (type, value) pairs that
+    fields may reference. Returns each key's data, None when not found, or an
+    error message. Errors are reported per alias through their path; errors
+    without a path fail the whole chunk.
+    """
+    variable_defs = [f"${name}: {type_name}" for name, (type_name, _) in (shared_variables or {}).items()]
+    variables: Dict[str, Any] = {name: value for name, (_, value) in (shared_variables or {}).items()}
+    selections = []
+    for i, (_, arguments) in enumerate(items):
+        variable_defs.extend(f"${name}{i}: {argument_types[name]}" for name in arguments)
+        selections.append(
+            f"item{i}: {field}({', '.join(f'{name}: ${name}{i}' for name in arguments)}) {{\n{fields}\n}}"
+        )
+        variables.update({f"{name}{i}": value for name, value in arguments.items()})
+    
+    query = f"query {operation}({', '.join(variable_defs)}) {{\n" + "\n".join(selections) + "\n}"
+    
+    try:
+        result = await ZapperBase.aexecute_graphql_query(query, variables)
+    except Exception as e:
+        return {key: str(e) for key, _ in items}
+    
+    errors: Dict[str, str] = {}
+    chunk_error = None
+    for error in result.get("errors") or []:
+        path = error.get("path") or []
+        message = error.get("message", "Unknown GraphQL error")
+        if path:
+            errors.setdefault(str(path[0]), message)
+        else:
+            chunk_error = chunk_error or message
+    
+    data = result.get("data") or {}
+    outcomes = {}
+    for i, (key, _) in enumerate(items):
+        alias = f"item{i}"
+        if alias in errors:
+            outcomes[key] = errors[alias]
+        elif data.get(alias) is None and chunk_error:
+            outcomes[key] = chunk_error
+        else:
+            outcomes[key] = data.get(alias)
+    return outcomes
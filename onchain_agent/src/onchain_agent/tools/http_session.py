@@ -0,0 +1,416 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple, Coroutine
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import get_rate_limiter
+from .single_flight import get_single_flight
+
+
+class _PoolSettings:
+    """Per-host pool sizing and timeout settings shared by the sync and async pools."""
+
+    # Maximum number of kept-alive connections per host
+    HOST_POOL_SIZES = {
+        "api.zapper.fi": 20,
+        "deep-index.moralis.io": 20
+    }
+    DEFAULT_POOL_SIZE = 10
+
+    # (connect, read) timeouts in seconds
+    DEFAULT_CONNECT_TIMEOUT = 5.0
+    DEFAULT_READ_TIMEOUT = 30.0
+
+    DEFAULT_HEADERS = {
+        "accept-encoding": "gzip, deflate",
+        "connection": "keep-alive"
+    }
+
+    # Responses worth retrying: rate limiting and transient server errors
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    DEFAULT_MAX_RETRIES = 4
+
+    # Exponential backoff bounds in seconds; the actual delay is jittered below the bound
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None):
+        """Initialize the settings, reading defaults from the environment when not given."""
+        self._pool_sizes = dict(self.HOST_POOL_SIZES)
+        if pool_sizes:
+            self._pool_sizes.update(pool_sizes)
+        self._default_pool_size = int(os.getenv("ONCHAIN_HTTP_POOL_SIZE", self.DEFAULT_POOL_SIZE))
+        self.timeout: Tuple[float, float] = (
+            connect_timeout or float(os.getenv("ONCHAIN_HTTP_CONNECT_TIMEOUT", self.DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout or float(os.getenv("ONCHAIN_HTTP_READ_TIMEOUT", self.DEFAULT_READ_TIMEOUT))
+        )
+        self.max_retries = int(os.getenv("ONCHAIN_HTTP_MAX_RETRIES", self.DEFAULT_MAX_RETRIES))
+        self._request_counts: Dict[str, int] = {}
+        self._retry_counts: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def configure_host(self, host: str, pool_size: int) -> None:
+        """Set the pool size for a host. Applies to connection pools created afterwards."""
+        with self._lock:
+            self._pool_sizes[host.lower()] = pool_size
+
+    def _pool_size_for(self, host: str) -> int:
+        """Return the configured pool size for a host."""
+        return self._pool_sizes.get(host, self._default_pool_size)
+
+    @staticmethod
+    def _host_of(url: str) -> str:
+        """Return the lower-cased host name of a URL."""
+        return (urlsplit(url).hostname or "").lower()
+
+    def _count_request(self, host: str) -> None:
+        """Increment the request counter for a host."""
+        with self._lock:
+            self._request_counts[host] = self._request_counts.get(host, 0) + 1
+
+    def _count_retry(self, host: str, delay: float) -> None:
+        """Record a retry and its backoff delay for a host."""
+        with self._lock:
+            counters = self._retry_counts.setdefault(host, {"retries": 0, "retry_wait_seconds": 0.0})
+            counters["retries"] += 1
+            counters["retry_wait_seconds"] += delay
+
+    def _retry_stats(self, host: str) -> Dict[str, float]:
+        """Return the retry counters of a host."""
+        with self._lock:
+            counters = dict(self._retry_counts.get(host, {"retries": 0, "retry_wait_seconds": 0.0}))
+        counters["retry_wait_seconds"] = round(counters["retry_wait_seconds"], 3)
+        return counters
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Return how long to wait before retry number attempt + 1.
+
+        A Retry-After header is honoured as given; otherwise the delay is drawn
+        uniformly below an exponentially growing bound (full jitter) so that
+        concurrent callers do not retry in lockstep.
+        """
+        delay = self._parse_retry_after(retry_after)
+        if delay is not None:
+            return min(delay, self.BACKOFF_MAX)
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt))
+
+    def _backoff(self, host: str, attempt: int, status_code: Optional[int] = None,
+                 retry_after: Optional[str] = None) -> float:
+        """Compute and record the delay before a retry, pausing every caller of the host on a 429."""
+        delay = self._retry_delay(attempt, retry_after)
+        if status_code == 429:
+            get_rate_limiter().pause(host, delay)
+        self._count_retry(host, delay)
+        return delay
+
+
+class HttpSessionPool(_PoolSettings):
+    """Thread-safe pool of keep-alive HTTP sessions, one per host.
+
+    Every tool shares the same sessions so DNS lookups, TCP connections and
+    TLS handshakes are paid once per connection instead of once per call.
+    """
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None):
+        """Initialize the pool with no open sessions."""
+        super().__init__(pool_sizes, connect_timeout, read_timeout)
+        self._sessions: Dict[str, requests.Session] = {}
+
+    def _session_for(self, host: str) -> requests.Session:
+        """Return the session for a host, creating it on first use."""
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                pool_size = self._pool_size_for(host)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.headers.update(self.DEFAULT_HEADERS)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request through the pooled session for the URL's host.
+
+        Rate-limited and transient failures are retried with backoff; the last
+        response is returned (or the last connection error raised) once the
+        retries are used up.
+        """
+        host = self._host_of(url)
+        session = self._session_for(host)
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            get_rate_limiter().acquire(host)
+            self._count_request(host)
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(host, attempt)
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(host, attempt, response.status_code, response.headers.get("Retry-After"))
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request through the pool."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a POST request through the pool."""
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return per-host request and connection counters.
+
+        ``connections_reused`` is the number of requests that did not need a
+        new connection; it should grow with traffic when keep-alive works.
+        """
+        stats = {}
+        with self._lock:
+            sessions = dict(self._sessions)
+            request_counts = dict(self._request_counts)
+
+        for host, session in sessions.items():
+            connections_opened = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections_opened += pool.num_connections
+
+            requests_sent = request_counts.get(host, 0)
+            stats[host] = {
+                "pool_size": self._pool_size_for(host),
+                "requests": requests_sent,
+                "connections_opened": connections_opened,
+                "connections_reused": max(requests_sent - connections_opened, 0),
+                **self._retry_stats(host)
+            }
+        return stats
+
+    def close(self) -> None:
+        """Close all sessions and their connections."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._request_counts.clear()
+            self._retry_counts.clear()
+        for session in sessions:
+            session.close()
+
+
+class AsyncHttpSessionPool(_PoolSettings):
+    """Async counterpart of HttpSessionPool backed by one httpx.AsyncClient per host.
+
+    httpx clients are bound to the event loop they were created on, so
+    clients are kept per loop and dropped together with it.
+    """
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None):
+        """Initialize the pool with no open clients."""
+        super().__init__(pool_sizes, connect_timeout, read_timeout)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._connection_counts: Dict[str, int] = {}
+
+    def _client_for(self, host: str) -> httpx.AsyncClient:
+        """Return the client for a host on the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(host)
+            if client is None:
+                pool_size = self._pool_size_for(host)
+                connect_timeout, read_timeout = self.timeout
+                client = httpx.AsyncClient(
+                    headers=self.DEFAULT_HEADERS,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                )
+                clients[host] = client
+                self._connection_counts.setdefault(host, 0)
+            return client
+
+    def _trace_for(self, host: str):
+        """Build an httpcore trace callback that counts new connections for a host."""
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self._connection_counts[host] = self._connection_counts.get(host, 0) + 1
+        return trace
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the pooled client for the URL's host, retrying like HttpSessionPool.request."""
+        host = self._host_of(url)
+        client = self._client_for(host)
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace_for(host))
+
+        attempt = 0
+        while True:
+            await get_rate_limiter().aacquire(host)
+            self._count_request(host)
+            try:
+                response = await client.request(method, url, extensions=extensions, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(host, attempt)
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                # A 429 pauses the host in the shared SQLite file, so the backoff runs off the event loop
+                delay = await asyncio.to_thread(
+                    self._backoff, host, attempt, response.status_code, response.headers.get("Retry-After")
+                )
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a GET request through the pool."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a POST request through the pool."""
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return per-host request and connection counters across all event loops."""
+        with self._lock:
+            request_counts = dict(self._request_counts)
+            connection_counts = dict(self._connection_counts)
+
+        stats = {}
+        for host, connections_opened in connection_counts.items():
+            requests_sent = request_counts.get(host, 0)
+            stats[host] = {
+                "pool_size": self._pool_size_for(host),
+                "requests": requests_sent,
+                "connections_opened": connections_opened,
+                "connections_reused": max(requests_sent - connections_opened, 0),
+                **self._retry_stats(host)
+            }
+        return stats
+
+    async def aclose(self) -> None:
+        """Close the clients that belong to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+
+_default_pool: Optional[HttpSessionPool] = None
+_default_async_pool: Optional[AsyncHttpSessionPool] = None
+_default_pool_lock = threading.Lock()
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpSessionPool:
+    """Return the process-wide HTTP session pool."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = HttpSessionPool()
+    return _default_pool
+
+
+def get_async_http_pool() -> AsyncHttpSessionPool:
+    """Return the process-wide async HTTP session pool."""
+    global _default_async_pool
+    if _default_async_pool is None:
+        with _default_pool_lock:
+            if _default_async_pool is None:
+                _default_async_pool = AsyncHttpSessionPool()
+    return _default_async_pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Return connection, retry, throttling and request coalescing statistics for the process-wide pools."""
+    return {
+        "sync": get_http_pool().stats(),
+        "async": get_async_http_pool().stats(),
+        "rate_limits": get_rate_limiter().stats(),
+        "single_flight": get_single_flight().stats()
+    }
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop used by run_sync, starting it on first use."""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="onchain-agent-io", daemon=True)
+                thread.start()
+                _background_loop = loop
+    return _background_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine to completion from synchronous code.
+
+    Coroutines run on one long-lived background loop so that the async
+    pool's keep-alive connections survive between synchronous tool calls.
+    """
+    loop = _get_background_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+
+    if running_loop is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the shared I/O event loop; await the coroutine instead")
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -0,0 +1,317 @@
+from typing import Any, ClassVar, Dict, List, Optional, Union
+from pathlib import Path
+from pydantic import BaseModel, Field
+
+
+class TokenHolding(BaseModel):
+    """A single token balance in a portfolio."""
+    symbol: str = "Unknown"
+    name: Optional[str] = None
+    token_address: Optional[str] = None
+    network: str = "Unknown"
+    balance: float = 0.0
+    balance_usd: float = 0.0
+    price: float = 0.0
+
+
+class AppHolding(BaseModel):
+    """A DeFi app balance in a portfolio."""
+    name: str = "Unknown"
+    network: str = "Unknown"
+    balance_usd: float = 0.0
+
+
+class TokenPrice(BaseModel):
+    """Current price, short-term changes and period trend of one token."""
+    address: str
+    network: str
+    symbol: str = "Unknown"
+    name: Optional[str] = None
+    price: float = 0.0
+    change_5m: float = 0.0
+    change_1h: float = 0.0
+    change_24h: float = 0.0
+    trend_percent: Optional[float] = None
+    market_cap: float = 0.0
+    volume_24h: float = 0.0
+    liquidity: float = 0.0
+    
+    def render_row(self) -> str:
+        """Render the price as a markdown table row."""
+        trend = f"{self.trend_percent:+.2f}%" if self.trend_percent is not None else "n/a"
+        return (
+            f"| {self.symbol} | {self.network} | ${self.price:,.6f} | {self.change_1h:+.2f}% | "
+            f"{self.change_24h:+.2f}% | {trend} | ${self.market_cap:,.0f} | ${self.volume_24h:,.0f} |"
+        )
+
+
+class PriceMetrics(BaseModel):
+    """Period returns and risk metrics of one token, computed from its stored price history."""
+    returns: Dict[str, Optional[float]] = Field(default_factory=dict)
+    volatility: Optional[float] = None
+    sharpe: Optional[float] = None
+    observations: int = 0
+    daily_bars: int = 0
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+    
+    def render_lines(self) -> List[str]:
+        """Render returns, volatility and Sharpe ratio as report lines."""
+        returns = ", ".join(
+            f"{period} {value:+.2f}%" if value is not None else f"{period} n/a"
+            for period, value in self.returns.items()
+        )
+        volatility = f"{self.volatility * 100:.2f}%" if self.volatility is not None else "n/a"
+        sharpe = f"{self.sharpe:.2f}" if self.sharpe is not None else "n/a"
+        return [
+            f"Returns: {returns}",
+            f"Annualized Volatility: {volatility} (from {self.daily_bars} daily closes)",
+            f"Sharpe Ratio: {sharpe}"
+        ]
+
+
+class PortfolioSummary(BaseModel):
+    """Typed result of PortfolioTool."""
+    address: str
+    total_value_usd: float = 0.0
+    token_value_usd: float = 0.0
+    app_value_usd: float = 0.0
+    nft_value_usd: float = 0.0
+    token_count: int = 0
+    app_count: int = 0
+    nft_count: int = 0
+    tokens_retrieved: int = 0
+    apps_retrieved: int = 0
+    top_tokens: List[TokenHolding] = Field(default_factory=list)
+    top_apps: List[AppHolding] = Field(default_factory=list)
+    wallet_totals: Dict[str, float] = Field(default_factory=dict)
+    wallet_errors: Dict[str, str] = Field(default_factory=dict)
+    
+    def render_compact(self) -> str:
+        """Render the summary in a few dense lines for LLM context."""
+        lines = [
+            f"Portfolio {self.address}: total ${self.total_value_usd:,.2f} "
+            f"(tokens ${self.token_value_usd:,.2f}, DeFi ${self.app_value_usd:,.2f}, NFTs ${self.nft_value_usd:,.2f})",
+            f"Counts: {self.token_count} tokens ({self.tokens_retrieved} retrieved), "
+            f"{self.app_count} apps ({self.apps_retrieved} retrieved), {self.nft_count} NFTs"
+        ]
+        if self.top_tokens:
+            total = self.total_value_usd or 1.0
+            lines.append("Top tokens: " + "; ".join(
+                f"{t.symbol}/{t.network} ${t.balance_usd:,.2f} ({t.balance_usd / total * 100:.1f}%)"
+                for t in self.top_tokens
+            ))
+        if self.top_apps:
+            lines.append("Top apps: " + "; ".join(
+                f"{a.name}/{a.network} ${a.balance_usd:,.2f}" for a in self.top_apps
+            ))
+        if self.wallet_totals:
+            lines.append("Wallets: " + "; ".join(
+                f"{wallet} ${value:,.2f}" for wallet, value in self.wallet_totals.items()
+            ))
+        if self.wallet_errors:
+            wallets = len(self.wallet_totals) + len(self.wallet_errors)
+            lines.append(
+                f"Note: partial data, {len(self.wallet_errors)} of {wallets} wallets failed and are missing "
+                "from the totals: " + "; ".join(f"{wallet} ({error})" for wallet, error in self.wallet_errors.items())
+            )
+        return "\n".join(lines)
+
+
+class RiskReport(BaseModel):
+    """Concentration, volatility, correlation and benchmark-relative returns of one portfolio."""
+    address: str
+    total_value_usd: float = 0.0
+    positions: int = 0
+    hhi: float = 0.0
+    effective_holdings: float = 0.0
+    top_share: float = 0.0
+    priced_share: float = 0.0
+    volatility: Optional[float] = None
+    sharpe: Optional[float] = None
+    returns: Dict[str, Optional[float]] = Field(default_factory=dict)
+    benchmark_returns: Dict[str, Dict[str, Optional[float]]] = Field(default_factory=dict)
+    beta: Dict[str, Optional[float]] = Field(default_factory=dict)
+    asset_volatility: Dict[str, Optional[float]] = Field(default_factory=dict)
+    correlation_labels: List[str] = Field(default_factory=list)
+    correlation: List[List[Optional[float]]] = Field(default_factory=list)
+    days: int = 0
+    
+    def render_compact(self) -> str:
+        """Render the risk metrics in a few dense lines, with the correlation matrix as a table."""
+        def pct(value: Optional[float], scale: float = 1.0) -> str:
+            return f"{value * scale:+.2f}%" if value is not None else "n/a"
+        
+        def num(value: Optional[float]) -> str:
+            return f"{value:.2f}" if value is not None else "n/a"
+        
+        lines = [
+            f"Risk metrics for {self.address} ({self.days} daily returns, "
+            f"{self.priced_share * 100:.1f}% of value with price history)",
+            f"Concentration: HHI {self.hhi:.4f} over {self.positions} positions, "
+            f"effective holdings {self.effective_holdings:.2f}, largest position {self.top_share * 100:.1f}%",
+            f"Volatility (annualized): {pct(self.volatility, 100).lstrip('+')}; Sharpe ratio: {num(self.sharpe)}",
+            "Returns: " + ", ".join(f"{period} {pct(value)}" for period, value in self.returns.items())
+        ]
+        for name, returns in self.benchmark_returns.items():
+            relative = []
+            for period, value in returns.items():
+                own = self.returns.get(period)
+                excess = own - value if own is not None and value is not None else None
+                relative.append(f"{period} {pct(value)} (excess {pct(excess)})")
+            lines.append(f"vs {name}: {', '.join(relative)}; beta {num(self.beta.get(name))}")
+        if self.asset_volatility:
+            lines.append("Asset volatility: " + "; ".join(
+                f"{label} {pct(value, 100).lstrip('+')}" for label, value in self.asset_volatility.items()
+            ))
+        if len(self.correlation_labels) > 1:
+            lines.append("Correlation matrix (daily returns):")
+            lines.append("| | " + " | ".join(self.correlation_labels) + " |")
+            lines.append("|---" * (len(self.correlation_labels) + 1) + "|")
+            for label, row in zip(self.correlation_labels, self.correlation):
+                lines.append(f"| {label} | " + " | ".join(num(value) for value in row) + " |")
+        return "\n".join(lines)
+
+
+class TransactionSummary(BaseModel):
+    """Typed result of MoralisTransactionTool."""
+    address: str
+    chain: str
+    total_transactions: int = 0
+    total_gas_used: int = 0
+    transaction_types: Dict[str, int] = Field(default_factory=dict)
+    first_timestamp: Optional[str] = None
+    last_timestamp: Optional[str] = None
+    new_transactions: int = 0
+    pages_fetched: int = 0
+    truncated: bool = False
+    
+    @property
+    def average_gas(self) -> int:
+        """Average gas used per transaction."""
+        return self.total_gas_used // self.total_transactions if self.total_transactions else 0
+    
+    def render_compact(self) -> str:
+        """Render the summary in a few dense lines for LLM context."""
+        if not self.total_transactions:
+            return f"Transactions {self.address} on {self.chain}: none found"
+        types = ", ".join(
+            f"{tx_type} {count} ({count / self.total_transactions * 100:.0f}%)"
+            for tx_type, count in sorted(self.transaction_types.items(), key=lambda x: x[1], reverse=True)
+        )
+        lines = [
+            f"Transactions {self.address} on {self.chain}: {self.total_transactions:,} txs, "
+            f"gas {self.total_gas_used:,} (avg {self.average_gas:,}), "
+            f"{(self.first_timestamp or '?')[:10]} to {(self.last_timestamp or '?')[:10]}",
+            f"Types: {types}"
+        ]
+        if self.truncated:
+            lines.append("Note: sync incomplete (page budget reached)")
+        return "\n".join(lines)
+
+
+class NetworkEmission(BaseModel):
+    """Emissions attributed to one network."""
+    network: str
+    transactions: int = 0
+    co2_kg: float = 0.0
+    energy_kwh: float = 0.0
+    gas_used: Optional[int] = None
+    method: str = "per_transaction"
+    monthly_co2_kg: Dict[str, float] = Field(default_factory=dict)
+    period_co2_kg: Dict[str, float] = Field(default_factory=dict)
+
+
+class CarbonEquivalents(BaseModel):
+    """Everyday equivalents of an emission total."""
+    trees_needed_year: float = 0.0
+    km_driven: float = 0.0
+    smartphone_charges: float = 0.0
+    led_bulb_hours: float = 0.0
+    
+    # Average tree absorbs ~21.77 kg CO2/year
+    TREE_KG_PER_YEAR: ClassVar[float] = 21.77
+    # Average car emits ~0.12 kg CO2/km
+    CAR_KG_PER_KM: ClassVar[float] = 0.12
+    # Average smartphone charge ~0.015 kWh
+    SMARTPHONE_CHARGE_KWH: ClassVar[float] = 0.015
+    # 10W LED bulb
+    LED_BULB_KWH_PER_HOUR: ClassVar[float] = 0.01
+    
+    @classmethod
+    def ratios(cls, co2_kg: Any, energy_kwh: Any) -> Dict[str, Any]:
+        """Compute the equivalent fields for floats or NumPy arrays of totals."""
+        return {
+            "trees_needed_year": co2_kg / cls.TREE_KG_PER_YEAR,
+            "km_driven": co2_kg / cls.CAR_KG_PER_KM,
+            "smartphone_charges": energy_kwh / cls.SMARTPHONE_CHARGE_KWH,
+            "led_bulb_hours": energy_kwh / cls.LED_BULB_KWH_PER_HOUR
+        }
+
+
+class ReductionStrategy(BaseModel):
+    """A suggested way to reduce emissions."""
+    name: str
+    description: str
+    priority: str
+    potential_reduction_kg: Optional[float] = None
+    reduction_percent: Optional[int] = None
+    cost_usd: Optional[float] = None
+
+
+class CarbonReport(BaseModel):
+    """Typed result of CarbonFootprintTool."""
+    total_transactions: int = 0
+    total_co2_kg: float = 0.0
+    total_energy_kwh: float = 0.0
+    networks: List[NetworkEmission] = Field(default_factory=list)
+    equivalents: CarbonEquivalents = Field(default_factory=CarbonEquivalents)
+    strategies: List[ReductionStrategy] = Field(default_factory=list)
+    
+    @property
+    def avg_co2_per_tx(self) -> float:
+        """Average kg CO2 per transaction."""
+        return self.total_co2_kg / self.total_transactions if self.total_transactions else 0.0
+    
+    def render_compact(self) -> str:
+        """Render the report in a few dense lines for LLM context."""
+        lines = [
+            f"Carbon: {self.total_co2_kg:.4f} kg CO2, {self.total_energy_kwh:.4f} kWh over "
+            f"{self.total_transactions:,} txs ({self.avg_co2_per_tx:.6f} kg/tx)"
+        ]
+        if self.networks:
+            lines.append("By network: " + "; ".join(
+                f"{n.network} {n.transactions:,} txs {n.co2_kg:.4f} kg"
+                + (f" ({n.gas_used:,} gas)" if n.gas_used is not None else "")
+                + (" [" + ", ".join(f"{p} {kg:.4f} kg" for p, kg in n.period_co2_kg.items()) + "]"
+                   if n.period_co2_kg else "")
+                for n in sorted(self.networks, key=lambda n: n.co2_kg, reverse=True)
+            ))
+        eq = self.equivalents
+        lines.append(
+            f"Equivalents: {eq.trees_needed_year:.2f} tree-years, {eq.km_driven:.2f} km driven, "
+            f"{eq.smartphone_charges:.0f} phone charges, {eq.led_bulb_hours:.0f} LED hours"
+        )
+        if self.strategies:
+            lines.append("Strategies: " + "; ".join(
+                f"{s.name} ({s.priority}"
+                + (f", -{s.reduction_percent}%" if s.reduction_percent is not None else "")
+                + (f", ${s.cost_usd:.2f}" if s.cost_usd is not None else "")
+                + ")"
+                for s in self.strategies
+            ))
+        return "\n".join(lines)
+    
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the report as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.model_dump_json(indent=2), encoding="utf-8")
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional["CarbonReport"]:
+        """Read a report written by save, or None if the file does not exist."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        return cls.model_validate_json(path.read_text(encoding="utf-8"))
@@ -1,16 +1,79 @@
-from typing import Type, Dict, Any, List
+from typing import Type, Dict, Any, List, ClassVar, Optional, AsyncIterator
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import requests
+import asyncio
+import httpx
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from .http_session import get_async_http_pool, run_sync
+from .response_cache import get_response_cache
+from .transaction_store import get_transaction_store
+from .models import TransactionSummary
+from .chains import CHAIN_MAP
 
 
 class MoralisTransactionToolInput(BaseModel):
     """Input schema for Moralis Transaction Tool."""
     address: str = Field(..., description="Blockchain address to fetch transaction history for")
     chain: str = Field("eth", description="Blockchain to query (eth, polygon, bsc, arbitrum, optimism, base)")
-    limit: int = Field(100, description="Maximum number of transactions to return (default: 100)")
+    limit: int = Field(100, description="Number of transactions fetched per page, at most 100 (default: 100)")
+    from_block: Optional[int] = Field(None, description="Optional minimum block number to include")
+    from_date: Optional[str] = Field(None, description="Optional start date to include (ISO format, e.g. 2024-01-01)")
+    max_pages: int = Field(50, description="Maximum number of pages to follow, 0 for no limit (default: 50)")
+    compact: bool = Field(True, description="Return a compact summary (default) instead of the full report with sample transactions")
+
+
+class TransactionAggregator:
+    """Accumulates transaction statistics one transaction at a time.
+    
+    Only counters and a handful of sample transactions are kept, so memory
+    stays constant no matter how long the wallet's history is.
+    """
+    
+    # Number of most recent transactions kept for display
+    SAMPLE_SIZE = 5
+    
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.total_transactions = 0
+        self.total_gas_used = 0
+        self.transaction_types: Dict[str, int] = {}
+        self.first_timestamp: Optional[str] = None
+        self.last_timestamp: Optional[str] = None
+        self.recent_transactions: List[Dict[str, Any]] = []
+        self.pages_fetched = 0
+        self.new_transactions = 0
+        self.truncated = False
+    
+    @staticmethod
+    def classify(tx: Dict[str, Any]) -> str:
+        """Determine transaction type based on input data and value."""
+        if tx.get("input") and tx.get("input") != "0x":
+            return "contract_interaction"
+        elif int(tx.get("value") or "0") > 0:
+            return "simple_transfer"
+        return "other"
+    
+    def add(self, tx: Dict[str, Any]) -> None:
+        """Fold a single transaction into the running statistics."""
+        self.total_transactions += 1
+        if tx.get("receipt_gas_used"):
+            self.total_gas_used += int(tx["receipt_gas_used"])
+        
+        tx_type = tx.get("tx_type") or self.classify(tx)
+        self.transaction_types[tx_type] = self.transaction_types.get(tx_type, 0) + 1
+        
+        # ISO-8601 timestamps in the same format compare correctly as strings
+        timestamp = tx.get("block_timestamp")
+        if timestamp:
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+        
+        # Transactions are streamed newest first
+        if len(self.recent_transactions) < self.SAMPLE_SIZE:
+            self.recent_transactions.append(tx)
 
 
 class MoralisTransactionTool(BaseTool):
@@ -18,19 +81,31 @@ class MoralisTransactionTool(BaseTool):
     name: str = "Moralis Transaction History Tool"
     description: str = (
         "Fetches comprehensive transaction history for a blockchain address using Moralis API. "
+        "Follows pagination through the full history (optionally bounded by block or date) and keeps a "
+        "local copy, so repeat analyses only download new transactions. "
         "Returns transaction data including gas usage, timestamps, and transaction types. "
         "Essential for calculating carbon footprint based on actual on-chain activity."
     )
     args_schema: Type[BaseModel] = MoralisTransactionToolInput
     
+    # Moralis wallet history endpoint
+    API_BASE_URL: ClassVar[str] = "https://deep-index.moralis.io/api/v2.2"
+    
+    # Largest page size accepted by the endpoint
+    MAX_PAGE_SIZE: ClassVar[int] = 100
+    
+    # Wallets synced more recently than this are served from the local store without an API call
+    MIN_RESYNC_SECONDS: ClassVar[int] = 60
+    
     def __init__(self):
-        """Initialize the MoralisTransactionTool with cache."""
+        """Initialize the MoralisTransactionTool with the shared response cache."""
         super().__init__()
-        self._cache = {}
+        self._cache = get_response_cache()
     
-    def _cache_key(self, address: str, chain: str, limit: int) -> str:
+    def _cache_key(self, address: str, chain: str, limit: int, from_block: Optional[int],
+                   from_date: Optional[str], max_pages: int, compact: bool) -> str:
         """Generate a cache key based on input parameters."""
-        return f"{address.lower()}:{chain.lower()}:{limit}"
+        return f"{address.lower()}:{chain.lower()}:{limit}:{from_block}:{from_date}:{max_pages}:{compact}"
     
     def _get_api_key(self) -> str:
         """Get Moralis API key from environment."""
@@ -39,77 +114,197 @@ class MoralisTransactionTool(BaseTool):
             raise ValueError("MORALIS_API_KEY environment variable not set")
         return api_key
     
+    # Common chain names mapped to Moralis chain identifiers
+    CHAIN_MAP: ClassVar[Dict[str, str]] = CHAIN_MAP
+    
     def _map_chain_name(self, chain: str) -> str:
         """Map common chain names to Moralis chain identifiers."""
-        chain_map = {
-            "ethereum": "eth",
-            "eth": "eth",
-            "polygon": "polygon",
-            "matic": "polygon",
-            "bsc": "bsc",
-            "bnb": "bsc",
-            "binance": "bsc",
-            "arbitrum": "arbitrum",
-            "optimism": "optimism",
-            "base": "base",
-            "avalanche": "avalanche",
-            "avax": "avalanche"
-        }
-        return chain_map.get(chain.lower(), "eth")
+        return self.CHAIN_MAP.get(chain.strip().lower(), "eth")
     
-    def _run(self, address: str, chain: str = "eth", limit: int = 100) -> str:
+    def _run(self, address: str, chain: str = "eth", limit: int = 100, from_block: Optional[int] = None,
+             from_date: Optional[str] = None, max_pages: int = 50, compact: bool = True) -> str:
         """Fetch transaction history from Moralis API with caching."""
+        return run_sync(self._arun(address, chain, limit, from_block, from_date, max_pages, compact))
+    
+    async def _arun(self, address: str, chain: str = "eth", limit: int = 100, from_block: Optional[int] = None,
+                    from_date: Optional[str] = None, max_pages: int = 50, compact: bool = True) -> str:
+        """Asynchronously fetch transaction history from Moralis API with caching."""
         # Check cache first
-        cache_key = self._cache_key(address, chain, limit)
-        if cache_key in self._cache:
-            return f"[CACHED] {self._cache[cache_key]}"
+        cache_key = self._cache_key(address, chain, limit, from_block, from_date, max_pages, compact)
+        cached = self._cache.get("transactions", cache_key)
+        if cached is not None:
+            return f"[CACHED] {cached}"
         
         try:
-            # Get API key
-            api_key = self._get_api_key()
+            # The compact summary is cached by afetch_summary itself
+            if compact:
+                return (await self.afetch_summary(address, chain, limit, from_block, from_date, max_pages)).render_compact()
             
             # Map chain name
             chain_id = self._map_chain_name(chain)
-            
-            # Construct API URL
-            url = f"https://deep-index.moralis.io/api/v2.2/{address}"
-            
-            # Set up headers and parameters
-            headers = {
-                "accept": "application/json",
-                "X-API-Key": api_key
-            }
-            
-            params = {
-                "chain": chain_id,
-                "limit": limit
-            }
-            
-            # Make API request
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            # Parse response
-            data = response.json()
+            stats = await self._collect_stats(address, chain_id, limit, from_block, from_date, max_pages)
             
             # Format the response
-            formatted_result = self._format_transaction_data(data, address, chain_id)
+            formatted_result = self._format_transaction_data(stats, address, chain_id)
             
             # Cache the result
-            self._cache[cache_key] = formatted_result
+            self._cache.set("transactions", cache_key, formatted_result)
             
             return formatted_result
-            
-        except requests.exceptions.RequestException as e:
+        
+        except httpx.HTTPError as e:
             return f"Error fetching transaction data from Moralis: {str(e)}"
         except Exception as e:
             return f"Error processing transaction data: {str(e)}"
     
-    def _format_transaction_data(self, data: Dict[str, Any], address: str, chain: str) -> str:
-        """Format transaction data into a readable string with gas usage details."""
-        if not data or "result" not in data:
-            return f"No transaction history found for {address} on {chain}."
+    async def afetch_summary(self, address: str, chain: str = "eth", limit: int = 100,
+                             from_block: Optional[int] = None, from_date: Optional[str] = None,
+                             max_pages: int = 50) -> TransactionSummary:
+        """Sync and summarize the transaction history of an address as a typed summary.
+        
+        The compact rendering is cached for later compact tool calls with the
+        same arguments. API errors are raised instead of returned as text.
+        """
+        chain_id = self._map_chain_name(chain)
+        stats = await self._collect_stats(address, chain_id, limit, from_block, from_date, max_pages)
+        summary = self._build_summary(stats, address, chain_id)
+        self._cache.set(
+            "transactions", self._cache_key(address, chain, limit, from_block, from_date, max_pages, True),
+            summary.render_compact()
+        )
+        return summary
+    
+    async def aupdate_store(self, address: str, chain_id: str, max_pages: int = 50) -> TransactionAggregator:
+        """Sync transactions of an address on a Moralis chain into the local store.
+        
+        Returns the aggregator with the sync's page count, number of new
+        transactions and whether the page budget cut it short.
+        """
+        stats = TransactionAggregator()
+        await self._sync_transactions(address, chain_id, self.MAX_PAGE_SIZE, max_pages, stats)
+        return stats
+    
+    async def _collect_stats(self, address: str, chain_id: str, limit: int = 100, from_block: Optional[int] = None,
+                             from_date: Optional[str] = None, max_pages: int = 50) -> TransactionAggregator:
+        """Sync the local store and aggregate the stored history of an address on a Moralis chain."""
+        # Bring the local store up to date with transactions newer than the last sync
+        stats = TransactionAggregator()
+        await self._sync_transactions(address, chain_id, limit, max_pages, stats, from_block, from_date)
+        
+        # Stream the stored history through the aggregator off the event loop
+        await asyncio.to_thread(self._aggregate_stored, stats, address, chain_id, from_block, from_date)
+        return stats
+    
+    @staticmethod
+    def _aggregate_stored(stats: TransactionAggregator, address: str, chain_id: str,
+                          from_block: Optional[int], from_date: Optional[str]) -> None:
+        """Feed every stored transaction of an address on a chain into the aggregator."""
+        store = get_transaction_store()
+        for tx in store.iter_transactions(address, chain_id, from_block, from_date):
+            stats.add(tx)
+    
+    async def _sync_transactions(self, address: str, chain_id: str, limit: int, max_pages: int,
+                                 stats: TransactionAggregator, from_block: Optional[int] = None,
+                                 from_date: Optional[str] = None) -> None:
+        """Fetch transactions newer than the last synced block into the local store.
         
+        Pages are requested oldest first and committed one at a time, so a sync
+        cut short by the page budget resumes where it stopped on the next call.
+        Only a sync whose last page reached the chain head is marked complete,
+        and only a recent complete sync skips the API. The first sync of an
+        address, and any request reaching before the stored history, starts
+        at the requested from_block/from_date instead of the full history.
+        """
+        store = get_transaction_store()
+        state = await asyncio.to_thread(store.get_sync_state, address, chain_id)
+        
+        if state is None or not store.covers(state, from_block, from_date):
+            state = await asyncio.to_thread(store.reset_sync, address, chain_id, from_block, from_date)
+        elif state["complete"]:
+            age = (datetime.now(timezone.utc) - state["synced_at"]).total_seconds()
+            if age < self.MIN_RESYNC_SECONDS:
+                return
+        
+        # Re-request the last synced block itself in case it was only partially stored
+        if state["last_block"] is not None:
+            sync_from_block, sync_from_date = state["last_block"], None
+        else:
+            sync_from_block, sync_from_date = state["from_block"], state["from_date"]
+        
+        pages = self._iter_pages(
+            address, chain_id, limit, sync_from_block, sync_from_date, max_pages, stats, order="ASC"
+        )
+        async for page in pages:
+            transactions = page.get("result") or []
+            # A page without a cursor is the newest one
+            await asyncio.to_thread(store.add_transactions, address, chain_id, transactions,
+                                    TransactionAggregator.classify, complete=not page.get("cursor"))
+            stats.new_transactions += len(transactions)
+    
+    async def _iter_pages(self, address: str, chain_id: str, limit: int, from_block: Optional[int],
+                          from_date: Optional[str], max_pages: int, stats: TransactionAggregator,
+                          order: str = "DESC") -> AsyncIterator[Dict[str, Any]]:
+        """Yield raw Moralis response pages, following the cursor until exhausted or out of budget."""
+        # Get API key
+        api_key = self._get_api_key()
+        
+        # Construct API URL
+        url = f"{self.API_BASE_URL}/{address}"
+        
+        # Set up headers and parameters
+        headers = {
+            "accept": "application/json",
+            "X-API-Key": api_key
+        }
+        
+        params: Dict[str, Any] = {
+            "chain": chain_id,
+            "limit": max(1, min(limit, self.MAX_PAGE_SIZE)),
+            "order": order
+        }
+        if from_block is not None:
+            params["from_block"] = from_block
+        if from_date:
+            params["from_date"] = from_date
+        
+        cursor = None
+        while True:
+            if cursor:
+                params["cursor"] = cursor
+            
+            # Make API request
+            response = await get_async_http_pool().get(url, headers=headers, params=params)
+            response.raise_for_status()
+            page = response.json()
+            stats.pages_fetched += 1
+            
+            yield page
+            
+            cursor = page.get("cursor")
+            if not cursor:
+                break
+            if max_pages and stats.pages_fetched >= max_pages:
+                stats.truncated = True
+                break
+    
+    @staticmethod
+    def _build_summary(stats: TransactionAggregator, address: str, chain: str) -> TransactionSummary:
+        """Convert aggregated statistics into a typed summary."""
+        return TransactionSummary(
+            address=address,
+            chain=chain,
+            total_transactions=stats.total_transactions,
+            total_gas_used=stats.total_gas_used,
+            transaction_types=dict(stats.transaction_types),
+            first_timestamp=stats.first_timestamp,
+            last_timestamp=stats.last_timestamp,
+            new_transactions=stats.new_transactions,
+            pages_fetched=stats.pages_fetched,
+            truncated=stats.truncated
+        )
+    
+    def _format_transaction_data(self, stats: TransactionAggregator, address: str, chain: str) -> str:
+        """Format aggregated transaction statistics into a readable string with gas usage details."""
         # Ensure all text is properly encoded
         def safe_str(value):
             """Convert value to string with proper encoding handling."""
@@ -120,28 +315,22 @@ class MoralisTransactionTool(BaseTool):
             except:
                 return "Unknown"
         
-        transactions = data.get("result", [])
+        def format_time(block_timestamp):
+            """Format an ISO block timestamp for display."""
+            if not block_timestamp:
+                return "Unknown time"
+            try:
+                dt = datetime.fromisoformat(block_timestamp.replace("Z", "+00:00"))
+                return dt.strftime('%Y-%m-%d %H:%M:%S')
+            except:
+                return block_timestamp
+        
+        total_transactions = stats.total_transactions
+        total_gas_used = stats.total_gas_used
         
-        if not transactions:
+        if not total_transactions:
             return f"No transactions found for {address} on {chain}."
         
-        # Calculate aggregate statistics
-        total_transactions = len(transactions)
-        total_gas_used = sum(int(tx.get("receipt_gas_used", 0)) for tx in transactions if tx.get("receipt_gas_used"))
-        
-        # Extract transaction types
-        transaction_types = {}
-        for tx in transactions:
-            # Determine transaction type based on input data and value
-            if tx.get("input") and tx.get("input") != "0x":
-                tx_type = "contract_interaction"
-            elif int(tx.get("value", "0")) > 0:
-                tx_type = "simple_transfer"
-            else:
-                tx_type = "other"
-            
-            transaction_types[tx_type] = transaction_types.get(tx_type, 0) + 1
-        
         # Format summary
         summary = [
             f"Transaction History for {address} on {chain.upper()}:",
@@ -149,30 +338,29 @@ class MoralisTransactionTool(BaseTool):
             f"  Total Transactions: {total_transactions:,}",
             f"  Total Gas Used: {total_gas_used:,}",
             f"  Average Gas per Transaction: {total_gas_used // total_transactions if total_transactions > 0 else 0:,}",
-            f"\nTransaction Type Breakdown:"
+            f"  Time Range: {format_time(stats.first_timestamp)} to {format_time(stats.last_timestamp)}",
+            f"  New Transactions Synced: {stats.new_transactions:,} ({stats.pages_fetched} API pages)"
         ]
         
-        for tx_type, count in sorted(transaction_types.items(), key=lambda x: x[1], reverse=True):
+        if stats.truncated:
+            summary.append(
+                f"  Note: page budget reached before the newest transactions were synced. "
+                f"Run again or increase max_pages to continue the sync."
+            )
+        
+        summary.append(f"\nTransaction Type Breakdown:")
+        for tx_type, count in sorted(stats.transaction_types.items(), key=lambda x: x[1], reverse=True):
             percentage = (count / total_transactions * 100) if total_transactions > 0 else 0
             summary.append(f"  {tx_type.replace('_', ' ').title()}: {count} ({percentage:.1f}%)")
         
         # Add recent transactions sample
-        summary.append(f"\nRecent Transactions (latest {min(5, total_transactions)}):")
-        
-        for idx, tx in enumerate(transactions[:5], 1):
-            block_timestamp = tx.get("block_timestamp", "Unknown")
-            if block_timestamp != "Unknown":
-                try:
-                    dt = datetime.fromisoformat(block_timestamp.replace("Z", "+00:00"))
-                    time_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    time_str = block_timestamp
-            else:
-                time_str = "Unknown time"
-            
+        summary.append(f"\nRecent Transactions (latest {len(stats.recent_transactions)}):")
+        
+        for idx, tx in enumerate(stats.recent_transactions, 1):
+            time_str = format_time(tx.get("block_timestamp"))
             tx_hash = safe_str(tx.get("hash", "Unknown"))[:16] + "..."
-            gas_used = int(tx.get("receipt_gas_used", 0))
-            value_wei = int(tx.get("value", "0"))
+            gas_used = int(tx.get("receipt_gas_used") or 0)
+            value_wei = int(tx.get("value") or "0")
             value_eth = value_wei / 1e18
             
             tx_summary = [
@@ -185,8 +373,8 @@ class MoralisTransactionTool(BaseTool):
             
             summary.extend(tx_summary)
         
-        if total_transactions > 5:
-            summary.append(f"\n... and {total_transactions - 5} more transactions")
+        if total_transactions > len(stats.recent_transactions):
+            summary.append(f"\n... and {total_transactions - len(stats.recent_transactions)} more transactions")
         
         # Add gas usage note for carbon calculation
         summary.append(f"\nCarbon Footprint Data:")
@@ -195,4 +383,4 @@ class MoralisTransactionTool(BaseTool):
         summary.append(f"  Transaction Count: {total_transactions:,}")
         summary.append(f"  This data can be used to calculate carbon emissions based on network-specific emission factors.")
         
-        return "\n".join(summary)
\ No newline at end of file
+        return "\n".join(summary)
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Type, Dict, Any, List, Optional, ClassVar
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from .http_session import run_sync
+from .moralis_transaction_tool import MoralisTransactionTool
+from .chains import CHAIN_MAP
+from .portfolio_tool import PortfolioTool
+
+
+class MultiNetworkAnalysisToolInput(BaseModel):
+    """Input schema for Multi-Network Wallet Analysis Tool."""
+    address: str = Field(..., description="Blockchain address to analyze")
+    networks: str = Field("ethereum", description="Comma-separated list of networks to analyze (e.g. 'ethereum,polygon,bnb chain')")
+    limit: int = Field(100, description="Number of transactions fetched per page for each network (default: 100)")
+
+
+class MultiNetworkAnalysisTool(BaseTool):
+    """Tool to fetch portfolio and transaction data for every requested network concurrently."""
+    name: str = "Multi-Network Wallet Analysis Tool"
+    description: str = (
+        "Fetches the wallet portfolio and the transaction history of every requested network in a single call. "
+        "Pass the full comma-separated network list at once instead of calling the transaction tool per network. "
+        "Returns one merged report with per-network gas usage and transaction counts for carbon calculations."
+    )
+    args_schema: Type[BaseModel] = MultiNetworkAnalysisToolInput
+
+    # Maximum number of provider requests in flight at once
+    DEFAULT_MAX_WORKERS: ClassVar[int] = 6
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize the MultiNetworkAnalysisTool with its underlying tools."""
+        super().__init__()
+        self._max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self._transaction_tool = MoralisTransactionTool()
+        self._portfolio_tool = PortfolioTool()
+
+    @staticmethod
+    def parse_networks(networks: str) -> Dict[str, Optional[str]]:
+        """Split the network list and map each entry to a Moralis chain, dropping duplicates."""
+        chains = {}
+        for network in networks.split(","):
+            network = network.strip()
+            if not network:
+                continue
+            chain = CHAIN_MAP.get(network.lower())
+            if chain is None:
+                chains.setdefault(network, None)
+            elif chain not in chains.values():
+                chains[network] = chain
+        return chains
+
+    def _run(self, address: str, networks: str = "ethereum", limit: int = 100) -> str:
+        """Run the multi-network wallet analysis."""
+        return run_sync(self._arun(address, networks, limit))
+
+    async def _arun(self, address: str, networks: str = "ethereum", limit: int = 100) -> str:
+        """Asynchronously fetch the portfolio and every network's transactions with a bounded worker pool."""
+        chains = self.parse_networks(networks)
+        if not chains:
+            return "No networks specified. Provide a comma-separated list such as 'ethereum,polygon'."
+
+        semaphore = asyncio.Semaphore(self._max_workers)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        supported = {network: chain for network, chain in chains.items() if chain is not None}
+
+        # The portfolio query already spans every network, so it is fetched once alongside the chains
+        results = await asyncio.gather(
+            bounded(self._portfolio_tool.afetch_portfolio(address)),
+            *[bounded(self._transaction_tool.afetch_summary(address, chain, limit)) for chain in supported.values()],
+            return_exceptions=True
+        )
+
+        portfolio_result = results[0] if isinstance(results[0], BaseException) else results[0][1].render_compact()
+        transaction_results = {
+            network: result if isinstance(result, BaseException) else result.render_compact()
+            for network, result in zip(supported.keys(), results[1:])
+        }
+        unsupported = [network for network, chain in chains.items() if chain is None]
+
+        return self._format_merged_result(address, portfolio_result, transaction_results, unsupported)
+
+    def _format_merged_result(self, address: str, portfolio_result: Any,
+                              transaction_results: Dict[str, Any], unsupported: List[str]) -> str:
+        """Merge the portfolio and per-network transaction reports into one readable string."""
+        summary = [
+            f"Multi-Network Wallet Analysis for {address}",
+            f"Networks: {', '.join(list(transaction_results.keys()) + unsupported)}",
+            "",
+            "=== Portfolio (all networks) ===",
+            self._as_text(portfolio_result, "portfolio data"),
+            ""
+        ]
+
+        for network, result in transaction_results.items():
+            summary.append(f"=== Transactions: {network} ===")
+            summary.append(self._as_text(result, f"{network} transactions"))
+            summary.append("")
+
+        if unsupported:
+            summary.append(f"Unsupported networks (skipped): {', '.join(unsupported)}")
+
+        return "\n".join(summary).strip()
+
+    @staticmethod
+    def _as_text(result: Any, label: str) -> str:
+        """Render a gathered result, turning unexpected exceptions into an error line."""
+        if isinstance(result, BaseException):
+            return f"Error fetching {label}: {str(result)}"
+        return str(result)
@@ -1,13 +1,25 @@
-from typing import Type, Dict, Any, List
+import asyncio
+from typing import Type, Dict, Any, List, Optional, Tuple, ClassVar
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .response_cache import get_response_cache
+from .models import PortfolioSummary, TokenHolding, AppHolding
+from .bulk_token_price_tool import BulkTokenPriceTool
+from .price_store import get_price_store
+from .risk_metrics import Position, BENCHMARKS, WINDOW_DAYS, load_series, portfolio_risk
 
 
 class PortfolioToolInput(BaseModel):
     """Input schema for Portfolio Data Tool."""
     address: str = Field(..., description="Blockchain address to fetch portfolio data for")
     network: str = Field("ethereum", description="Blockchain network to query (default: ethereum)")
+    addresses: Optional[List[str]] = Field(None, description="Additional addresses to aggregate with the main address, e.g. all wallets of a treasury")
+    max_holdings: int = Field(500, description="Maximum number of tokens and of DeFi apps to retrieve (default: 500)")
+    compact: bool = Field(True, description="Return a compact summary (default) instead of the full formatted report")
+    include_prices: bool = Field(False, description="Add a price and trend table for the most valuable token holdings")
+    include_risk: bool = Field(False, description="Add concentration (HHI), volatility, Sharpe ratio, correlation matrix and returns vs ETH/BTC computed from 90 days of price history")
 
 
 class PortfolioTool(BaseTool):
@@ -16,160 +28,283 @@ class PortfolioTool(BaseTool):
     description: str = (
         "Fetches comprehensive portfolio data for a blockchain address including token balances, "
         "DeFi positions, NFT holdings, and total portfolio value. Use this to analyze wallet "
-        "holdings and assess portfolio composition."
+        "holdings and assess portfolio composition. Pass 'addresses' to aggregate many wallets "
+        "into consolidated and per-wallet totals. Set 'include_prices' to price the top holdings "
+        "in the same call, and 'include_risk' for computed HHI, volatility, correlation and benchmark returns."
     )
     args_schema: Type[BaseModel] = PortfolioToolInput
     
+    # Number of wallets combined into one portfolio request in multi-address mode
+    ADDRESS_BATCH_SIZE: ClassVar[int] = 25
+    
+    # Maximum number of batch requests in flight at once
+    MAX_CONCURRENT_BATCHES: ClassVar[int] = 4
+    
+    # Holdings fetched per page of the byToken and byApp connections
+    PAGE_SIZE: ClassVar[int] = 100
+    
+    # Holdings retrieved per connection unless max_holdings says otherwise
+    DEFAULT_MAX_HOLDINGS: ClassVar[int] = 500
+    
+    # Positions fetched for each DeFi app
+    POSITIONS_PER_APP: ClassVar[int] = 25
+    
+    # Most valuable token holdings priced when include_prices is set
+    PRICED_HOLDINGS: ClassVar[int] = 20
+    
+    # Most valuable token holdings whose price history feeds the risk metrics
+    RISK_HOLDINGS: ClassVar[int] = 50
+    
+    # Fields selected on each byToken node
+    TOKEN_NODE_FIELDS: ClassVar[str] = '''
+    symbol
+    tokenAddress
+    balance
+    balanceUSD
+    price
+    name
+    network {
+      name
+    }
+    '''
+    
+    # Fields selected on each byApp node, including its positions
+    APP_NODE_FIELDS: ClassVar[str] = '''
+    balanceUSD
+    app {
+      displayName
+      imgUrl
+    }
+    network {
+      name
+    }
+    positionBalances(first: $positions) {
+      edges {
+        node {
+          # App token positions (e.g. LP tokens)
+          ... on AppTokenPositionBalance {
+            type
+            symbol
+            balance
+            balanceUSD
+            price
+            appId
+            # Display properties
+            displayProps {
+              label
+            }
+            # Underlying tokens
+            tokens {
+              ... on BaseTokenPositionBalance {
+                symbol
+                balance
+                balanceUSD
+              }
+            }
+          }
+          # Contract positions (e.g. lending positions)
+          ... on ContractPositionBalance {
+            type
+            balanceUSD
+            # Underlying tokens with meta-types
+            tokens {
+              metaType
+              token {
+                ... on BaseTokenPositionBalance {
+                  symbol
+                  balance
+                  balanceUSD
+                }
+              }
+            }
+            # Display properties
+            displayProps {
+              label
+            }
+          }
+        }
+      }
+    }
+    '''
+    
+    # Fields selected on portfolioV2 for the first page of a full holdings breakdown
+    PORTFOLIO_FIELDS: ClassVar[str] = f'''
+    # Token balances
+    tokenBalances {{
+      totalBalanceUSD
+      byToken(first: $first) {{
+        totalCount
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+        edges {{
+          node {{
+            {TOKEN_NODE_FIELDS}
+          }}
+        }}
+      }}
+    }}
+    
+    # App balances
+    appBalances {{
+      totalBalanceUSD
+      byApp(first: $first) {{
+        totalCount
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+        edges {{
+          node {{
+            {APP_NODE_FIELDS}
+          }}
+        }}
+      }}
+    }}
+    
+    # NFT balances - simplified to avoid schema validation errors
+    nftBalances {{
+      totalBalanceUSD
+      totalTokensOwned
+    }}
+    '''
+    
+    # Queries for the following pages of each holdings connection
+    TOKEN_PAGE_QUERY: ClassVar[str] = f'''
+    query PortfolioTokenPage($addresses: [Address!]!, $first: Int!, $after: String) {{
+      portfolioV2(addresses: $addresses) {{
+        tokenBalances {{
+          byToken(first: $first, after: $after) {{
+            pageInfo {{
+              hasNextPage
+              endCursor
+            }}
+            edges {{
+              node {{
+                {TOKEN_NODE_FIELDS}
+              }}
+            }}
+          }}
+        }}
+      }}
+    }}
+    '''
+    
+    APP_PAGE_QUERY: ClassVar[str] = f'''
+    query PortfolioAppPage($addresses: [Address!]!, $first: Int!, $after: String, $positions: Int!) {{
+      portfolioV2(addresses: $addresses) {{
+        appBalances {{
+          byApp(first: $first, after: $after) {{
+            pageInfo {{
+              hasNextPage
+              endCursor
+            }}
+            edges {{
+              node {{
+                {APP_NODE_FIELDS}
+              }}
+            }}
+          }}
+        }}
+      }}
+    }}
+    '''
+    
+    # Fields selected on portfolioV2 for per-wallet totals only
+    TOTALS_FIELDS: ClassVar[str] = '''
+    tokenBalances {
+      totalBalanceUSD
+    }
+    appBalances {
+      totalBalanceUSD
+    }
+    nftBalances {
+      totalBalanceUSD
+      totalTokensOwned
+    }
+    '''
+    
     def __init__(self):
-        """Initialize the PortfolioTool with cache."""
+        """Initialize the PortfolioTool with the shared response cache and the bulk price tool."""
         super().__init__()
-        self._cache = {}
+        self._cache = get_response_cache()
+        self._price_tool = BulkTokenPriceTool()
     
-    def _cache_key(self, address: str, network: str) -> str:
+    def _cache_key(self, address: str, network: str, max_holdings: int, compact: bool,
+                   include_prices: bool = False, include_risk: bool = False) -> str:
         """Generate a cache key based on input parameters."""
-        return f"{address.lower()}:{network.lower()}"
+        key = f"{address.lower()}:{network.lower()}:{max_holdings}:{compact}"
+        if include_prices:
+            key += ":prices"
+        return f"{key}:risk" if include_risk else key
+    
+    @staticmethod
+    def _collect_addresses(address: str, addresses: Optional[List[str]]) -> List[str]:
+        """Combine the main and additional addresses, dropping blanks and duplicates."""
+        wallets = []
+        for wallet in [address] + list(addresses or []):
+            wallet = wallet.strip()
+            if wallet and wallet.lower() not in [w.lower() for w in wallets]:
+                wallets.append(wallet)
+        return wallets
     
-    def _run(self, address: str, network: str = "ethereum") -> str:
+    def _run(self, address: str, network: str = "ethereum", addresses: Optional[List[str]] = None,
+             max_holdings: int = 500, compact: bool = True, include_prices: bool = False,
+             include_risk: bool = False) -> str:
         """Run the portfolio data retrieval with caching."""
+        return run_sync(self._arun(address, network, addresses, max_holdings, compact, include_prices, include_risk))
+    
+    async def _arun(self, address: str, network: str = "ethereum", addresses: Optional[List[str]] = None,
+                    max_holdings: int = 500, compact: bool = True, include_prices: bool = False,
+                    include_risk: bool = False) -> str:
+        """Asynchronously run the portfolio data retrieval with caching."""
+        wallets = self._collect_addresses(address, addresses)
+        max_holdings = max(1, max_holdings)
+        
         # Generate cache key
-        cache_key = self._cache_key(address, network)
+        cache_key = self._cache_key(
+            ",".join(sorted(w.lower() for w in wallets)), network, max_holdings, compact, include_prices, include_risk
+        )
         
         # Return cached result if available
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        cached = self._cache.get("portfolio", cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            # Map network string to Zapper network slug if needed
-            network_params = None
-            network_map = {
-                "ethereum": "ethereum",
-                "polygon": "polygon",
-                "optimism": "optimism",
-                "arbitrum": "arbitrum",
-                "base": "base",
-                "bsc": "binance-smart-chain",
-                "avalanche": "avalanche",
-                "gnosis": "gnosis",
-                "fantom": "fantom"
-            }
-            
-            if network in network_map:
-                network_params = network_map[network]
-            
-            # Define GraphQL query using current Zapper API structure
-            query = '''
-            query PortfolioData($addresses: [Address!]!) {
-              portfolioV2(addresses: $addresses) {
-                # Token balances
-                tokenBalances {
-                  totalBalanceUSD
-                  byToken(first: 10) {
-                    totalCount
-                    edges {
-                      node {
-                        symbol
-                        tokenAddress
-                        balance
-                        balanceUSD
-                        price
-                        name
-                        network {
-                          name
-                        }
-                      }
-                    }
-                  }
-                }
+            if len(wallets) > 1:
+                merged, wallet_totals, requests_made = await self._fetch_multi_address(wallets, max_holdings)
                 
-                # App balances
-                appBalances {
-                  totalBalanceUSD
-                  byApp(first: 10) {
-                    totalCount
-                    edges {
-                      node {
-                        balanceUSD
-                        app {
-                          displayName
-                          imgUrl
-                        }
-                        network {
-                          name
-                        }
-                        positionBalances(first: 10) {
-                          edges {
-                            node {
-                              # App token positions (e.g. LP tokens)
-                              ... on AppTokenPositionBalance {
-                                type
-                                symbol
-                                balance
-                                balanceUSD
-                                price
-                                appId
-                                # Display properties
-                                displayProps {
-                                  label
-                                }
-                                # Underlying tokens
-                                tokens {
-                                  ... on BaseTokenPositionBalance {
-                                    symbol
-                                    balance
-                                    balanceUSD
-                                  }
-                                }
-                              }
-                              # Contract positions (e.g. lending positions)
-                              ... on ContractPositionBalance {
-                                type
-                                balanceUSD
-                                # Underlying tokens with meta-types
-                                tokens {
-                                  metaType
-                                  token {
-                                    ... on BaseTokenPositionBalance {
-                                      symbol
-                                      balance
-                                      balanceUSD
-                                    }
-                                  }
-                                }
-                                # Display properties
-                                displayProps {
-                                  label
-                                }
-                              }
-                            }
-                          }
-                        }
-                      }
-                    }
-                  }
-                }
+                # Format the response
+                if compact:
+                    formatted_result = self._build_summary(
+                        merged, f"{len(wallets)} addresses (consolidated)", wallet_totals
+                    ).render_compact()
+                else:
+                    formatted_result = self._format_multi_address_data(merged, wallets, wallet_totals, requests_made)
+                portfolio = merged
+            else:
+                result = await self._fetch_single_portfolio(address, max_holdings)
+                portfolio = (result.get("data") or {}).get("portfolioV2")
                 
-                # NFT balances - simplified to avoid schema validation errors
-                nftBalances {
-                  totalBalanceUSD
-                  totalTokensOwned
-                }
-              }
-            }
-            '''
+                # Format the response
+                if compact and portfolio:
+                    formatted_result = self._build_summary(portfolio, address).render_compact()
+                else:
+                    formatted_result = self._format_portfolio_data(result, address)
             
-            # Prepare variables - API now expects 'Address' type, not networks array
-            variables = {
-                "addresses": [address]
-            }
-                
-            # Execute GraphQL query
-            result = ZapperBase.execute_graphql_query(query, variables)
+            # Price the top holdings in one bulk lookup
+            if include_prices and portfolio:
+                formatted_result += "\n\n" + await self.aprice_section(portfolio)
             
-            # Format the response
-            formatted_result = self._format_portfolio_data(result, address)
+            # Risk metrics computed locally from stored price history
+            if include_risk and portfolio:
+                label = address if len(wallets) == 1 else f"{len(wallets)} addresses (consolidated)"
+                formatted_result += "\n\n" + await self.arisk_section(portfolio, label)
             
             # Cache the result
-            self._cache[cache_key] = formatted_result
+            self._cache.set("portfolio", cache_key, formatted_result)
             
             return formatted_result
             
@@ -177,6 +312,382 @@ class PortfolioTool(BaseTool):
             error_details = f"Error type: {type(e).__name__}, Error message: {str(e)}"
             return f"Error fetching portfolio data: {error_details}"
     
+    async def afetch_portfolio(self, address: str,
+                               max_holdings: int = DEFAULT_MAX_HOLDINGS) -> Tuple[Dict[str, Any], PortfolioSummary]:
+        """Fetch one wallet's portfolioV2 result and its typed summary.
+        
+        The compact rendering is cached for later compact tool calls with the
+        same arguments. Raises RuntimeError with the API errors when no
+        portfolio is returned.
+        """
+        result = await self._fetch_single_portfolio(address, max_holdings)
+        portfolio = (result.get("data") or {}).get("portfolioV2")
+        if not portfolio:
+            errors = "; ".join(error.get("message", "Unknown error") for error in result.get("errors") or [])
+            raise RuntimeError(errors or "No portfolio data found")
+        
+        summary = self._build_summary(portfolio, address)
+        self._cache.set("portfolio", self._cache_key(address, "ethereum", max_holdings, True), summary.render_compact())
+        return portfolio, summary
+    
+    async def _fetch_single_portfolio(self, address: str, max_holdings: int) -> Dict[str, Any]:
+        """Fetch the raw portfolioV2 result for one wallet, walking every holdings page up to max_holdings."""
+        # Define GraphQL query using current Zapper API structure
+        query = f'''
+        query PortfolioData($addresses: [Address!]!, $first: Int!, $positions: Int!) {{
+          portfolioV2(addresses: $addresses) {{
+            {self.PORTFOLIO_FIELDS}
+          }}
+        }}
+        '''
+        
+        # Prepare variables - API now expects 'Address' type, not networks array
+        variables = {
+            "addresses": [address],
+            "first": min(self.PAGE_SIZE, max_holdings),
+            "positions": self.POSITIONS_PER_APP
+        }
+        
+        # Execute GraphQL query
+        result = await ZapperBase.aexecute_graphql_query(query, variables)
+        
+        # Walk the remaining pages of the holdings connections
+        portfolio = (result.get("data") or {}).get("portfolioV2")
+        if portfolio:
+            await self._complete_holdings([address], portfolio, max_holdings)
+        
+        return result
+    
+    async def _fetch_multi_address(self, wallets: List[str], max_holdings: int):
+        """Fetch many wallets in concurrent batches, returning merged holdings, per-wallet totals and the request count."""
+        batches = [wallets[i:i + self.ADDRESS_BATCH_SIZE] for i in range(0, len(wallets), self.ADDRESS_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_BATCHES)
+        
+        async def bounded(batch):
+            async with semaphore:
+                return await self._fetch_address_batch(batch, max_holdings)
+        
+        results = await asyncio.gather(*[bounded(batch) for batch in batches], return_exceptions=True)
+        
+        portfolios = []
+        wallet_totals: Dict[str, Any] = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                for wallet in batch:
+                    wallet_totals[wallet] = f"Error: {str(result)}"
+                continue
+            combined, totals = result
+            if combined:
+                portfolios.append(combined)
+            wallet_totals.update(totals)
+        
+        if not portfolios:
+            errors = {str(result) for result in results if isinstance(result, BaseException)}
+            raise RuntimeError("; ".join(errors) or "No portfolio data returned")
+        
+        return self._merge_portfolios(portfolios), wallet_totals, len(batches)
+    
+    async def _fetch_address_batch(self, batch: List[str], max_holdings: int):
+        """Fetch combined holdings and per-wallet totals for one batch of wallets."""
+        variable_defs = ["$addresses: [Address!]!", "$first: Int!", "$positions: Int!"]
+        selections = [f"combined: portfolioV2(addresses: $addresses) {{\n{self.PORTFOLIO_FIELDS}\n}}"]
+        variables: Dict[str, Any] = {
+            "addresses": batch,
+            "first": min(self.PAGE_SIZE, max_holdings),
+            "positions": self.POSITIONS_PER_APP
+        }
+        for i, wallet in enumerate(batch):
+            variable_defs.append(f"$wallet{i}: [Address!]!")
+            selections.append(f"wallet{i}: portfolioV2(addresses: $wallet{i}) {{\n{self.TOTALS_FIELDS}\n}}")
+            variables[f"wallet{i}"] = [wallet]
+        
+        query = f"query PortfolioBatch({', '.join(variable_defs)}) {{\n" + "\n".join(selections) + "\n}"
+        result = await ZapperBase.aexecute_graphql_query(query, variables)
+        
+        data = result.get("data") or {}
+        if not data.get("combined"):
+            errors = "; ".join(error.get("message", "") for error in result.get("errors") or [])
+            raise RuntimeError(errors or "No portfolio data returned")
+        
+        await self._complete_holdings(batch, data["combined"], max_holdings)
+        
+        totals = {}
+        for i, wallet in enumerate(batch):
+            portfolio = data.get(f"wallet{i}")
+            totals[wallet] = self._portfolio_totals(portfolio) if portfolio else "Error: no data returned"
+        return data["combined"], totals
+    
+    async def _complete_holdings(self, addresses: List[str], portfolio: Dict[str, Any], max_holdings: int) -> None:
+        """Walk the remaining byToken and byApp pages concurrently, appending edges to the portfolio in place."""
+        await asyncio.gather(
+            self._walk_connection(addresses, (portfolio.get("tokenBalances") or {}).get("byToken"),
+                                  self.TOKEN_PAGE_QUERY, "tokenBalances", "byToken", max_holdings),
+            self._walk_connection(addresses, (portfolio.get("appBalances") or {}).get("byApp"),
+                                  self.APP_PAGE_QUERY, "appBalances", "byApp", max_holdings)
+        )
+    
+    async def _walk_connection(self, addresses: List[str], connection: Optional[Dict[str, Any]], query: str,
+                               balances_field: str, connection_field: str, max_holdings: int) -> None:
+        """Follow a connection's cursor until it is exhausted or max_holdings edges are collected."""
+        if not connection:
+            return
+        
+        edges = connection.setdefault("edges", [])
+        page_info = connection.get("pageInfo") or {}
+        
+        while page_info.get("hasNextPage") and page_info.get("endCursor") and len(edges) < max_holdings:
+            variables = {
+                "addresses": addresses,
+                "first": min(self.PAGE_SIZE, max_holdings - len(edges)),
+                "after": page_info["endCursor"]
+            }
+            if connection_field == "byApp":
+                variables["positions"] = self.POSITIONS_PER_APP
+            result = await ZapperBase.aexecute_graphql_query(query, variables)
+            page = (((result.get("data") or {}).get("portfolioV2") or {}).get(balances_field) or {}).get(connection_field)
+            if not page:
+                break
+            
+            # Only the page's edges are kept, so memory grows with the holdings rather than the responses
+            edges.extend(page.get("edges") or [])
+            page_info = page.get("pageInfo") or {}
+        
+        del edges[max_holdings:]
+        connection["pageInfo"] = page_info
+    
+    @staticmethod
+    def _priceable_holdings(portfolio: Dict[str, Any], count: int) -> List[Tuple[str, str]]:
+        """Pick the most valuable token holdings that can be priced, as (network, address) pairs."""
+        edges = ((portfolio.get("tokenBalances") or {}).get("byToken") or {}).get("edges") or []
+        nodes = [edge["node"] for edge in edges if edge and edge.get("node")]
+        nodes.sort(key=lambda node: PortfolioTool._as_float(node.get("balanceUSD")), reverse=True)
+        
+        holdings = []
+        for node in nodes:
+            network = BulkTokenPriceTool.network_key((node.get("network") or {}).get("name"))
+            token_address = node.get("tokenAddress")
+            if network and token_address and (network, token_address) not in holdings:
+                holdings.append((network, token_address))
+            if len(holdings) >= count:
+                break
+        return holdings
+    
+    async def aprice_section(self, portfolio: Dict[str, Any], days: int = 30, count: Optional[int] = None) -> str:
+        """Price the most valuable token holdings in one bulk lookup and render them as a table."""
+        holdings = self._priceable_holdings(portfolio, count or self.PRICED_HOLDINGS)
+        if not holdings:
+            return "No priceable token holdings found."
+        prices, requests_made = await self._price_tool.afetch_prices(holdings, days)
+        return self._price_tool.format_price_table(
+            [prices[(network, token_address.lower())] for network, token_address in holdings], days, requests_made
+        )
+    
+    @staticmethod
+    def _risk_positions(portfolio: Dict[str, Any], priced_count: int) -> List[Position]:
+        """Turn token and app holdings into positions, keying the most valuable priceable tokens to their price series."""
+        token_edges = ((portfolio.get("tokenBalances") or {}).get("byToken") or {}).get("edges") or []
+        app_edges = ((portfolio.get("appBalances") or {}).get("byApp") or {}).get("edges") or []
+        tokens = [edge["node"] for edge in token_edges if edge and edge.get("node")]
+        tokens.sort(key=lambda node: PortfolioTool._as_float(node.get("balanceUSD")), reverse=True)
+        
+        positions = []
+        priced = 0
+        for node in tokens:
+            key = None
+            network = BulkTokenPriceTool.network_key((node.get("network") or {}).get("name"))
+            if priced < priced_count and network and node.get("tokenAddress"):
+                key = (ZapperBase.get_chain_id(network), node["tokenAddress"].lower())
+                priced += 1
+            value = PortfolioTool._as_float(node.get("balanceUSD"))
+            positions.append(Position(node.get("symbol") or "Unknown", value, key))
+        
+        for edge in app_edges:
+            if edge and edge.get("node"):
+                app = edge["node"]
+                name = (app.get("app") or {}).get("displayName") or "Unknown"
+                positions.append(Position(name, PortfolioTool._as_float(app.get("balanceUSD"))))
+        return positions
+    
+    async def arisk_section(self, portfolio: Dict[str, Any], label: str) -> str:
+        """Fill the price history of the top holdings and benchmarks, then render the portfolio's risk metrics."""
+        positions = self._risk_positions(portfolio, self.RISK_HOLDINGS)
+        keys = [position.key for position in positions if position.key] + list(BENCHMARKS.values())
+        await self._price_tool.aensure_history(keys, WINDOW_DAYS)
+        
+        store = get_price_store()
+        report = portfolio_risk({label: positions}, load_series(store, keys), risk_free_rate=store.risk_free_rate)[label]
+        return report.render_compact()
+    
+    @staticmethod
+    def _as_float(value: Any) -> float:
+        """Convert an API value to float, treating missing or invalid values as zero."""
+        try:
+            return float(value or 0)
+        except (ValueError, TypeError):
+            return 0.0
+    
+    def _portfolio_totals(self, portfolio: Dict[str, Any]) -> Dict[str, float]:
+        """Extract token, app and NFT totals from a portfolioV2 result."""
+        nft_balances = portfolio.get("nftBalances") or {}
+        totals = {
+            "tokens": self._as_float((portfolio.get("tokenBalances") or {}).get("totalBalanceUSD")),
+            "apps": self._as_float((portfolio.get("appBalances") or {}).get("totalBalanceUSD")),
+            "nfts": self._as_float(nft_balances.get("totalBalanceUSD")),
+            "nft_count": int(self._as_float(nft_balances.get("totalTokensOwned")))
+        }
+        totals["total"] = totals["tokens"] + totals["apps"] + totals["nfts"]
+        return totals
+    
+    def _merge_portfolios(self, portfolios: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge portfolioV2 results from several batches, summing holdings of the same token or app."""
+        tokens: Dict[Any, Dict[str, Any]] = {}
+        apps: Dict[Any, Dict[str, Any]] = {}
+        token_count = app_count = 0
+        token_total = app_total = nft_total = 0.0
+        nft_count = 0
+        
+        for portfolio in portfolios:
+            token_balances = portfolio.get("tokenBalances") or {}
+            app_balances = portfolio.get("appBalances") or {}
+            nft_balances = portfolio.get("nftBalances") or {}
+            by_token = token_balances.get("byToken") or {}
+            by_app = app_balances.get("byApp") or {}
+            
+            token_total += self._as_float(token_balances.get("totalBalanceUSD"))
+            app_total += self._as_float(app_balances.get("totalBalanceUSD"))
+            nft_total += self._as_float(nft_balances.get("totalBalanceUSD"))
+            nft_count += int(self._as_float(nft_balances.get("totalTokensOwned")))
+            token_count += int(self._as_float(by_token.get("totalCount")))
+            app_count += int(self._as_float(by_app.get("totalCount")))
+            
+            for edge in by_token.get("edges") or []:
+                node = (edge or {}).get("node")
+                if not node:
+                    continue
+                key = ((node.get("tokenAddress") or "").lower(), (node.get("network") or {}).get("name"))
+                if key in tokens:
+                    merged = tokens[key]
+                    merged["balance"] = self._as_float(merged.get("balance")) + self._as_float(node.get("balance"))
+                    merged["balanceUSD"] = self._as_float(merged.get("balanceUSD")) + self._as_float(node.get("balanceUSD"))
+                    token_count -= 1
+                else:
+                    tokens[key] = dict(node)
+            
+            for edge in by_app.get("edges") or []:
+                node = (edge or {}).get("node")
+                if not node:
+                    continue
+                key = ((node.get("app") or {}).get("displayName"), (node.get("network") or {}).get("name"))
+                if key in apps:
+                    merged = apps[key]
+                    merged["balanceUSD"] = self._as_float(merged.get("balanceUSD")) + self._as_float(node.get("balanceUSD"))
+                    merged["positionBalances"] = {
+                        "edges": ((merged.get("positionBalances") or {}).get("edges") or []) +
+                                 ((node.get("positionBalances") or {}).get("edges") or [])
+                    }
+                    app_count -= 1
+                else:
+                    apps[key] = dict(node)
+        
+        return {
+            "tokenBalances": {
+                "totalBalanceUSD": token_total,
+                "byToken": {"totalCount": token_count, "edges": [{"node": node} for node in tokens.values()]}
+            },
+            "appBalances": {
+                "totalBalanceUSD": app_total,
+                "byApp": {"totalCount": app_count, "edges": [{"node": node} for node in apps.values()]}
+            },
+            "nftBalances": {
+                "totalBalanceUSD": nft_total,
+                "totalTokensOwned": nft_count
+            }
+        }
+    
+    def _build_summary(self, portfolio: Dict[str, Any], address: str,
+                       wallet_totals: Optional[Dict[str, Any]] = None) -> PortfolioSummary:
+        """Convert a portfolioV2 result into a typed summary with the top holdings."""
+        totals = self._portfolio_totals(portfolio)
+        by_token = (portfolio.get("tokenBalances") or {}).get("byToken") or {}
+        by_app = (portfolio.get("appBalances") or {}).get("byApp") or {}
+        tokens = [edge["node"] for edge in by_token.get("edges") or [] if edge and edge.get("node")]
+        apps = [edge["node"] for edge in by_app.get("edges") or [] if edge and edge.get("node")]
+        
+        top_tokens = sorted(tokens, key=lambda x: self._as_float(x.get("balanceUSD")), reverse=True)[:5]
+        top_apps = sorted(apps, key=lambda x: self._as_float(x.get("balanceUSD")), reverse=True)[:3]
+        
+        return PortfolioSummary(
+            address=address,
+            total_value_usd=totals["total"],
+            token_value_usd=totals["tokens"],
+            app_value_usd=totals["apps"],
+            nft_value_usd=totals["nfts"],
+            token_count=int(self._as_float(by_token.get("totalCount"))),
+            app_count=int(self._as_float(by_app.get("totalCount"))),
+            nft_count=totals["nft_count"],
+            tokens_retrieved=len(tokens),
+            apps_retrieved=len(apps),
+            top_tokens=[
+                TokenHolding(
+                    symbol=token.get("symbol") or "Unknown",
+                    name=token.get("name"),
+                    token_address=token.get("tokenAddress"),
+                    network=(token.get("network") or {}).get("name") or "Unknown",
+                    balance=self._as_float(token.get("balance")),
+                    balance_usd=self._as_float(token.get("balanceUSD")),
+                    price=self._as_float(token.get("price"))
+                )
+                for token in top_tokens
+            ],
+            top_apps=[
+                AppHolding(
+                    name=(app.get("app") or {}).get("displayName") or "Unknown",
+                    network=(app.get("network") or {}).get("name") or "Unknown",
+                    balance_usd=self._as_float(app.get("balanceUSD"))
+                )
+                for app in top_apps
+            ],
+            wallet_totals={
+                wallet: value["total"] for wallet, value in (wallet_totals or {}).items() if isinstance(value, dict)
+            },
+            # Wallets whose batch failed are not in the totals; the summary says so
+            wallet_errors={
+                wallet: value.removeprefix("Error: ") for wallet, value in (wallet_totals or {}).items()
+                if isinstance(value, str)
+            }
+        )
+    
+    def _format_multi_address_data(self, merged: Dict[str, Any], wallets: List[str],
+                                   wallet_totals: Dict[str, Any], requests_made: int) -> str:
+        """Format consolidated holdings followed by per-wallet totals."""
+        consolidated = self._format_portfolio_data(
+            {"data": {"portfolioV2": merged}}, f"{len(wallets)} addresses (consolidated)"
+        )
+        
+        summary = [
+            consolidated,
+            "",
+            f"Per-Wallet Totals ({len(wallets)} wallets, {requests_made} API requests):"
+        ]
+        
+        ranked = sorted(
+            wallets,
+            key=lambda w: wallet_totals[w]["total"] if isinstance(wallet_totals.get(w), dict) else -1,
+            reverse=True
+        )
+        for wallet in ranked:
+            totals = wallet_totals.get(wallet, "Error: no data returned")
+            if isinstance(totals, str):
+                summary.append(f"{wallet}: {totals}")
+                continue
+            summary.append(
+                f"{wallet}: ${totals['total']:.2f} "
+                f"(tokens ${totals['tokens']:.2f}, DeFi ${totals['apps']:.2f}, "
+                f"NFTs ${totals['nfts']:.2f} across {totals['nft_count']} NFTs)"
+            )
+        
+        return "\n".join(summary)
+    
     def _format_portfolio_data(self, data: Dict[str, Any], address: str) -> str:
         """Format portfolio data into a readable string."""
         if not data or "data" not in data or "portfolioV2" not in data["data"]:
@@ -326,9 +837,14 @@ class PortfolioTool(BaseTool):
             f"Portfolio Summary for {address}:",
             f"Total Value: ${float(total_value):.2f}",
             f"Assets: {token_count} tokens, {nft_count} NFTs, {app_count} DeFi positions",
-            ""
+            f"Holdings Retrieved: {len(tokens)} of {token_count} tokens, {len(apps)} of {app_count} DeFi apps"
         ]
         
+        if len(tokens) < token_count or len(apps) < app_count:
+            summary.append("Note: Holdings were capped at max_holdings; totals above still cover the full portfolio.")
+        
+        summary.append("")
+        
         # Add token section
         summary.append("Top Tokens by Value:")
         if top_tokens:
@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .data_dir import get_data_dir
+from .models import PriceMetrics
+
+
+# Window covered by each Zapper TimeFrame, in seconds
+TIMEFRAME_SECONDS: Dict[str, int] = {
+    "HOUR": 60 * 60,
+    "DAY": 24 * 60 * 60,
+    "WEEK": 7 * 24 * 60 * 60,
+    "MONTH": 30 * 24 * 60 * 60,
+    "YEAR": 365 * 24 * 60 * 60
+}
+
+DAY_SECONDS = 24 * 60 * 60
+
+# Crypto markets trade every day of the year
+PERIODS_PER_YEAR = 365
+
+
+def timeframe_for(seconds: float) -> str:
+    """Return the smallest TimeFrame whose window covers the given number of seconds."""
+    for time_frame, window in TIMEFRAME_SECONDS.items():
+        if window >= seconds:
+            return time_frame
+    return "YEAR"
+
+
+def resample_ohlc(timestamps: np.ndarray, prices: np.ndarray, interval: int) -> Dict[str, np.ndarray]:
+    """Resample a sorted price series into OHLC bars of interval seconds.
+    
+    Bars are aligned to multiples of interval and only bars that contain at
+    least one observation are returned.
+    """
+    if timestamps.size == 0:
+        empty = np.array([], dtype=np.float64)
+        return {"timestamp": np.array([], dtype=np.int64), "open": empty, "high": empty, "low": empty, "close": empty}
+    
+    buckets = timestamps // interval
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], timestamps.size] - 1
+    return {
+        "timestamp": buckets[starts] * interval,
+        "open": prices[starts],
+        "high": np.maximum.reduceat(prices, starts),
+        "low": np.minimum.reduceat(prices, starts),
+        "close": prices[ends]
+    }
+
+
+def period_return(timestamps: np.ndarray, prices: np.ndarray, seconds: int) -> Optional[float]:
+    """Return the percentage change from the price seconds before the last observation, or None if out of range."""
+    if timestamps.size < 2:
+        return None
+    start_at = timestamps[-1] - seconds
+    index = np.searchsorted(timestamps, start_at, side="right") - 1
+    if index < 0 or prices[index] <= 0:
+        return None
+    return float((prices[-1] / prices[index] - 1) * 100)
+
+
+def volatility_and_sharpe(daily_closes: np.ndarray, risk_free_rate: float = 0.0) -> Tuple[Optional[float], Optional[float]]:
+    """Annualized volatility of daily log returns and the Sharpe ratio against an annual risk-free rate."""
+    closes = daily_closes[daily_closes > 0]
+    if closes.size < 3:
+        return None, None
+    log_returns = np.diff(np.log(closes))
+    volatility = float(np.std(log_returns, ddof=1) * np.sqrt(PERIODS_PER_YEAR))
+    if volatility == 0:
+        return 0.0, None
+    sharpe = float((np.mean(log_returns) * PERIODS_PER_YEAR - risk_free_rate) / volatility)
+    return volatility, sharpe
+
+
+class PriceStore:
+    """Local columnar store of USD price ticks per (chainId, token).
+    
+    Each series is one ``.npz`` file of parallel timestamp/open/median/close
+    arrays sorted by time, plus the time range its fetches have covered.
+    Zapper only serves windows that end now, so a re-query fetches the
+    smallest TimeFrame that covers the gap since the last fetch instead of
+    the whole requested window.
+    """
+    
+    DEFAULT_DIRNAME = "price_store"
+    
+    # Series fetched more recently than this are considered up to date
+    FRESHNESS_SECONDS = 5 * 60
+    
+    # Return periods reported by metrics, in days
+    RETURN_PERIODS = (7, 30, 90)
+    
+    COLUMNS = ("timestamp", "open", "median", "close")
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, risk_free_rate: Optional[float] = None):
+        """Initialize the store in path (default: data/price_store)."""
+        self.path = Path(path) if path else get_data_dir() / self.DEFAULT_DIRNAME
+        self.risk_free_rate = (
+            risk_free_rate if risk_free_rate is not None else float(os.getenv("ONCHAIN_RISK_FREE_RATE", "0"))
+        )
+        self._lock = threading.Lock()
+    
+    def _series_path(self, chain_id: int, token_address: str) -> Path:
+        """Return the file holding one series."""
+        return self.path / str(chain_id) / f"{token_address.lower()}.npz"
+    
+    def load(self, chain_id: int, token_address: str) -> Dict[str, Any]:
+        """Load a series as arrays plus the (start, end) time range its fetches covered, or None if never fetched."""
+        path = self._series_path(chain_id, token_address)
+        if not path.exists():
+            series: Dict[str, Any] = {column: np.array([], dtype=np.float64) for column in self.COLUMNS}
+            series["timestamp"] = np.array([], dtype=np.int64)
+            series["coverage"] = None
+            return series
+        
+        with np.load(path) as data:
+            series = {column: data[column] for column in self.COLUMNS}
+            coverage = data["coverage"]
+        series["coverage"] = (int(coverage[0]), int(coverage[1]))
+        return series
+    
+    @staticmethod
+    def _ticks_to_arrays(ticks: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Convert priceTicks from the API into sorted arrays with timestamps in seconds."""
+        timestamps = np.array([float(tick.get("timestamp") or 0) for tick in ticks], dtype=np.float64)
+        # Zapper reports tick timestamps in milliseconds
+        timestamps = np.where(timestamps > 1e12, timestamps / 1000, timestamps).astype(np.int64)
+        columns = {"timestamp": timestamps}
+        for column in ("open", "median", "close"):
+            columns[column] = np.array([float(tick.get(column) or 0) for tick in ticks], dtype=np.float64)
+        
+        order = np.argsort(timestamps, kind="stable")
+        return {column: values[order] for column, values in columns.items()}
+    
+    def add_ticks(self, chain_id: int, token_address: str, ticks: List[Dict[str, Any]], time_frame: str,
+                  fetched_at: Optional[float] = None) -> int:
+        """Merge ticks fetched for a TimeFrame window ending at fetched_at into the series. Returns its length."""
+        fetched_at = int(fetched_at or time.time())
+        new = self._ticks_to_arrays(ticks or [])
+        window_start = fetched_at - TIMEFRAME_SECONDS.get(time_frame, TIMEFRAME_SECONDS["YEAR"])
+        
+        with self._lock:
+            old = self.load(chain_id, token_address)
+            
+            # New ticks first so np.unique keeps them over older values at the same timestamp
+            timestamps = np.concatenate([new["timestamp"], old["timestamp"]])
+            timestamps, first = np.unique(timestamps, return_index=True)
+            series = {"timestamp": timestamps}
+            for column in ("open", "median", "close"):
+                series[column] = np.concatenate([new[column], old[column]])[first]
+            
+            # Coverage stays one contiguous range; a gap since the last fetch restarts it
+            coverage = old["coverage"]
+            if coverage is not None and window_start <= coverage[1]:
+                coverage = (min(coverage[0], window_start), fetched_at)
+            else:
+                coverage = (window_start, fetched_at)
+            
+            path = self._series_path(chain_id, token_address)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # The lock only serializes threads, so the temp file is per process to keep processes apart
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+            np.savez(tmp_path, coverage=np.array(coverage, dtype=np.int64), **series)
+            os.replace(tmp_path, path)
+        return int(timestamps.size)
+    
+    def missing_timeframe(self, chain_id: int, token_address: str, days: int, now: Optional[float] = None) -> Optional[str]:
+        """Return the TimeFrame to fetch so the series covers the last days, or None if it already does."""
+        now = now or time.time()
+        window_start = now - days * DAY_SECONDS
+        coverage = self.load(chain_id, token_address)["coverage"]
+        
+        if coverage is None or coverage[0] > window_start:
+            return timeframe_for(days * DAY_SECONDS)
+        if now - coverage[1] <= self.FRESHNESS_SECONDS:
+            return None
+        return timeframe_for(now - coverage[1])
+    
+    def ohlc(self, chain_id: int, token_address: str, interval: int = DAY_SECONDS) -> Dict[str, np.ndarray]:
+        """Resample the stored close prices into OHLC bars of interval seconds."""
+        series = self.load(chain_id, token_address)
+        return resample_ohlc(series["timestamp"], series["close"], interval)
+    
+    def metrics(self, chain_id: int, token_address: str) -> PriceMetrics:
+        """Compute period returns, annualized volatility and Sharpe ratio from the stored series."""
+        series = self.load(chain_id, token_address)
+        timestamps, closes = series["timestamp"], series["close"]
+        valid = closes > 0
+        timestamps, closes = timestamps[valid], closes[valid]
+        
+        returns = {f"{days}d": period_return(timestamps, closes, days * DAY_SECONDS) for days in self.RETURN_PERIODS}
+        
+        # Volatility and Sharpe over the longest return period, from daily closes
+        if timestamps.size:
+            start = np.searchsorted(timestamps, timestamps[-1] - max(self.RETURN_PERIODS) * DAY_SECONDS)
+            timestamps, closes = timestamps[start:], closes[start:]
+        daily = resample_ohlc(timestamps, closes, DAY_SECONDS)
+        volatility, sharpe = volatility_and_sharpe(daily["close"], self.risk_free_rate)
+        
+        return PriceMetrics(
+            returns=returns,
+            volatility=volatility,
+            sharpe=sharpe,
+            observations=int(timestamps.size),
+            daily_bars=int(daily["close"].size),
+            first_timestamp=int(timestamps[0]) if timestamps.size else None,
+            last_timestamp=int(timestamps[-1]) if timestamps.size else None
+        )
+
+
+_default_price_store: Optional[PriceStore] = None
+_default_price_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Return the process-wide price store."""
+    global _default_price_store
+    if _default_price_store is None:
+        with _default_price_store_lock:
+            if _default_price_store is None:
+                _default_price_store = PriceStore()
+    return _default_price_store
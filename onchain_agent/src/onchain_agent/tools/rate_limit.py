@@ -0,0 +1,180 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Iterator, Union
+from .data_dir import get_data_dir
+
+
+class RateLimiter:
+    """Token-bucket rate limiter per API host, shared by every thread and process.
+    
+    Bucket state lives in a small SQLite file so worker processes of a batch
+    job draw from the same per-provider budget. Each request reserves a token
+    in one short write transaction and then sleeps until its reservation is
+    due, so waiting never holds the database lock. A 429 response can pause
+    a host for every caller at once.
+    """
+    
+    DEFAULT_FILENAME = "rate_limits.db"
+    
+    # Sustained requests per second per host; hosts not listed are not limited
+    DEFAULT_RATES: Dict[str, float] = {
+        "api.zapper.fi": 10.0,
+        "deep-index.moralis.io": 20.0
+    }
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        host TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    """
+    
+    def __init__(self, rates: Optional[Dict[str, float]] = None, path: Optional[Union[str, Path]] = None):
+        """Initialize the limiter with per-host rates.
+        
+        Rates can be overridden with ONCHAIN_RATE_LIMITS, e.g.
+        ``api.zapper.fi=5,deep-index.moralis.io=25``; a rate of 0 disables
+        limiting for that host.
+        """
+        self.rates = dict(self.DEFAULT_RATES)
+        self.rates.update(self._parse_rates(os.getenv("ONCHAIN_RATE_LIMITS", "")))
+        if rates:
+            self.rates.update(rates)
+        self.path = Path(path) if path else get_data_dir() / self.DEFAULT_FILENAME
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = {}
+    
+    @staticmethod
+    def _parse_rates(value: str) -> Dict[str, float]:
+        """Parse a comma-separated list of host=rate pairs."""
+        rates = {}
+        for item in value.split(","):
+            if "=" in item:
+                host, rate = item.split("=", 1)
+                rates[host.strip().lower()] = float(rate)
+        return rates
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode for explicit transactions."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def _ensure_schema(self) -> None:
+        """Create the database file and schema on first use."""
+        if self._initialized:
+            return
+        with self._lock:
+            if not self._initialized:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._connect() as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(self.SCHEMA)
+                self._initialized = True
+    
+    def _update_bucket(self, host: str, rate: float, cost: float, floor: Optional[float] = None) -> float:
+        """Refill a host's bucket, take cost tokens (capping at floor) and return the new token count."""
+        self._ensure_schema()
+        capacity = max(rate, 1.0)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE host = ?", (host,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                
+                # Tokens may go negative: each waiting request holds its place in the queue
+                tokens -= cost
+                if floor is not None:
+                    tokens = min(tokens, floor)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (host, tokens, updated_at) VALUES (?, ?, ?)",
+                    (host, tokens, now)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return tokens
+    
+    def _record(self, host: str, wait: float) -> None:
+        """Update the throttling counters of a host."""
+        with self._lock:
+            counters = self._counters.setdefault(host, {"requests": 0, "throttled": 0, "wait_seconds": 0.0})
+            counters["requests"] += 1
+            if wait > 0:
+                counters["throttled"] += 1
+                counters["wait_seconds"] += wait
+    
+    def reserve(self, host: str) -> float:
+        """Take one token for a host and return how many seconds to wait before sending."""
+        host = host.lower()
+        rate = self.rates.get(host)
+        if not rate or rate <= 0:
+            return 0.0
+        
+        wait = max(0.0, -self._update_bucket(host, rate, 1) / rate)
+        self._record(host, wait)
+        return wait
+    
+    def pause(self, host: str, seconds: float) -> None:
+        """Hold back every caller of a host for the given time, e.g. after a 429 with Retry-After."""
+        host = host.lower()
+        rate = self.rates.get(host)
+        if not rate or rate <= 0 or seconds <= 0:
+            return
+        self._update_bucket(host, rate, 0, floor=-seconds * rate)
+    
+    def acquire(self, host: str) -> None:
+        """Block until a request to the host is allowed."""
+        wait = self.reserve(host)
+        if wait:
+            time.sleep(wait)
+    
+    async def aacquire(self, host: str) -> None:
+        """Wait without blocking the event loop until a request to the host is allowed.
+        
+        The reservation's SQLite transaction runs in a worker thread, so a
+        lock held by another process never stalls the other coroutines.
+        """
+        rate = self.rates.get(host.lower())
+        if not rate or rate <= 0:
+            return
+        wait = await asyncio.to_thread(self.reserve, host)
+        if wait:
+            await asyncio.sleep(wait)
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-host rate, request, throttled-request and total throttle wait counters for this process."""
+        with self._lock:
+            counters = {host: dict(values) for host, values in self._counters.items()}
+        stats = {}
+        for host, rate in self.rates.items():
+            if rate and rate > 0:
+                values = counters.get(host, {"requests": 0, "throttled": 0, "wait_seconds": 0.0})
+                stats[host] = {"rate": rate, **values, "wait_seconds": round(values["wait_seconds"], 3)}
+        return stats
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_limiter_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter()
+    return _default_limiter
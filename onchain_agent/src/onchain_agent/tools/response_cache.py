@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union, Iterator
+from .data_dir import get_data_dir
+
+
+class ResponseCache:
+    """Process-wide LRU cache with a TTL per data type, shared by all tools.
+    
+    Entries are keyed by ``(namespace, key)`` where the namespace names the
+    data type (prices, portfolios, ...) and selects its TTL. An optional
+    SQLite backend keeps entries across processes; the in-memory LRU sits
+    in front of it either way.
+    """
+    
+    # Time to live in seconds per namespace; None means the entry never expires
+    DEFAULT_TTLS: Dict[str, Optional[float]] = {
+        "price": 30,
+        "portfolio": 300,
+        "transactions": 60,
+        "transaction_details": None,
+        "app_transactions": 120,
+        "search": 600
+    }
+    DEFAULT_TTL = 300
+    DEFAULT_MAX_ENTRIES = 2048
+    
+    def __init__(self, max_entries: Optional[int] = None, ttls: Optional[Dict[str, Optional[float]]] = None,
+                 disk_path: Optional[Union[str, Path]] = None):
+        """Initialize the cache, optionally backed by a SQLite file at disk_path."""
+        self.max_entries = max_entries or int(os.getenv("ONCHAIN_CACHE_MAX_ENTRIES", self.DEFAULT_MAX_ENTRIES))
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "disk_hits": 0}
+        
+        self.disk_path = Path(disk_path) if disk_path else None
+        if self.disk_path:
+            self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                    "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+                )
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the disk backend for one unit of work."""
+        conn = sqlite3.connect(self.disk_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _expires_at(self, namespace: str) -> Optional[float]:
+        """Compute the expiry timestamp for a new entry in a namespace."""
+        ttl = self.ttls.get(namespace, self.DEFAULT_TTL)
+        return None if ttl is None else time.time() + ttl
+    
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return a cached value, or None when missing or expired."""
+        cache_key = (namespace, key)
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(cache_key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[cache_key]
+                self._counters["expirations"] += 1
+        
+        if self.disk_path:
+            value = self._disk_get(namespace, key, now)
+            if value is not None:
+                with self._lock:
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                return value
+        
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+    
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """Store a value under the namespace's TTL, evicting least recently used entries."""
+        expires_at = self._expires_at(namespace)
+        self._memory_set((namespace, key), value, expires_at)
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), expires_at)
+                )
+    
+    def _memory_set(self, cache_key: Tuple[str, str], value: Any, expires_at: Optional[float]) -> None:
+        """Insert an entry into the in-memory LRU."""
+        with self._lock:
+            self._entries[cache_key] = (value, expires_at)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+    
+    def _disk_get(self, namespace: str, key: str, now: float) -> Optional[Any]:
+        """Read an unexpired entry from the disk backend and promote it into memory."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+                with self._lock:
+                    self._counters["expirations"] += 1
+                return None
+        
+        value = json.loads(value)
+        self._memory_set((namespace, key), value, expires_at)
+        return value
+    
+    def invalidate(self, namespace: str, key: str) -> None:
+        """Remove a single entry from memory and disk."""
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+    
+    def clear(self) -> None:
+        """Remove every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["disk_backend"] = str(self.disk_path) if self.disk_path else None
+        return stats
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache.
+    
+    Set ONCHAIN_CACHE_DISK=1 to persist entries in ``data/response_cache.db``
+    so they survive across processes.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                disk_path = None
+                if os.getenv("ONCHAIN_CACHE_DISK", "").lower() in ("1", "true", "yes"):
+                    disk_path = get_data_dir() / "response_cache.db"
+                _default_cache = ResponseCache(disk_path=disk_path)
+    return _default_cache
@@ -0,0 +1,278 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import RiskReport
+from .price_store import PriceStore, DAY_SECONDS, PERIODS_PER_YEAR
+
+
+# A price series key: (chain ID, token address)
+SeriesKey = Tuple[int, str]
+
+# Benchmarks for relative returns and beta, priced through their wrapped tokens on Ethereum
+BENCHMARKS: Dict[str, SeriesKey] = {
+    "ETH": (1, "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"),
+    "BTC": (1, "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599")
+}
+
+# Days of daily closes used for volatility, correlation and Sharpe ratio
+WINDOW_DAYS = 90
+
+RETURN_PERIODS = (7, 30, 90)
+
+# Largest holdings shown in a report's correlation matrix
+CORRELATION_ASSETS = 10
+
+
+class Position(NamedTuple):
+    """One portfolio position. Positions without a series key count towards concentration only."""
+    label: str
+    value_usd: float
+    key: Optional[SeriesKey] = None
+
+
+def align_prices(series: Sequence[Tuple[np.ndarray, np.ndarray]],
+                 interval: int = DAY_SECONDS) -> Tuple[np.ndarray, np.ndarray]:
+    """Align price series on a common grid of interval-second bars.
+    
+    Returns the bar start timestamps and a (bars x assets) matrix holding the
+    last price of each bar, forward-filled over gaps and NaN before an asset's
+    first price.
+    """
+    bars = [np.asarray(timestamps, dtype=np.int64) // interval for timestamps, _ in series]
+    prices = [np.asarray(closes, dtype=np.float64) for _, closes in series]
+    if not bars or not any(b.size for b in bars):
+        return np.array([], dtype=np.int64), np.empty((0, len(bars)))
+    
+    all_bars = np.concatenate(bars)
+    all_prices = np.concatenate(prices)
+    assets = np.repeat(np.arange(len(bars)), [b.size for b in bars])
+    valid = all_prices > 0
+    all_bars, all_prices, assets = all_bars[valid], all_prices[valid], assets[valid]
+    
+    first_bar = all_bars.min()
+    grid = np.arange(first_bar, all_bars.max() + 1)
+    rows = all_bars - first_bar
+    
+    # Series are sorted by time and stored one after another, so the close of each
+    # (asset, bar) cell is the last tick before the cell changes
+    keep = np.flatnonzero(np.r_[(rows[1:] != rows[:-1]) | (assets[1:] != assets[:-1]), True])
+    
+    matrix = np.full((grid.size, len(bars)), np.nan)
+    matrix[rows[keep], assets[keep]] = all_prices[keep]
+    
+    # Forward fill: every cell takes the value of the last observed row at or above it
+    observed = np.where(np.isnan(matrix), 0, np.arange(grid.size)[:, None])
+    np.maximum.accumulate(observed, axis=0, out=observed)
+    return grid * interval, matrix[observed, np.arange(len(bars))]
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """Per-bar log returns of a (bars x assets) price matrix; NaN where either price is missing."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.diff(np.log(prices), axis=0)
+
+
+def pairwise_covariance(returns: np.ndarray, min_periods: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Covariance and correlation matrices over the rows where both assets have a return.
+    
+    Computed with matrix products, so thousands of assets cost one pass of
+    BLAS work instead of a Python loop over pairs. Pairs with fewer than
+    min_periods common returns are NaN.
+    """
+    observed = ~np.isnan(returns)
+    x = np.where(observed, returns, 0.0)
+    m = observed.astype(np.float64)
+    
+    n = m.T @ m
+    sum_x = x.T @ m            # sum_x[i, j]: sum of asset i's returns where j is also observed
+    sum_xx = (x * x).T @ m
+    sum_xy = x.T @ x
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (sum_xy - sum_x * sum_x.T / n) / (n - 1)
+        var = (sum_xx - sum_x ** 2 / n) / (n - 1)
+        corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+    
+    too_few = n < min_periods
+    cov[too_few] = np.nan
+    corr[too_few] = np.nan
+    return cov, corr
+
+
+def period_returns(timestamps: np.ndarray, prices: np.ndarray, days: int) -> np.ndarray:
+    """Percentage return of every asset over the last days of an aligned price matrix."""
+    if timestamps.size < 2:
+        return np.full(prices.shape[1], np.nan)
+    start = max(np.searchsorted(timestamps, timestamps[-1] - days * DAY_SECONDS, side="right") - 1, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (prices[-1] / prices[start] - 1) * 100
+
+
+def concentration(values: np.ndarray, groups: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """Herfindahl-Hirschman index, effective number of holdings and largest share per group of positions."""
+    values = np.clip(np.asarray(values, dtype=np.float64), 0, None)
+    totals = np.bincount(groups, weights=values, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.nan_to_num(values / totals[groups])
+    hhi = np.bincount(groups, weights=shares ** 2, minlength=n_groups)
+    top_share = np.zeros(n_groups)
+    np.maximum.at(top_share, groups, shares)
+    with np.errstate(divide="ignore"):
+        effective = np.where(hhi > 0, 1 / np.where(hhi > 0, hhi, 1), 0.0)
+    return {"total": totals, "hhi": hhi, "effective": effective, "top_share": top_share}
+
+
+def _weighted(weights: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Weighted average of per-asset values per wallet, renormalized over assets where the value is known."""
+    known = ~np.isnan(values)
+    covered = weights @ known
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(covered > 0, (weights @ np.where(known, values, 0.0)) / covered, np.nan)
+
+
+def _optional(value: float, digits: int = 4) -> Optional[float]:
+    """Round a float, mapping NaN and infinities to None."""
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def _optional_list(values: np.ndarray, digits: int = 2) -> list:
+    """Round an array into nested lists, mapping NaN and infinities to None."""
+    return np.where(np.isfinite(values), np.round(values, digits), None).tolist()
+
+
+def load_series(store: PriceStore, keys: Sequence[SeriesKey]) -> Dict[SeriesKey, Tuple[np.ndarray, np.ndarray]]:
+    """Load the stored (timestamps, closes) series of each key."""
+    series = {}
+    for key in dict.fromkeys(keys):
+        data = store.load(*key)
+        series[key] = (data["timestamp"], data["close"])
+    return series
+
+
+def portfolio_risk(wallets: Dict[str, List[Position]], series: Dict[SeriesKey, Tuple[np.ndarray, np.ndarray]],
+                   benchmarks: Optional[Dict[str, SeriesKey]] = None, risk_free_rate: float = 0.0,
+                   window_days: int = WINDOW_DAYS) -> Dict[str, RiskReport]:
+    """Compute risk reports for many wallets at once.
+    
+    Every asset held by any wallet is aligned into one daily price matrix, so
+    asset returns and volatilities are computed once and each wallet's
+    metrics are matrix products against them. Concentration counts every
+    position; volatility, Sharpe ratio, returns and beta use the positions
+    with a price series and report the share of value covered.
+    """
+    benchmarks = BENCHMARKS if benchmarks is None else benchmarks
+    names = list(wallets.keys())
+    
+    # One column per asset with a series, benchmarks included
+    held = [position.key for positions in wallets.values() for position in positions if position.key in series]
+    assets = list(dict.fromkeys(held + [key for key in benchmarks.values() if key in series]))
+    column = {key: i for i, key in enumerate(assets)}
+    
+    timestamps, prices = align_prices([series[key] for key in assets])
+    if timestamps.size:
+        start = np.searchsorted(timestamps, timestamps[-1] - window_days * DAY_SECONDS)
+        timestamps, prices = timestamps[start:], prices[start:]
+    returns = log_returns(prices)
+    observed = ~np.isnan(returns)
+    filled = np.where(observed, returns, 0.0)
+    counts = observed.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / counts
+        variance = (((filled - mean) * observed) ** 2).sum(axis=0) / (counts - 1)
+    usable = counts >= 3
+    asset_volatility = np.where(usable, np.sqrt(variance * PERIODS_PER_YEAR), np.nan)
+    returns_by_period = {f"{days}d": period_returns(timestamps, prices, days) for days in RETURN_PERIODS}
+    
+    # Flat position arrays: wallet row, asset column (-1 without a series) and USD value
+    positions = [position for wallet in names for position in wallets[wallet]]
+    groups = np.repeat(np.arange(len(names)), [len(wallets[wallet]) for wallet in names])
+    columns = np.array([column.get(position.key, -1) for position in positions], dtype=np.int64)
+    values = np.clip(np.array([position.value_usd for position in positions], dtype=np.float64), 0, None)
+    
+    # Concentration over every position of every wallet
+    concentration_stats = concentration(values, groups, len(names))
+    
+    # Wallet x asset matrix of USD values over the positions that have a series
+    weights = np.zeros((len(names), len(assets)))
+    priced = columns >= 0
+    np.add.at(weights, (groups[priced], columns[priced]), values[priced])
+    
+    # Each asset is labelled by the first position that holds it
+    labels = [""] * len(assets)
+    for position, col in zip(positions, columns.tolist()):
+        if col >= 0 and not labels[col]:
+            labels[col] = position.label
+    
+    # Daily return series of every wallet, weighted over assets with enough history. Taking the
+    # variance of this series equals w'Σw without building the full asset covariance matrix.
+    risk_weights = weights * usable
+    with np.errstate(invalid="ignore", divide="ignore"):
+        risk_weights = np.nan_to_num(risk_weights / risk_weights.sum(axis=1, keepdims=True))
+    has_risk = (risk_weights.sum(axis=1) > 0) & (returns.shape[0] >= 3)
+    wallet_series = filled @ risk_weights.T
+    if returns.shape[0] >= 3:
+        volatility = np.std(wallet_series, axis=0, ddof=1) * np.sqrt(PERIODS_PER_YEAR)
+        annual_return = wallet_series.mean(axis=0) * PERIODS_PER_YEAR
+    else:
+        volatility = annual_return = np.full(len(names), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(volatility > 0, (annual_return - risk_free_rate) / volatility, np.nan)
+    
+    wallet_returns = {period: _weighted(weights, values_) for period, values_ in returns_by_period.items()}
+    
+    # Beta against each benchmark over the days it has returns: cov(wallet, benchmark) / var(benchmark)
+    betas = {}
+    for name, key in benchmarks.items():
+        if key in column and counts[column[key]] >= 3:
+            rows = observed[:, column[key]]
+            benchmark = returns[rows, column[key]] - mean[column[key]]
+            wallet_rows = wallet_series[rows] - wallet_series[rows].mean(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                betas[name] = (benchmark @ wallet_rows) / (benchmark @ benchmark)
+    
+    benchmark_returns = {
+        name: {period: _optional(values_[column[key]], 2) for period, values_ in returns_by_period.items()}
+        for name, key in benchmarks.items() if key in column
+    }
+    
+    # Largest priced assets of each wallet, for the per-asset volatility and correlation matrix
+    top_count = min(CORRELATION_ASSETS, len(assets))
+    largest = np.argsort(-weights, axis=1, kind="stable")[:, :top_count]
+    top_by_wallet = [[col for col in largest[row].tolist() if weights[row, col] > 0] for row in range(len(names))]
+    
+    # Pairwise correlations are only needed between assets shown in some matrix
+    shown = np.unique(np.array([col for cols in top_by_wallet for col in cols], dtype=np.int64))
+    _, corr = pairwise_covariance(returns[:, shown])
+    
+    reports = {}
+    for row, wallet in enumerate(names):
+        total = concentration_stats["total"][row]
+        top_columns = top_by_wallet[row]
+        shown_index = np.searchsorted(shown, top_columns)
+        
+        # Labels made unique within the report
+        top_labels: List[str] = []
+        for col in top_columns:
+            label = labels[col]
+            top_labels.append(label if label not in top_labels else f"{label} ({assets[col][0]})")
+        
+        reports[wallet] = RiskReport(
+            address=wallet,
+            total_value_usd=round(float(total), 2),
+            positions=len(wallets[wallet]),
+            hhi=round(float(concentration_stats["hhi"][row]), 4),
+            effective_holdings=round(float(concentration_stats["effective"][row]), 2),
+            top_share=round(float(concentration_stats["top_share"][row]), 4),
+            priced_share=round(float(weights[row].sum() / total), 4) if total > 0 else 0.0,
+            volatility=_optional(volatility[row]) if has_risk[row] else None,
+            sharpe=_optional(sharpe[row], 2) if has_risk[row] else None,
+            returns={period: _optional(values_[row], 2) for period, values_ in wallet_returns.items()},
+            benchmark_returns=benchmark_returns,
+            beta={name: _optional(values_[row], 2) if has_risk[row] else None for name, values_ in betas.items()},
+            asset_volatility=dict(zip(top_labels, _optional_list(asset_volatility[top_columns], 4))),
+            correlation_labels=top_labels,
+            correlation=_optional_list(corr[shown_index][:, shown_index]),
+            days=int(returns.shape[0])
+        )
+    return reports
@@ -2,6 +2,8 @@ from typing import Type, Dict, Any, List, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .response_cache import get_response_cache
 
 
 class SearchToolInput(BaseModel):
@@ -23,9 +25,9 @@ class SearchTool(BaseTool):
     args_schema: Type[BaseModel] = SearchToolInput
     
     def __init__(self):
-        """Initialize the SearchTool with cache."""
+        """Initialize the SearchTool with the shared response cache."""
         super().__init__()
-        self._cache = {}
+        self._cache = get_response_cache()
     
     def _cache_key(self, query: str, entity_types: str, networks: Optional[str], limit: int) -> str:
         """Generate a cache key based on input parameters."""
@@ -34,10 +36,15 @@ class SearchTool(BaseTool):
     
     def _run(self, query: str, entity_types: str = "all", networks: Optional[str] = None, limit: int = 10) -> str:
         """Run the search with caching."""
+        return run_sync(self._arun(query, entity_types, networks, limit))
+    
+    async def _arun(self, query: str, entity_types: str = "all", networks: Optional[str] = None, limit: int = 10) -> str:
+        """Asynchronously run the search with caching."""
         # Check cache first
         cache_key = self._cache_key(query, entity_types, networks, limit)
-        if cache_key in self._cache:
-            return f"[CACHED] {self._cache[cache_key]}"
+        cached = self._cache.get("search", cache_key)
+        if cached is not None:
+            return f"[CACHED] {cached}"
         
         try:
             # Prepare entity types list
@@ -143,13 +150,13 @@ class SearchTool(BaseTool):
                 variables["input"]["chainIds"] = network_ids
             
             # Execute GraphQL query
-            result = ZapperBase.execute_graphql_query(query_str, variables)
+            result = await ZapperBase.aexecute_graphql_query(query_str, variables)
             
             # Format the response
             formatted_result = self._format_search_results(result, query)
             
             # Cache the result
-            self._cache[cache_key] = formatted_result
+            self._cache.set("search", cache_key, formatted_result)
             
             return formatted_result
             
@@ -0,0 +1,147 @@
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import weakref
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+
+class _Flight:
+    """One in-flight call and the callers waiting for it."""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared future when its leader was cancelled, so a follower runs the call instead."""
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so only one of them does the work.
+    
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for it and receive a deep copy of its result (or its error),
+    so nobody can mutate a result another caller is reading. Nothing is kept
+    once the call finishes; caching is the job of ResponseCache.
+    """
+    
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_followers: Dict[int, int] = {}
+        self._counters = {"calls": 0, "coalesced": 0}
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash JSON-serializable call arguments into a key."""
+        payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for the identical call already in flight in another thread."""
+        with self._lock:
+            self._counters["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+                self._counters["coalesced"] += 1
+        
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            flight.error = e
+            flight.event.set()
+            raise
+        
+        # Once the key is removed no new follower can join, so the count is final
+        with self._lock:
+            del self._flights[key]
+            followers = flight.followers
+        
+        # Followers get a snapshot taken before the leader's caller can modify the result
+        if followers:
+            flight.result = copy.deepcopy(result)
+        flight.event.set()
+        return result
+    
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() for key, or wait for the identical call already in flight on this event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._counters["calls"] += 1
+            flights = self._async_flights.setdefault(loop, {})
+            future = flights.get(key)
+            leader = future is None
+            if leader:
+                future = flights[key] = loop.create_future()
+            else:
+                self._async_followers[id(future)] = self._async_followers.get(id(future), 0) + 1
+                self._counters["coalesced"] += 1
+        
+        if not leader:
+            # Shielded so a cancelled follower does not cancel the shared call
+            try:
+                return copy.deepcopy(await asyncio.shield(future))
+            except _LeaderCancelled:
+                # The first follower to retry leads the call again and the others follow it
+                return await self.ado(key, fn)
+        
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                del flights[key]
+                followers = self._async_followers.pop(id(future), 0)
+            if not followers:
+                future.cancel()
+            elif isinstance(e, asyncio.CancelledError):
+                # Only the leader was cancelled; its followers still want the result
+                future.set_exception(_LeaderCancelled())
+            else:
+                future.set_exception(e)
+            raise
+        
+        with self._lock:
+            del flights[key]
+            followers = self._async_followers.pop(id(future), 0)
+        future.set_result(copy.deepcopy(result) if followers else None)
+        return result
+    
+    def stats(self) -> Dict[str, int]:
+        """Return the number of calls and how many of them were served by another call in flight."""
+        with self._lock:
+            return dict(self._counters)
+
+
+_default_single_flight: Optional[SingleFlight] = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group."""
+    global _default_single_flight
+    if _default_single_flight is None:
+        with _default_single_flight_lock:
+            if _default_single_flight is None:
+                _default_single_flight = SingleFlight()
+    return _default_single_flight
@@ -1,7 +1,12 @@
-from typing import Type, Dict, Any, List
+import asyncio
+from typing import Type, Dict, Any, List, ClassVar, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .response_cache import get_response_cache
+from .price_store import get_price_store, PriceStore
+from .models import PriceMetrics
 
 
 class TokenPriceToolInput(BaseModel):
@@ -22,16 +27,71 @@ class TokenPriceTool(BaseTool):
     )
     args_schema: Type[BaseModel] = TokenPriceToolInput
     
+    # fungibleTokenV2 selection set; expects $currency and $timeFrame variables
+    TOKEN_FIELDS: ClassVar[str] = '''
+                # Basic token information
+                address
+                symbol
+                name
+                decimals
+                imageUrlV2
+                
+                # Market data and pricing information
+                priceData {
+                  marketCap
+                  price
+                  priceChange5m
+                  priceChange1h
+                  priceChange24h
+                  volume24h
+                  totalGasTokenLiquidity
+                  totalLiquidity
+                  
+                  # Historical price data for charts
+                  priceTicks(currency: $currency, timeFrame: $timeFrame) {
+                    open
+                    median
+                    close
+                    timestamp
+                  }
+                }
+    '''
+    
+    # Price ticks only, used to fill gaps in the local price history; expects $currency and $timeFrame
+    PRICE_TICK_FIELDS: ClassVar[str] = '''
+                priceData {
+                  priceTicks(currency: $currency, timeFrame: $timeFrame) {
+                    open
+                    median
+                    close
+                    timestamp
+                  }
+                }
+    '''
+    
+    PRICE_TICKS_QUERY: ClassVar[str] = f'''
+    query TokenPriceTicks($address: Address!, $chainId: Int!, $currency: Currency!, $timeFrame: TimeFrame!) {{
+      fungibleTokenV2(address: $address, chainId: $chainId) {{
+    {PRICE_TICK_FIELDS}
+      }}
+    }}
+    '''
+    
+    # Days of history kept locally for the return, volatility and Sharpe metrics
+    HISTORY_DAYS: ClassVar[int] = max(PriceStore.RETURN_PERIODS)
+    
     def __init__(self):
-        """Initialize the TokenPriceTool with cache."""
+        """Initialize the TokenPriceTool with the shared response cache and price store."""
         super().__init__()
-        self._cache = {}
+        self._cache = get_response_cache()
+        self._store = get_price_store()
     
     def _cache_key(self, token_address: str, network: str, days: int) -> str:
         """Generate a cache key based on input parameters."""
         return f"{token_address.lower()}:{network.lower()}:{days}"
     
-    def _map_days_to_timeframe(self, days: int) -> str:
+    @staticmethod
+    def map_days_to_timeframe(days: int) -> str:
         """Maps number of days to the appropriate TimeFrame enum value."""
         if days <= 1:
             return "HOUR"
@@ -46,50 +106,30 @@ class TokenPriceTool(BaseTool):
     
     def _run(self, token_address: str, network: str = "ethereum", days: int = 30, currency: str = "USD") -> str:
         """Run the token price data retrieval with caching."""
+        return run_sync(self._arun(token_address, network, days, currency))
+    
+    async def _arun(self, token_address: str, network: str = "ethereum", days: int = 30, currency: str = "USD") -> str:
+        """Asynchronously run the token price data retrieval with caching."""
         # Check cache first
         cache_key = self._cache_key(token_address, network, days)
-        if cache_key in self._cache:
-            return f"[CACHED] {self._cache[cache_key]}"
+        cached = self._cache.get("price", cache_key)
+        if cached is not None:
+            return f"[CACHED] {cached}"
         
         try:
             # Convert network name to chain ID
             chain_id = ZapperBase.get_chain_id(network)
             
             # Map days to appropriate timeframe
-            time_frame = self._map_days_to_timeframe(days)
+            time_frame = self.map_days_to_timeframe(days)
             
             # Create GraphQL query for fungibleTokenV2
-            query = '''
-            query TokenPriceData($address: Address!, $chainId: Int!, $currency: Currency!, $timeFrame: TimeFrame!) {
-              fungibleTokenV2(address: $address, chainId: $chainId) {
-                # Basic token information
-                address
-                symbol
-                name
-                decimals
-                imageUrlV2
-                
-                # Market data and pricing information
-                priceData {
-                  marketCap
-                  price
-                  priceChange5m
-                  priceChange1h
-                  priceChange24h
-                  volume24h
-                  totalGasTokenLiquidity
-                  totalLiquidity
-                  
-                  # Historical price data for charts
-                  priceTicks(currency: $currency, timeFrame: $timeFrame) {
-                    open
-                    median
-                    close
-                    timestamp
-                  }
-                }
-              }
-            }
+            query = f'''
+            query TokenPriceData($address: Address!, $chainId: Int!, $currency: Currency!, $timeFrame: TimeFrame!) {{
+              fungibleTokenV2(address: $address, chainId: $chainId) {{
+            {self.TOKEN_FIELDS}
+              }}
+            }}
             '''
             
             # Prepare variables
@@ -100,22 +140,60 @@ class TokenPriceTool(BaseTool):
                 "timeFrame": time_frame
             }
             
-            # Execute GraphQL query
-            result = ZapperBase.execute_graphql_query(query, variables)
-            
-            # Format the response
-            formatted_result = self._format_price_data(result, token_address)
-            
-            # Cache the result
-            self._cache[cache_key] = formatted_result
+            # Only the part of the history not yet stored locally is fetched, alongside the current price
+            history_frame = await asyncio.to_thread(
+                self._store.missing_timeframe, chain_id, token_address, self.HISTORY_DAYS
+            )
+            result, _ = await asyncio.gather(
+                ZapperBase.aexecute_graphql_query(query, variables),
+                self._afetch_history(chain_id, token_address, history_frame)
+            )
             
-            return formatted_result
+            # Store, format and cache the response off the event loop
+            return await asyncio.to_thread(self.cache_result, result, chain_id, token_address, network, days, currency)
             
         except Exception as e:
             error_details = f"Error type: {type(e).__name__}, Error message: {str(e)}"
             return f"Error fetching token price data: {error_details}"
     
-    def _format_price_data(self, data: Dict[str, Any], token_address: str) -> str:
+    async def _afetch_history(self, chain_id: int, token_address: str, time_frame: Optional[str]) -> None:
+        """Fetch USD price ticks for a TimeFrame window into the price store."""
+        if time_frame is None:
+            return
+        try:
+            result = await ZapperBase.aexecute_graphql_query(
+                self.PRICE_TICKS_QUERY,
+                {"address": token_address, "chainId": chain_id, "currency": "USD", "timeFrame": time_frame}
+            )
+        except Exception:
+            # Metrics then cover whatever history is already stored
+            return
+        await asyncio.to_thread(self.store_ticks, result, chain_id, token_address, time_frame)
+    
+    def cache_result(self, data: Dict[str, Any], chain_id: int, token_address: str, network: str,
+                     days: int, currency: str = "USD") -> str:
+        """Store the USD ticks of a fungibleTokenV2 response, then format and cache it as a tool call would."""
+        # Metrics are computed from the local history, which holds USD prices
+        metrics = None
+        if currency.upper() == "USD":
+            self.store_ticks(data, chain_id, token_address, self.map_days_to_timeframe(days))
+            metrics = self._store.metrics(chain_id, token_address)
+        
+        formatted_result = self._format_price_data(data, token_address, metrics)
+        self._cache.set("price", self._cache_key(token_address, network, days), formatted_result)
+        return formatted_result
+    
+    def store_ticks(self, data: Dict[str, Any], chain_id: int, token_address: str, time_frame: str) -> bool:
+        """Store the USD price ticks of a fungibleTokenV2 response. Returns whether it had any."""
+        token_data = ((data or {}).get("data") or {}).get("fungibleTokenV2")
+        price_ticks = ((token_data or {}).get("priceData") or {}).get("priceTicks")
+        if not price_ticks:
+            return False
+        self._store.add_ticks(chain_id, token_address, price_ticks, time_frame)
+        return True
+    
+    def _format_price_data(self, data: Dict[str, Any], token_address: str,
+                           metrics: Optional[PriceMetrics] = None) -> str:
         """Format token price data into a readable string."""
         if not data or "data" not in data or "fungibleTokenV2" not in data["data"]:
             return f"No price data found for token {token_address}."
@@ -172,4 +250,7 @@ class TokenPriceTool(BaseTool):
             f"Trend: {price_trend}"
         ]
         
+        if metrics is not None:
+            summary.extend(metrics.render_lines())
+        
         return "\n".join(summary)
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterator, Union
+from .data_dir import get_data_dir
+
+
+def normalize_timestamp(timestamp: Optional[Union[int, float, str]]) -> Optional[float]:
+    """Convert a Unix timestamp in seconds or milliseconds to seconds."""
+    if timestamp is None or timestamp == "":
+        return None
+    try:
+        value = float(timestamp)
+    except (TypeError, ValueError):
+        return None
+    # Anything past the year 33658 in seconds is really milliseconds
+    if value > 1e12:
+        value /= 1000
+    return value
+
+
+class TransactionArchive:
+    """Immutable on-disk archive of finalized transaction details keyed by (chainId, hash).
+    
+    Mined transactions never change once their block is final, so entries are
+    written once and never expire. Hashes are stored as raw bytes and payloads
+    as zlib-compressed JSON in a clustered WITHOUT ROWID table, which keeps the
+    file compact and lookups a single B-tree seek even with millions of rows.
+    """
+    
+    DEFAULT_FILENAME = "transaction_archive.db"
+    
+    # Blocks older than this are treated as final on every supported network
+    FINALITY_SECONDS = 15 * 60
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS transactions (
+        chain_id INTEGER NOT NULL,
+        hash BLOB NOT NULL,
+        payload BLOB NOT NULL,
+        PRIMARY KEY (chain_id, hash)
+    ) WITHOUT ROWID;
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """Initialize the archive, creating the database file and schema if needed."""
+        self.path = Path(path) if path else get_data_dir() / self.DEFAULT_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one unit of work, committing on success and always closing it."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _hash_key(transaction_hash: str) -> bytes:
+        """Encode a transaction hash as raw bytes, falling back to UTF-8 for non-hex hashes."""
+        value = transaction_hash.strip().lower()
+        try:
+            return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+        except ValueError:
+            return value.encode("utf-8")
+    
+    def is_final(self, transaction: Dict[str, Any]) -> bool:
+        """Check whether a transactionV2 payload is mined and old enough to never change."""
+        if not transaction or not transaction.get("blockNumber"):
+            return False
+        timestamp = normalize_timestamp(transaction.get("timestamp"))
+        return timestamp is not None and time.time() - timestamp >= self.FINALITY_SECONDS
+    
+    def get(self, chain_id: int, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the archived transactionV2 payload, or None if it has not been seen."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload FROM transactions WHERE chain_id = ? AND hash = ?",
+                (chain_id, self._hash_key(transaction_hash))
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+    
+    def put(self, chain_id: int, transaction_hash: str, transaction: Dict[str, Any]) -> bool:
+        """Archive a transaction if it is final. Returns True when it was stored."""
+        if not self.is_final(transaction):
+            return False
+        payload = zlib.compress(json.dumps(transaction, separators=(",", ":")).encode("utf-8"), 6)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO transactions (chain_id, hash, payload) VALUES (?, ?, ?)",
+                (chain_id, self._hash_key(transaction_hash), payload)
+            )
+        return True
+    
+    def count(self) -> int:
+        """Return the number of archived transactions."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+
+_default_archive: Optional[TransactionArchive] = None
+_default_archive_lock = threading.Lock()
+
+
+def get_transaction_archive() -> TransactionArchive:
+    """Return the process-wide transaction archive."""
+    global _default_archive
+    if _default_archive is None:
+        with _default_archive_lock:
+            if _default_archive is None:
+                _default_archive = TransactionArchive()
+    return _default_archive
@@ -1,7 +1,11 @@
-from typing import Type, Dict, Any, List, Optional
+import asyncio
+from typing import Type, Dict, Any, List, Optional, ClassVar
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from .zapper_base import ZapperBase
+from .http_session import run_sync
+from .response_cache import get_response_cache
+from .transaction_archive import get_transaction_archive, normalize_timestamp
 from datetime import datetime
 
 
@@ -21,10 +25,58 @@ class TransactionDetailsTool(BaseTool):
     )
     args_schema: Type[BaseModel] = TransactionDetailsToolInput
     
+    # Fields selected on transactionV2, shared with the batch lookup
+    TRANSACTION_FIELDS: ClassVar[str] = '''
+    # Basic transaction information
+    hash
+    status
+    blockNumber
+    timestamp
+    nonce
+    gasUsed
+    gasPrice
+    maxFeePerGas
+    maxPriorityFeePerGas
+    from {
+      address
+    }
+    to {
+      address
+    }
+    
+    # Transaction fee
+    fee {
+      value
+      currency
+    }
+    
+    # Human-readable description
+    processedData {
+      description
+      actionCategory
+    }
+    
+    # Token transfers
+    transfers {
+      from
+      to
+      type
+      token {
+        address
+        name
+        symbol
+        decimals
+      }
+      value
+      valueUSD
+    }
+    '''
+    
     def __init__(self):
-        """Initialize the TransactionDetailsTool with cache."""
+        """Initialize the TransactionDetailsTool with the shared response cache and archive."""
         super().__init__()
-        self._cache = {}
+        self._cache = get_response_cache()
+        self._archive = get_transaction_archive()
     
     def _cache_key(self, transaction_hash: str, network: str) -> str:
         """Generate a cache key based on input parameters."""
@@ -32,64 +84,32 @@ class TransactionDetailsTool(BaseTool):
     
     def _run(self, transaction_hash: str, network: str = "ethereum") -> str:
         """Run the transaction details retrieval with caching."""
+        return run_sync(self._arun(transaction_hash, network))
+    
+    async def _arun(self, transaction_hash: str, network: str = "ethereum") -> str:
+        """Asynchronously run the transaction details retrieval with caching."""
         # Check cache first
         cache_key = self._cache_key(transaction_hash, network)
-        if cache_key in self._cache:
-            return f"[CACHED] {self._cache[cache_key]}"
+        cached = self._cache.get("transaction_details", cache_key)
+        if cached is not None:
+            return f"[CACHED] {cached}"
         
         try:
             # Convert network name to chain ID
             chain_id = ZapperBase.get_chain_id(network)
             
+            # Finalized transactions never change, so the archive answers without a network call
+            archived = await asyncio.to_thread(self._lookup_archive, chain_id, transaction_hash, network)
+            if archived is not None:
+                return f"[CACHED] {archived}"
+            
             # Create GraphQL query for transactionV2
-            query = '''
-            query TransactionDetails($hash: String!, $chainId: Int!) {
-              transactionV2(hash: $hash, chainId: $chainId) {
-                # Basic transaction information
-                hash
-                status
-                blockNumber
-                timestamp
-                nonce
-                gasUsed
-                gasPrice
-                maxFeePerGas
-                maxPriorityFeePerGas
-                from {
-                  address
-                }
-                to {
-                  address
-                }
-                
-                # Transaction fee
-                fee {
-                  value
-                  currency
-                }
-                
-                # Human-readable description
-                processedData {
-                  description
-                  actionCategory
-                }
-                
-                # Token transfers
-                transfers {
-                  from
-                  to
-                  type
-                  token {
-                    address
-                    name
-                    symbol
-                    decimals
-                  }
-                  value
-                  valueUSD
-                }
-              }
-            }
+            query = f'''
+            query TransactionDetails($hash: String!, $chainId: Int!) {{
+              transactionV2(hash: $hash, chainId: $chainId) {{
+                {self.TRANSACTION_FIELDS}
+              }}
+            }}
             '''
             
             # Prepare variables
@@ -99,31 +119,57 @@ class TransactionDetailsTool(BaseTool):
             }
             
             # Execute GraphQL query
-            result = ZapperBase.execute_graphql_query(query, variables)
+            result = await ZapperBase.aexecute_graphql_query(query, variables)
             
             # Format the response
-            formatted_result = self._format_transaction_details(result, transaction_hash, network)
+            formatted_result = self.format_transaction_details(result, transaction_hash, network)
             
-            # Cache the result
-            self._cache[cache_key] = formatted_result
+            # Cache and archive the result
+            tx_data = (result.get("data") or {}).get("transactionV2") or {}
+            await asyncio.to_thread(self.store_result, chain_id, transaction_hash, network, tx_data, formatted_result)
             
             return formatted_result
             
         except Exception as e:
             return f"Error fetching transaction details: {str(e)}"
     
+    def lookup(self, chain_id: int, transaction_hash: str, network: str) -> Optional[str]:
+        """Return the cached or archived details of a transaction, or None if they still need fetching."""
+        cached = self._cache.get("transaction_details", self._cache_key(transaction_hash, network))
+        if cached is not None:
+            return cached
+        return self._lookup_archive(chain_id, transaction_hash, network)
+    
+    def _lookup_archive(self, chain_id: int, transaction_hash: str, network: str) -> Optional[str]:
+        """Format an archived transaction and promote it into the response cache, if archived."""
+        archived = self._archive.get(chain_id, transaction_hash)
+        if archived is None:
+            return None
+        formatted_result = self.format_transaction_details(
+            {"data": {"transactionV2": archived}}, transaction_hash, network
+        )
+        self._cache.set("transaction_details", self._cache_key(transaction_hash, network), formatted_result)
+        return formatted_result
+    
+    def store_result(self, chain_id: int, transaction_hash: str, network: str,
+                      tx_data: Dict[str, Any], formatted_result: str) -> None:
+        """Cache a result once the transaction is mined, and archive it for good once final."""
+        if tx_data.get("blockNumber"):
+            self._cache.set("transaction_details", self._cache_key(transaction_hash, network), formatted_result)
+            self._archive.put(chain_id, transaction_hash, tx_data)
+    
     def _format_timestamp(self, timestamp: Optional[int]) -> str:
         """Format a Unix timestamp to a human-readable date and time."""
         if not timestamp:
             return "Unknown time"
         
         try:
-            dt = datetime.fromtimestamp(timestamp)
+            dt = datetime.fromtimestamp(normalize_timestamp(timestamp))
             return dt.strftime('%Y-%m-%d %H:%M:%S')
         except Exception:
             return "Invalid timestamp"
     
-    def _format_transaction_details(self, data: Dict[str, Any], transaction_hash: str, network: str) -> str:
+    def format_transaction_details(self, data: Dict[str, Any], transaction_hash: str, network: str) -> str:
         """Format transaction details into a readable string."""
         if not data or "data" not in data or "transactionV2" not in data["data"] or not data["data"]["transactionV2"]:
             return f"No details found for transaction {transaction_hash} on {network}."
@@ -0,0 +1,245 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterable, Iterator, Union, Callable
+
+import numpy as np
+
+from .data_dir import get_data_dir
+
+
+class TransactionStore:
+    """SQLite store of wallet transactions keyed by (address, chain).
+    
+    Besides the transactions themselves it records per wallet and chain the
+    highest synced block, so later syncs only fetch newer transactions, and
+    the block or date bound the stored history starts from, so a request for
+    older history syncs again from its own bounds.
+    Every operation opens its own short-lived connection, which keeps the
+    store safe to share between threads and the async I/O loop.
+    """
+    
+    DEFAULT_FILENAME = "transactions.db"
+    
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS transactions (
+        address TEXT NOT NULL,
+        chain TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        block_number INTEGER,
+        block_timestamp TEXT,
+        gas_used INTEGER,
+        value TEXT,
+        tx_type TEXT,
+        PRIMARY KEY (address, chain, hash)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_transactions_block
+        ON transactions (address, chain, block_number);
+    CREATE TABLE IF NOT EXISTS sync_state (
+        address TEXT NOT NULL,
+        chain TEXT NOT NULL,
+        last_block INTEGER,
+        synced_at TEXT NOT NULL,
+        complete INTEGER NOT NULL DEFAULT 0,
+        from_block INTEGER,
+        from_date TEXT,
+        PRIMARY KEY (address, chain)
+    );
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """Initialize the store, creating the database file and schema if needed."""
+        self.path = Path(path) if path else get_data_dir() / self.DEFAULT_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one unit of work, committing on success and always closing it."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def get_sync_state(self, address: str, chain: str) -> Optional[Dict[str, Any]]:
+        """Return the sync state of an address, or None if it was never synced.
+        
+        The state holds the last synced block, the sync time, whether that sync
+        reached the chain head and the block and date bounds the stored
+        history starts from.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_block, synced_at, complete, from_block, from_date FROM sync_state "
+                "WHERE address = ? AND chain = ?",
+                (address.lower(), chain)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "last_block": row["last_block"],
+            "synced_at": datetime.fromisoformat(row["synced_at"]),
+            "complete": bool(row["complete"]),
+            "from_block": row["from_block"],
+            "from_date": row["from_date"]
+        }
+    
+    @staticmethod
+    def covers(state: Dict[str, Any], from_block: Optional[int] = None, from_date: Optional[str] = None) -> bool:
+        """Check whether the history a sync state starts from includes everything from the given bounds."""
+        if state["from_block"] is not None and (from_block is None or from_block < state["from_block"]):
+            return False
+        if state["from_date"] is not None and (not from_date or from_date < state["from_date"]):
+            return False
+        return True
+    
+    def reset_sync(self, address: str, chain: str, from_block: Optional[int] = None,
+                   from_date: Optional[str] = None) -> Dict[str, Any]:
+        """Restart the sync of an address from new bounds, keeping its stored transactions.
+        
+        The next sync fetches from the bounds up to the chain head; None
+        bounds sync the full history. Returns the new sync state.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (address, chain, last_block, synced_at, complete, from_block, "
+                "from_date) VALUES (?, ?, NULL, ?, 0, ?, ?)",
+                (address.lower(), chain, datetime.now(timezone.utc).isoformat(), from_block, from_date)
+            )
+        return self.get_sync_state(address, chain)
+    
+    def add_transactions(self, address: str, chain: str, transactions: Iterable[Dict[str, Any]],
+                         classify: Callable[[Dict[str, Any]], str], complete: bool = False) -> Optional[int]:
+        """Insert Moralis transactions and advance the sync state in one write.
+        
+        complete marks the batch as the last page up to the chain head; any
+        other page leaves the sync incomplete so the next sync resumes it.
+        Returns the highest block number seen in this batch, if any.
+        """
+        address = address.lower()
+        rows = []
+        max_block = None
+        for tx in transactions:
+            block_number = int(tx["block_number"]) if tx.get("block_number") else None
+            if block_number is not None and (max_block is None or block_number > max_block):
+                max_block = block_number
+            rows.append((
+                address,
+                chain,
+                tx.get("hash"),
+                block_number,
+                tx.get("block_timestamp"),
+                int(tx.get("receipt_gas_used") or 0),
+                str(tx.get("value") or "0"),
+                classify(tx)
+            ))
+        
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO transactions "
+                "(address, chain, hash, block_number, block_timestamp, gas_used, value, tx_type) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._mark_synced(conn, address, chain, max_block, complete)
+        
+        return max_block
+    
+    def mark_synced(self, address: str, chain: str, last_block: Optional[int] = None, complete: bool = True) -> None:
+        """Record a sync, keeping the highest block seen so far."""
+        with self._connect() as conn:
+            self._mark_synced(conn, address.lower(), chain, last_block, complete)
+    
+    @staticmethod
+    def _mark_synced(conn: sqlite3.Connection, address: str, chain: str, last_block: Optional[int],
+                     complete: bool) -> None:
+        """Upsert the sync state row within an open transaction."""
+        conn.execute(
+            "INSERT INTO sync_state (address, chain, last_block, synced_at, complete) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (address, chain) DO UPDATE SET "
+            "last_block = MAX(COALESCE(sync_state.last_block, excluded.last_block), "
+            "COALESCE(excluded.last_block, sync_state.last_block)), "
+            "synced_at = excluded.synced_at, complete = excluded.complete",
+            (address, chain, last_block, datetime.now(timezone.utc).isoformat(), int(complete))
+        )
+    
+    def iter_transactions(self, address: str, chain: str, from_block: Optional[int] = None,
+                          from_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream stored transactions newest first, in the shape of Moralis results."""
+        query = (
+            "SELECT hash, block_number, block_timestamp, gas_used, value, tx_type "
+            "FROM transactions WHERE address = ? AND chain = ?"
+        )
+        params: list = [address.lower(), chain]
+        if from_block is not None:
+            query += " AND block_number >= ?"
+            params.append(from_block)
+        if from_date:
+            query += " AND block_timestamp >= ?"
+            params.append(from_date)
+        query += " ORDER BY block_number DESC"
+        
+        with self._connect() as conn:
+            for row in conn.execute(query, params):
+                yield {
+                    "hash": row["hash"],
+                    "block_number": row["block_number"],
+                    "block_timestamp": row["block_timestamp"],
+                    "receipt_gas_used": row["gas_used"],
+                    "value": row["value"],
+                    "tx_type": row["tx_type"]
+                }
+    
+    def type_counts(self, address: str, chain: str) -> Dict[str, int]:
+        """Count stored transactions of an address per transaction type."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT COALESCE(tx_type, 'other'), COUNT(*) FROM transactions "
+                "WHERE address = ? AND chain = ? GROUP BY 1",
+                (address.lower(), chain)
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+    
+    def gas_arrays(self, address: str, chain: str, from_block: Optional[int] = None,
+                   from_date: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Load the gas used, block time (Unix seconds) and block number of stored transactions as NumPy columns."""
+        query = (
+            "SELECT COALESCE(gas_used, 0), COALESCE(CAST(strftime('%s', block_timestamp) AS INTEGER), 0), "
+            "COALESCE(block_number, 0) "
+            "FROM transactions WHERE address = ? AND chain = ?"
+        )
+        params: list = [address.lower(), chain]
+        if from_block is not None:
+            query += " AND block_number >= ?"
+            params.append(from_block)
+        if from_date:
+            query += " AND block_timestamp >= ?"
+            params.append(from_date)
+        
+        with self._connect() as conn:
+            # Plain tuples convert to an array much faster than Row objects
+            conn.row_factory = None
+            rows = conn.execute(query, params).fetchall()
+        columns = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        return {"gas_used": columns[:, 0], "timestamp": columns[:, 1], "block_number": columns[:, 2]}
+
+
+_default_store: Optional[TransactionStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_transaction_store() -> TransactionStore:
+    """Return the process-wide transaction store."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = TransactionStore()
+    return _default_store
@@ -1,7 +1,10 @@
 import os
+import httpx
 import requests
 import json
 from typing import Dict, Any, Optional, Union, List
+from .http_session import get_http_pool, get_async_http_pool, get_pool_stats
+from .single_flight import SingleFlight, get_single_flight
 
 class ZapperBase:
     """Base class for Zapper API tools with common functionality."""
@@ -40,8 +43,13 @@ class ZapperBase:
         raise ValueError(f"Unknown network: {network}. Supported networks: {', '.join(ZapperBase.NETWORK_IDS.keys())}")
     
     @staticmethod
-    def execute_graphql_query(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Execute a GraphQL query against the Zapper API."""
+    def get_pool_stats() -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Return connection reuse statistics for the shared sync and async session pools."""
+        return get_pool_stats()
+
+    @staticmethod
+    def _graphql_request_args(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build the headers and JSON payload for a GraphQL request."""
         api_key = ZapperBase.get_api_key()
         
         headers = {
@@ -55,20 +63,62 @@ class ZapperBase:
             "variables": variables or {}
         }
         
-        try:
-            response = requests.post(ZapperBase.GRAPHQL_API_URL, headers=headers, json=payload)
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = f"API request failed: {str(e)}"
-            if hasattr(e, "response") and e.response is not None:
-                try:
-                    error_details = e.response.json()
-                    error_msg += f". Details: {json.dumps(error_details)}"
-                except:
-                    error_msg += f". Status code: {e.response.status_code}"
-            raise RuntimeError(error_msg)
+        return {"headers": headers, "json": payload}
+    
+    @staticmethod
+    def _request_error_message(e: Exception) -> str:
+        """Build a readable error message from a failed request, including API error details."""
+        error_msg = f"API request failed: {str(e)}"
+        response = getattr(e, "response", None)
+        if response is not None:
+            try:
+                error_details = response.json()
+                error_msg += f". Details: {json.dumps(error_details)}"
+            except:
+                error_msg += f". Status code: {response.status_code}"
+        return error_msg
+    
+    @staticmethod
+    def _single_flight_key(query: str, variables: Dict[str, Any] = None) -> str:
+        """Key identical GraphQL requests so concurrent duplicates share one request."""
+        return SingleFlight.make_key(ZapperBase.GRAPHQL_API_URL, query, variables or {})
+    
+    @staticmethod
+    def execute_graphql_query(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Execute a GraphQL query against the Zapper API, sharing one request among identical concurrent calls."""
+        request_args = ZapperBase._graphql_request_args(query, variables)
+        
+        def post() -> Dict[str, Any]:
+            try:
+                response = get_http_pool().post(ZapperBase.GRAPHQL_API_URL, **request_args)
+                response.raise_for_status()
+                return response.json()
+                
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(ZapperBase._request_error_message(e))
+        
+        return get_single_flight().do(ZapperBase._single_flight_key(query, variables), post)
+    
+    @staticmethod
+    async def aexecute_graphql_query(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Execute a GraphQL query against the Zapper API without blocking the event loop.
+        
+        Identical queries already in flight on the same event loop are awaited
+        instead of being sent again.
+        """
+        request_args = ZapperBase._graphql_request_args(query, variables)
+        
+        async def post() -> Dict[str, Any]:
+            try:
+                response = await get_async_http_pool().post(ZapperBase.GRAPHQL_API_URL, **request_args)
+                response.raise_for_status()
+                return response.json()
+                
+            # Invalid JSON bodies surface as ValueError here, where requests wraps them in a RequestException
+            except (httpx.HTTPError, ValueError) as e:
+                raise RuntimeError(ZapperBase._request_error_message(e))
+        
+        return await get_single_flight().ado(ZapperBase._single_flight_key(query, variables), post)
     
     @staticmethod
     def make_request(url: str, method: str = "POST", params: Optional[Dict[str, Any]] = None, 
@@ -90,10 +140,10 @@ class ZapperBase:
         
         try:
             if method.upper() == "GET":
-                response = requests.get(url, headers=headers, params=params)
+                response = get_http_pool().get(url, headers=headers, params=params)
             elif method.upper() == "POST":
                 headers["content-type"] = "application/json"
-                response = requests.post(url, headers=headers, json=data)
+                response = get_http_pool().post(url, headers=headers, json=data)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -101,11 +151,4 @@ class ZapperBase:
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            error_msg = f"API request failed: {str(e)}"
-            if hasattr(e, "response") and e.response is not None:
-                try:
-                    error_details = e.response.json()
-                    error_msg += f". Details: {json.dumps(error_details)}"
-                except:
-                    error_msg += f". Status code: {e.response.status_code}"
-            raise RuntimeError(error_msg)
+            raise RuntimeError(ZapperBase._request_error_message(e))
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Keep every local store of a test in its own temporary data directory."""
+    monkeypatch.setenv("ONCHAIN_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.delenv("ONCHAIN_RATE_LIMITS", raising=False)
+    return tmp_path / "data"
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from onchain_agent.tools.carbon_engine import CarbonEngine
+from onchain_agent.tools.carbon_factors import CarbonFactorRegistry
+
+PRE_MERGE, POST_MERGE = 1600000000, 1700000000
+
+
+@pytest.fixture
+def engine():
+    return CarbonEngine(CarbonFactorRegistry(CarbonFactorRegistry.CANDIDATE_PATHS[0]))
+
+
+def test_wallets_are_grouped_case_insensitively(engine):
+    result = engine.compute_batch({
+        "wallet": ["0xA", "0xa", "0xb", "0xb"],
+        "network": ["ethereum", "eth", "polygon", "Ethereum"],
+        "gas": [21000, 21000, 21000, 21000],
+        "timestamp": [PRE_MERGE, POST_MERGE, None, np.nan]
+    })
+    
+    assert list(result.wallets) == ["0xa", "0xb"]
+    assert result.networks == ["ethereum", "polygon"]
+    np.testing.assert_array_equal(result.transactions, [2, 2])
+    np.testing.assert_array_equal(result.gas_used, [42000, 42000])
+    np.testing.assert_array_equal(result.network_transactions, [[2, 0], [1, 1]])
+    
+    # Undated rows fall in the latest (proof of stake) period
+    np.testing.assert_allclose(result.co2_kg, [0.83265 + 9.996e-05, 9.996e-05 + 21000 * 8.57e-09 * 0.5])
+
+
+def test_batch_matches_per_wallet_computation(engine):
+    rng = np.random.default_rng(7)
+    size = 5000
+    batch = {
+        "wallet": rng.choice(["0x1", "0x2", "0x3"], size),
+        "network": rng.choice(["ethereum", "polygon", "base"], size),
+        "gas": rng.integers(21000, 300000, size),
+        "timestamp": rng.integers(PRE_MERGE - 10**7, POST_MERGE, size)
+    }
+    result = engine.compute_batch(batch)
+    
+    for wallet in ["0x1", "0x2", "0x3"]:
+        rows = batch["wallet"] == wallet
+        activity = {
+            network: {
+                "gas_used": batch["gas"][rows & (batch["network"] == network)],
+                "timestamp": batch["timestamp"][rows & (batch["network"] == network)]
+            }
+            for network in ["ethereum", "polygon", "base"]
+        }
+        report = result.report(wallet)
+        expected = {e.network: e.co2_kg for e in engine.compute(activity)}
+        assert report.total_co2_kg == pytest.approx(sum(expected.values()))
+        assert {n.network: n.co2_kg for n in report.networks} == pytest.approx(expected)
+    
+    assert result.totals["transactions"] == size
+    assert result.totals["co2_kg"] == pytest.approx(result.co2_kg.sum())
+
+
+def test_rows_without_gas_use_per_transaction_factors(engine):
+    result = engine.compute_batch({
+        "wallet": ["0xa", "0xa", "0xb"],
+        "network": ["polygon", "polygon", "unknown_chain"],
+        "tx_type": ["swap", "simple_transfer", "nft_mint"]
+    })
+    
+    np.testing.assert_allclose(result.co2_kg, [0.00009 * 1.5 + 0.00009, 0.0001 * 2.5])
+    np.testing.assert_allclose(result.energy_kwh, [0.00018 * 2.5, 0.0002 * 2.5])
+    assert result.networks == ["polygon", "unknown_chain"]
+
+
+@pytest.mark.parametrize("timestamps", [
+    [PRE_MERGE * 1000, POST_MERGE * 1000],
+    [float(PRE_MERGE), float(POST_MERGE)],
+    np.array([PRE_MERGE, POST_MERGE], dtype="datetime64[s]"),
+    np.array([PRE_MERGE * 1000, POST_MERGE * 1000], dtype="datetime64[ms]")
+])
+def test_timestamp_formats(engine, timestamps):
+    result = engine.compute_batch({
+        "wallet": ["0xa", "0xb"], "network": ["ethereum", "ethereum"], "gas": [21000, 21000], "timestamp": timestamps
+    })
+    np.testing.assert_allclose(result.co2_kg, [0.83265, 9.996e-05])
+
+
+def test_invalid_columns_are_rejected(engine):
+    batch = {"wallet": ["0xa", "0xb"], "network": ["ethereum", "ethereum"], "gas": [21000, 21000]}
+    
+    with pytest.raises(ValueError, match="timestamp"):
+        engine.compute_batch({**batch, "timestamp": ["2022-01-01T00:00:00", "2023-01-01T00:00:00"]})
+    with pytest.raises(ValueError, match="has 1 rows, expected 2"):
+        engine.compute_batch({**batch, "block_number": [15537394]})
+    with pytest.raises(ValueError, match="gas"):
+        engine.compute_batch({**batch, "gas": ["21000 gas", "0x5208"]})
+
+
+@pytest.mark.parametrize("column, values", [
+    ("network", ["ethereum"]),
+    ("tx_type", ["swap"]),
+    ("tx_type", "swap"),
+    ("gas", [21000, 21000, 21000]),
+    ("timestamp", [PRE_MERGE]),
+    ("block_number", [])
+])
+def test_columns_must_have_one_value_per_row(engine, column, values):
+    batch = {"wallet": ["0xa", "0xb"], "network": ["ethereum", "ethereum"], "gas": [21000, 21000]}
+    
+    with pytest.raises(ValueError, match=f"Column '{column}' has {np.size(values)} rows, expected 2"):
+        engine.compute_batch({**batch, column: values})
+
+
+def test_missing_gas_uses_per_transaction_factors(engine):
+    result = engine.compute_batch({
+        "wallet": ["0xa", "0xb", "0xc"], "network": ["polygon"] * 3, "gas": [None, np.nan, 0], "tx_type": ["swap"] * 3
+    })
+    np.testing.assert_allclose(result.co2_kg, [0.00009 * 1.5] * 3)
+    np.testing.assert_array_equal(result.gas_used, [0, 0, 0])
+
+
+def test_empty_batch(engine):
+    result = engine.compute_batch({"wallet": [], "network": []})
+    
+    assert len(result) == 0
+    assert result.totals["co2_kg"] == 0.0
+    assert result.render_summary().startswith("Carbon batch: 0 wallets")
@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pytest
+
+from onchain_agent.tools.carbon_engine import CarbonEngine
+from onchain_agent.tools.carbon_factors import CarbonFactorRegistry
+
+CARBON_DATA = {
+    "networks": {
+        "alpha": {
+            "name": "Alpha Chain",
+            "co2_per_transaction_kg": 0.001,
+            "energy_per_transaction_kwh": 0.002,
+            "energy_per_gas_kwh": 1e-06,
+            "co2_per_kwh_kg": 0.4
+        },
+        "beta": {
+            "co2_per_transaction_kg": 0.0002,
+            "energy_per_transaction_kwh": 0.0004
+        }
+    },
+    "transaction_types": {"swap": {"multiplier": 1.5}}
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "carbon_data.json"
+    path.write_text(json.dumps(CARBON_DATA))
+    return CarbonEngine(CarbonFactorRegistry(path))
+
+
+def test_emissions_scale_with_gas_used(engine):
+    energy, co2 = engine.transaction_emissions("alpha", np.array([21000, 42000, 0]))
+    
+    np.testing.assert_allclose(energy, [0.021, 0.042, 0.0])
+    np.testing.assert_allclose(co2, [0.0084, 0.0168, 0.0])
+    assert engine.factors("Alpha Chain") == (1e-06, 0.4)
+
+
+def test_networks_without_gas_factors_derive_them_from_a_simple_transfer(engine):
+    energy, co2 = engine.transaction_emissions("beta", [21000, 105000])
+    
+    np.testing.assert_allclose(energy, [0.0004, 0.002])
+    np.testing.assert_allclose(co2, [0.0002, 0.001])
+
+
+def test_unknown_networks_use_the_default_factors(engine):
+    assert engine.network_key("Some New-Chain") == "some_new_chain"
+    _, co2 = engine.transaction_emissions("some new chain", [21000])
+    np.testing.assert_allclose(co2, [0.0001])
+
+
+def test_compute_totals_per_network(engine):
+    emissions = engine.compute({
+        "alpha": {"gas_used": np.array([21000, 21000, 58000])},
+        "beta": {"gas_used": np.array([21000])}
+    })
+    
+    assert [e.network for e in emissions] == ["alpha", "beta"]
+    alpha, beta = emissions
+    assert (alpha.transactions, alpha.gas_used, alpha.method) == (3, 100000, "gas")
+    assert alpha.energy_kwh == pytest.approx(0.1)
+    assert alpha.co2_kg == pytest.approx(0.04)
+    assert beta.co2_kg == pytest.approx(0.0002)
+    
+    # Without timestamps there is no monthly breakdown, and static factors have no periods
+    assert alpha.monthly_co2_kg == {}
+    assert alpha.period_co2_kg == {}
+
+
+def test_compute_breaks_emissions_down_by_month(engine):
+    jan, feb = 1704067200, 1706745600  # 2024-01-01, 2024-02-01 UTC
+    emissions = engine.compute({
+        "alpha": {"gas_used": np.array([10000, 20000, 30000]), "timestamp": np.array([jan, jan + 60, feb])}
+    })
+    
+    monthly = emissions[0].monthly_co2_kg
+    assert list(monthly) == ["2024-01", "2024-02"]
+    assert monthly["2024-01"] == pytest.approx(0.012)
+    assert monthly["2024-02"] == pytest.approx(0.012)
+    assert sum(monthly.values()) == pytest.approx(emissions[0].co2_kg)
+
+
+def test_compute_matches_transaction_emissions(engine):
+    gas_used = np.random.default_rng(0).integers(21000, 500000, size=1000)
+    emissions = engine.compute({"beta": {"gas_used": gas_used}})
+    
+    _, co2 = engine.transaction_emissions("beta", gas_used)
+    assert emissions[0].co2_kg == pytest.approx(co2.sum())
+
+
+def test_compute_without_activity(engine):
+    assert engine.compute({}) == []
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+from onchain_agent.tools.carbon_engine import CarbonEngine
+from onchain_agent.tools.carbon_factors import (
+    DEFAULT_CARBON_DATA,
+    CarbonFactorRegistry,
+    CarbonFactors,
+    FactorSchedule
+)
+
+MERGE_BLOCK, MERGE_TIMESTAMP = 15537394, 1663224162
+
+
+@pytest.fixture
+def engine():
+    return CarbonEngine(CarbonFactorRegistry(CarbonFactorRegistry.CANDIDATE_PATHS[0]))
+
+
+def test_schedule_lookup_by_timestamp_and_block():
+    schedule = CarbonFactors(DEFAULT_CARBON_DATA).schedules[0]
+    assert schedule.periods == ["proof_of_work", "proof_of_stake"]
+    
+    timestamps = np.array([MERGE_TIMESTAMP - 1, MERGE_TIMESTAMP, 0, 0])
+    blocks = np.array([0, 0, MERGE_BLOCK - 1, MERGE_BLOCK])
+    np.testing.assert_array_equal(schedule.lookup(4, timestamps=timestamps), [0, 1, 1, 1])
+    np.testing.assert_array_equal(schedule.lookup(4, block_numbers=blocks), [1, 1, 0, 1])
+    np.testing.assert_array_equal(schedule.lookup(4, timestamps, blocks), [0, 1, 0, 1])
+
+
+def test_block_numbers_take_precedence_and_missing_values_use_the_latest_period():
+    schedule = CarbonFactors(DEFAULT_CARBON_DATA).schedules[0]
+    
+    # A post-Merge timestamp on a pre-Merge block is resolved by the block
+    index = schedule.lookup(2, np.array([MERGE_TIMESTAMP + 10, 0]), np.array([MERGE_BLOCK - 10, 0]))
+    np.testing.assert_array_equal(index, [0, 1])
+    np.testing.assert_array_equal(schedule.lookup(3), [1, 1, 1])
+
+
+def test_schedule_periods_after_the_first_need_a_start():
+    with pytest.raises(ValueError, match="needs a from_timestamp"):
+        FactorSchedule.from_network_data(
+            {"schedule": [{"period": "old"}, {"period": "new", "from_block": 100}]}, 1e-08, 0.5
+        )
+
+
+def test_static_networks_have_one_period(engine):
+    schedule = engine.schedule("polygon")
+    assert len(schedule) == 1
+    np.testing.assert_array_equal(schedule.lookup(2, np.array([1, MERGE_TIMESTAMP])), [0, 0])
+
+
+def test_emissions_follow_the_merge(engine):
+    _, co2 = engine.transaction_emissions("eth", [21000, 21000], timestamps=[1600000000, 1700000000])
+    np.testing.assert_allclose(co2, [21000 * 7.93e-05 * 0.5, 21000 * 9.52e-09 * 0.5])
+    
+    emissions = engine.compute({
+        "ethereum": {"gas_used": np.array([21000, 21000]), "block_number": np.array([MERGE_BLOCK - 1, MERGE_BLOCK])}
+    })
+    assert emissions[0].period_co2_kg == {
+        "proof_of_work": pytest.approx(0.83265), "proof_of_stake": pytest.approx(9.996e-05)
+    }
+
+
+def test_defaults_match_the_shipped_carbon_data(engine):
+    shipped = engine.carbon_factors.data["networks"]["ethereum"]
+    default = DEFAULT_CARBON_DATA["networks"]["ethereum"]
+    assert default["schedule"] == shipped["schedule"]
+    assert engine.factors("ethereum") == (default["energy_per_gas_kwh"], default["co2_per_kwh_kg"])
+
+
+@pytest.mark.parametrize("name", ["eth", "Mainnet", "ETHEREUM", "Ethereum Mainnet"])
+def test_network_aliases(engine, name):
+    assert engine.network_key(name) == "ethereum"
+
+
+def test_missing_data_file_falls_back_to_the_defaults(tmp_path, capsys):
+    factors = CarbonFactorRegistry(tmp_path / "missing.json").get()
+    
+    assert "No carbon data file found" in capsys.readouterr().out
+    assert factors.source is None
+    assert factors.networks == list(DEFAULT_CARBON_DATA["networks"])
+
+
+def test_reload_picks_up_a_changed_data_file(tmp_path):
+    path = tmp_path / "carbon_data.json"
+    path.write_text(json.dumps({"networks": {"alpha": {"energy_per_gas_kwh": 1e-06, "co2_per_kwh_kg": 0.5}}}))
+    registry = CarbonFactorRegistry(path)
+    engine = CarbonEngine(registry)
+    assert engine.factors("alpha") == (1e-06, 0.5)
+    
+    path.write_text(json.dumps({"networks": {"alpha": {"energy_per_gas_kwh": 2e-06, "co2_per_kwh_kg": 0.5}}}))
+    assert engine.factors("alpha") == (1e-06, 0.5)
+    registry.reload()
+    assert engine.factors("alpha") == (2e-06, 0.5)
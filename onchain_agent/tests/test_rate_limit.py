@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from onchain_agent.tools.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def limiter(tmp_path):
+    return RateLimiter({"api.example.com": 10.0, "free.example.com": 0}, path=tmp_path / "rate_limits.db")
+
+
+def test_unlimited_hosts_never_wait(limiter):
+    assert limiter.reserve("free.example.com") == 0.0
+    assert limiter.reserve("unknown.example.com") == 0.0
+    stats = limiter.stats()
+    assert "free.example.com" not in stats
+    assert stats["api.example.com"] == {"rate": 10.0, "requests": 0, "throttled": 0, "wait_seconds": 0.0}
+
+
+def test_burst_is_capped_at_the_rate_then_queued(limiter):
+    waits = [limiter.reserve("API.example.com") for _ in range(12)]
+    
+    # A full bucket covers one second of requests, later ones queue 1/rate apart
+    assert waits[:10] == [0.0] * 10
+    assert waits[10] == pytest.approx(0.1, abs=0.02)
+    assert waits[11] == pytest.approx(0.2, abs=0.02)
+    assert limiter.stats()["api.example.com"]["throttled"] == 2
+
+
+def test_buckets_are_shared_through_the_database(limiter, tmp_path):
+    other = RateLimiter({"api.example.com": 10.0}, path=tmp_path / "rate_limits.db")
+    for _ in range(10):
+        limiter.reserve("api.example.com")
+    assert other.reserve("api.example.com") > 0
+
+
+def test_pause_holds_back_every_caller(limiter):
+    limiter.pause("api.example.com", 2.0)
+    assert limiter.reserve("api.example.com") == pytest.approx(2.1, abs=0.05)
+    
+    # Pausing an unlimited host is a no-op
+    limiter.pause("free.example.com", 5.0)
+    assert limiter.reserve("free.example.com") == 0.0
+
+
+def test_parse_rates_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("ONCHAIN_RATE_LIMITS", "API.example.com=2.5, other.example.com=0,invalid")
+    limiter = RateLimiter(path=tmp_path / "rate_limits.db")
+    assert limiter.rates["api.example.com"] == 2.5
+    assert limiter.rates["other.example.com"] == 0.0
+
+
+def test_aacquire_waits_without_blocking_the_event_loop(limiter):
+    async def main():
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+        
+        task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        await asyncio.gather(*[limiter.aacquire("api.example.com") for _ in range(13)])
+        elapsed = time.monotonic() - started
+        task.cancel()
+        return elapsed, ticks
+    
+    elapsed, ticks = asyncio.run(main())
+    assert elapsed >= 0.25
+    assert ticks >= 10
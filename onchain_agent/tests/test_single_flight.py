@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from onchain_agent.tools.single_flight import SingleFlight
+
+
+def test_make_key_ignores_dict_order():
+    assert SingleFlight.make_key("url", {"a": 1, "b": 2}) == SingleFlight.make_key("url", {"b": 2, "a": 1})
+    assert SingleFlight.make_key("url", {"a": 1}) != SingleFlight.make_key("url", {"a": 2})
+
+
+def test_do_coalesces_concurrent_threads():
+    group = SingleFlight()
+    calls = []
+    release = threading.Event()
+    
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return {"value": [1, 2]}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("key", fn))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert results == [{"value": [1, 2]}] * 5
+    # Every caller gets its own copy
+    assert len({id(result) for result in results}) == 5
+    assert group.stats() == {"calls": 5, "coalesced": 4}
+
+
+def test_do_shares_errors_and_forgets_finished_calls():
+    group = SingleFlight()
+    
+    def fail():
+        raise ValueError("boom")
+    
+    with pytest.raises(ValueError):
+        group.do("key", fail)
+    assert group.do("key", lambda: 42) == 42
+
+
+def test_ado_coalesces_and_copies_results():
+    group = SingleFlight()
+    calls = []
+    
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": [1]}
+    
+    async def main():
+        return await asyncio.gather(*[group.ado("key", fn) for _ in range(4)])
+    
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{"value": [1]}] * 4
+    results[0]["value"].append(2)
+    assert results[1] == {"value": [1]}
+
+
+def test_ado_shares_errors():
+    group = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+    
+    async def main():
+        return await asyncio.gather(*[group.ado("key", fail) for _ in range(3)], return_exceptions=True)
+    
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    group = SingleFlight()
+    calls = []
+    
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+    
+    async def main():
+        leader = asyncio.create_task(group.ado("key", fn))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(group.ado("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(leader, *followers, return_exceptions=True)
+    
+    leader_result, *follower_results = asyncio.run(main())
+    assert isinstance(leader_result, asyncio.CancelledError)
+    # One follower runs the call again and the others share its result
+    assert len(calls) == 2
+    assert follower_results == [2, 2, 2]
+
+
+def test_cancelled_follower_does_not_cancel_the_call():
+    group = SingleFlight()
+    
+    async def fn():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    async def main():
+        leader = asyncio.create_task(group.ado("key", fn))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(group.ado("key", fn))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+    
+    leader_result, follower_result = asyncio.run(main())
+    assert leader_result == "done"
+    assert isinstance(follower_result, asyncio.CancelledError)
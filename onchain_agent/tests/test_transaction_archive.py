@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from onchain_agent.tools.transaction_archive import TransactionArchive, normalize_timestamp
+
+HASH = "0x" + "ab" * 32
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return TransactionArchive(tmp_path / "transaction_archive.db")
+
+
+def mined(age_seconds, milliseconds=False):
+    timestamp = time.time() - age_seconds
+    return {"hash": HASH, "blockNumber": 123, "timestamp": int(timestamp * 1000 if milliseconds else timestamp)}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("not a number", None),
+    (1_700_000_000, 1_700_000_000),
+    ("1700000000", 1_700_000_000),
+    (1_700_000_000_000, 1_700_000_000)
+])
+def test_normalize_timestamp(value, expected):
+    assert normalize_timestamp(value) == expected
+
+
+def test_only_old_mined_transactions_are_final(archive):
+    assert archive.is_final(mined(3600))
+    assert archive.is_final(mined(3600, milliseconds=True))
+    assert not archive.is_final(mined(60))
+    assert not archive.is_final({**mined(3600), "blockNumber": None})
+    assert not archive.is_final({})
+
+
+def test_final_transactions_round_trip(archive):
+    transaction = {**mined(3600), "transfers": [{"amount": "1.5", "symbol": "ETH"}]}
+    assert archive.put(1, HASH, transaction)
+    
+    # Hashes are matched case-insensitively and scoped to the chain
+    assert archive.get(1, HASH.upper().replace("0X", "0x")) == transaction
+    assert archive.get(137, HASH) is None
+    assert archive.count() == 1
+
+
+def test_pending_transactions_are_not_archived(archive):
+    assert not archive.put(1, HASH, mined(60))
+    assert archive.get(1, HASH) is None
+    assert archive.count() == 0
+
+
+def test_entries_are_written_once(archive):
+    archive.put(1, HASH, {**mined(3600), "note": "first"})
+    archive.put(1, HASH, {**mined(3600), "note": "second"})
+    assert archive.get(1, HASH)["note"] == "first"
+
+
+def test_non_hex_hashes_are_stored(archive):
+    assert archive.put(1, "not-a-hex-hash", mined(3600))
+    assert archive.get(1, "NOT-A-HEX-HASH") is not None
+
+
+def test_archive_persists_across_instances(archive):
+    archive.put(1, HASH, mined(3600))
+    assert TransactionArchive(archive.path).get(1, HASH) is not None
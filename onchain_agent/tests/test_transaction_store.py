@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from onchain_agent.tools import moralis_transaction_tool
+from onchain_agent.tools.moralis_transaction_tool import MoralisTransactionTool, TransactionAggregator
+from onchain_agent.tools.transaction_store import TransactionStore
+
+ADDRESS = "0xAbC"
+
+
+def make_tx(block, gas=21000, value="0", data="0x"):
+    return {
+        "hash": f"0x{block:064x}",
+        "block_number": str(block),
+        "block_timestamp": f"2024-01-{1 + block % 28:02d}T00:00:00.000Z",
+        "receipt_gas_used": str(gas),
+        "value": value,
+        "input": data
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TransactionStore(tmp_path / "transactions.db")
+
+
+def test_add_transactions_tracks_highest_block_and_completion(store):
+    assert store.get_sync_state(ADDRESS, "eth") is None
+    
+    assert store.add_transactions(ADDRESS, "eth", [make_tx(10), make_tx(12)], TransactionAggregator.classify) == 12
+    state = store.get_sync_state(ADDRESS.lower(), "eth")
+    assert state["last_block"] == 12
+    assert state["complete"] is False
+    
+    # An older or empty page never moves the sync state back
+    store.add_transactions(ADDRESS, "eth", [make_tx(5)], TransactionAggregator.classify, complete=True)
+    state = store.get_sync_state(ADDRESS, "eth")
+    assert state["last_block"] == 12
+    assert state["complete"] is True
+
+
+def test_reads_are_scoped_to_address_and_chain(store):
+    store.add_transactions(ADDRESS, "eth", [
+        make_tx(1, value="5"), make_tx(2, data="0xa9059cbb"), make_tx(3, gas=50000)
+    ], TransactionAggregator.classify)
+    store.add_transactions(ADDRESS, "polygon", [make_tx(4)], TransactionAggregator.classify)
+    # Re-adding a transaction replaces it instead of duplicating it
+    store.add_transactions(ADDRESS, "eth", [make_tx(3, gas=50000)], TransactionAggregator.classify)
+    
+    assert [tx["block_number"] for tx in store.iter_transactions(ADDRESS, "eth")] == [3, 2, 1]
+    assert [tx["block_number"] for tx in store.iter_transactions(ADDRESS, "eth", from_block=2)] == [3, 2]
+    assert store.type_counts(ADDRESS, "eth") == {"simple_transfer": 1, "contract_interaction": 1, "other": 1}
+    
+    arrays = store.gas_arrays(ADDRESS, "eth")
+    assert sorted(arrays["gas_used"].tolist()) == [21000, 21000, 50000]
+    assert sorted(arrays["block_number"].tolist()) == [1, 2, 3]
+    assert (arrays["timestamp"] > 1_700_000_000).all()
+    assert store.gas_arrays("0xother", "eth")["gas_used"].size == 0
+
+
+class FakeMoralis:
+    """Serves a fixed chain history oldest first, paged like the Moralis wallet history endpoint."""
+    
+    def __init__(self, blocks, page_size=2):
+        self.blocks = blocks
+        self.page_size = page_size
+        self.requests = []
+    
+    async def iter_pages(self, address, chain_id, limit, from_block, from_date, max_pages, stats, order="DESC"):
+        self.requests.append(from_block)
+        blocks = [
+            block for block in self.blocks
+            if (from_block is None or block >= from_block)
+            and (not from_date or make_tx(block)["block_timestamp"] >= from_date)
+        ]
+        for start in range(0, len(blocks), self.page_size):
+            stats.pages_fetched += 1
+            last = start + self.page_size >= len(blocks)
+            yield {
+                "result": [make_tx(block) for block in blocks[start:start + self.page_size]],
+                "cursor": None if last else f"page-{start}"
+            }
+            if not last and max_pages and stats.pages_fetched >= max_pages:
+                stats.truncated = True
+                return
+
+
+@pytest.fixture
+def moralis(store, monkeypatch):
+    fake = FakeMoralis(list(range(1, 8)))
+    monkeypatch.setattr(moralis_transaction_tool, "get_transaction_store", lambda: store)
+    monkeypatch.setattr(MoralisTransactionTool, "_iter_pages", fake.iter_pages)
+    return fake
+
+
+def test_sync_resumes_until_the_chain_head_then_skips_recent_syncs(store, moralis):
+    tool = MoralisTransactionTool()
+    
+    # The page budget cuts the first sync short, so it stays incomplete
+    stats = asyncio.run(tool.aupdate_store(ADDRESS, "eth", max_pages=2))
+    assert stats.truncated
+    assert stats.new_transactions == 4
+    assert store.get_sync_state(ADDRESS, "eth")["complete"] is False
+    
+    # An incomplete sync is resumed from its last block, even right away
+    stats = asyncio.run(tool.aupdate_store(ADDRESS, "eth", max_pages=2))
+    assert moralis.requests == [None, 4]
+    assert not stats.truncated
+    assert store.get_sync_state(ADDRESS, "eth")["complete"] is True
+    assert len(list(store.iter_transactions(ADDRESS, "eth"))) == 7
+    
+    # A recent complete sync is served from the store without an API call
+    stats = asyncio.run(tool.aupdate_store(ADDRESS, "eth"))
+    assert moralis.requests == [None, 4]
+    assert stats.pages_fetched == 0
+
+
+def test_stale_complete_sync_fetches_new_blocks(store, moralis, monkeypatch):
+    tool = MoralisTransactionTool()
+    asyncio.run(tool.aupdate_store(ADDRESS, "eth"))
+    
+    monkeypatch.setattr(MoralisTransactionTool, "MIN_RESYNC_SECONDS", 0)
+    moralis.blocks.append(8)
+    stats = asyncio.run(tool.aupdate_store(ADDRESS, "eth"))
+    assert moralis.requests == [None, 7]
+    assert stats.pages_fetched == 1
+    assert store.get_sync_state(ADDRESS, "eth")["last_block"] == 8
+    
+    summary = asyncio.run(tool.afetch_summary(ADDRESS, "ethereum"))
+    assert summary.chain == "eth"
+    assert summary.total_transactions == 8
+    assert summary.total_gas_used == 8 * 21000
+
+
+def test_first_sync_starts_at_the_requested_bounds(store, moralis):
+    tool = MoralisTransactionTool()
+    moralis.blocks[:] = range(1, 21)
+    
+    # Only the in-range pages are fetched, well within the page budget
+    summary = asyncio.run(tool.afetch_summary(ADDRESS, "eth", from_date="2024-01-18", max_pages=2))
+    assert summary.total_transactions == 4
+    assert summary.pages_fetched == 2
+    assert not summary.truncated
+    assert store.get_sync_state(ADDRESS, "eth")["from_date"] == "2024-01-18"
+    
+    # A later range inside the stored history is served from the store
+    summary = asyncio.run(tool.afetch_summary(ADDRESS, "eth", from_date="2024-01-20"))
+    assert summary.total_transactions == 2
+    assert summary.pages_fetched == 0
+    
+    # A request reaching before the stored history syncs again from its own bounds
+    stats = asyncio.run(tool.aupdate_store(ADDRESS, "eth"))
+    assert moralis.requests == [None, None]
+    assert stats.new_transactions == 20
+    assert store.get_sync_state(ADDRESS, "eth")["from_date"] is None